@@ -2,6 +2,7 @@
 # https://github.com/Ausar686
 
 from .actors import *
+from .api import *
 from .chat import *
 from .containers import *
 from .heuristics import *
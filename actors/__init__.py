@@ -2,9 +2,16 @@
 # https://github.com/Ausar686
 
 from .anti_list_actor import AntiListActor
+from .async_chat_bot import AsyncChatBot
+from .async_qagpt import AsyncQAGPT
+from .async_text_summarizer import AsyncTextSummarizer
 from .chat_bot import ChatBot
+from .context_policy import ContextPolicy, EvictOldestPolicy, SlidingWindowPolicy, make_context_policy
+from .extractive_compressor import ExtractiveCompressor
 from .google_searcher import GoogleSearcher
 from .knowledge_base_searcher import KnowledgeBaseSearcher
 from .qagpt import QAGPT
-from .token_counter import TokenCounter
+from .selectors import by_score, get_selector, select_first, select_shortest
+from .text_chunker import TextChunker
+from .token_counter import EncodingRegistry, TokenCounter, get_encoding_registry
 from .text_summarizer import TextSummarizer
\ No newline at end of file
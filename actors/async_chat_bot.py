@@ -0,0 +1,372 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import AsyncIterator, Tuple, Union
+import asyncio
+import inspect
+
+from .async_text_summarizer import AsyncTextSummarizer
+from .chat_bot import ChatBot
+from .qagpt import QAGPT
+from ..api import configure_async_client
+from ..chat import Message
+from ..containers import RDict
+from ..utils import arequest_openai, astream_openai, method_logger
+
+
+class AsyncChatBot(ChatBot):
+    """
+    Asyncio-native counterpart of ChatBot.
+    Initialization and context management are the same as in ChatBot,
+    while all methods, which send requests to OpenAI API, are coroutines.
+    Thus a single event loop can drive lots of concurrent conversations.
+    Example:
+        bot = AsyncChatBot("/path/to/config/file.json")
+        bot.add_user_message("Hello!")
+        msg = await bot.get_answer()
+    """
+
+    _summarizer_class = AsyncTextSummarizer
+
+    # Options of "http" section, which are named differently in AsyncOpenAIClient.
+    # 'pool_connections' has no counterpart, since aiohttp keeps a single pool for all hosts.
+    _async_http_options = {
+        "pool_maxsize": "limit_per_host",
+        "pool_connections": None,
+    }
+
+    @method_logger
+    def set_http_parameters(self) -> None:
+        """
+        Configures both process-wide HTTP clients for OpenAI API (sync one is still used by sync actors),
+        if "http" section is present in configuration files.
+        'pool_maxsize' limits the number of connections per host of the async client.
+        NOTE: The clients are shared among all bots and actors in the process.
+        """
+        if "http" not in self.parameters:
+            return
+        super().set_http_parameters()
+        kwargs = {}
+        for option, value in self.http.items():
+            option = self._async_http_options.get(option, option)
+            if option is not None:
+                kwargs[option] = value
+        configure_async_client(**kwargs)
+        return
+
+    async def get_completion(self) -> RDict:
+        """
+        Sends context to OpenAI API and receives response from it as a completion.
+        Failed requests are retried according to 'self.retry_policy'.
+        """
+        completion = await self.retry_policy.acall(arequest_openai, messages=self.context, **self.openai)
+        return completion
+
+    async def fget_completion(self) -> RDict:
+        """
+        Sends context to OpenAI API and receives response from it as a completion.
+        Response CAN contain a function call from self.usable_functions.
+        """
+        if self.usable_functions is None:
+            return await self.get_completion()
+        completion = await self.retry_policy.acall(
+            arequest_openai,
+            functions=self.usable_functions,
+            messages=self.context,
+            **self.openai)
+        return completion
+
+    async def get_stream(self) -> AsyncIterator[RDict]:
+        """
+        Sends context to OpenAI API and yields completion chunks, as soon as they arrive.
+        Function calls are not supported for streaming.
+        """
+        chunks = await self.retry_policy.acall(astream_openai, messages=self.context, **self.openai)
+        async for chunk in chunks:
+            yield chunk
+
+    async def get_answer(self) -> Message:
+        """
+        Full pipeline of answer obtaining from OpenAI API.
+        """
+        completion = await self.get_completion()
+        msg = self.process_completion(completion)
+        return msg
+
+    async def stream_answer(self) -> AsyncIterator[str]:
+        """
+        Streaming pipeline of answer obtaining from OpenAI API.
+        Yields content deltas, as soon as they arrive.
+        When the stream is finished, assembles the final Message
+        and appends it both to chat and context (as 'process_output' does).
+        Example:
+            async for delta in bot.stream_answer():
+                print(delta, end="", flush=True)
+        """
+        deltas = []
+        async for chunk in self.get_stream():
+            delta = QAGPT.delta_from_chunk(chunk)
+            if delta:
+                deltas.append(delta)
+                yield delta
+        msg = self.deltas_to_message(deltas)
+        self.append(msg)
+
+    async def fget_answer(self) -> Message:
+        """
+        Full pipeline of answer obtaining from OpenAI API.
+        """
+        try:
+            completion = await self.fget_completion()
+            msg = self.process_completion(completion)
+            return msg
+        except Exception:
+            return await self.get_answer()
+
+    async def reply(self, text: str) -> Message:
+        """
+        Non-blocking counterpart of 'ChatBot.reply'.
+        """
+        self.add_user_message(text)
+        await self.verify_context()
+        if self.usable_functions is not None:
+            msg = await self.fget_answer()
+        elif self.openai.stream:
+            async for _ in self.stream_answer():
+                pass
+            return self.last_message
+        else:
+            msg = await self.get_answer()
+        self.append(msg)
+        return msg
+
+    async def verify_context(self) -> None:
+        """
+        Verifies, that context length is not out-of-range.
+        If it is, summarizes the context and updates it.
+        """
+        self.swap_background_summary()
+        await self.apply_context_policy()
+        # Exact counting is performed only, if the estimated size is within the safety margin of the limit.
+        if self.is_context_surely_fit():
+            self.schedule_background_summary()
+            return
+        if len(self) > self.size_limit:
+            # Wait for pending background summary instead of starting another one.
+            if self._background_summary is not None:
+                await self.wait_background_summary()
+                await self.verify_context()
+                return
+            # Check for huge prompt injection
+            if self.last_message_len > self.size_limit:
+                try:
+                    self.upgrade_model()
+                except KeyError:
+                    self.fix_injection()
+                await self.verify_context()
+                return
+            try:
+                self.upgrade_model()
+            except KeyError:
+                await self.summarize_context()
+            await self.verify_context()
+            return
+        self.schedule_background_summary()
+        return
+
+    async def summarize_context(self) -> None:
+        """
+        Performs context summarization. By default, is used once context length reaches the limit.
+        Both async and sync summarizers are supported.
+        """
+        if self.summary_mode == "rolling":
+            await self.roll_summary()
+        else:
+            summary = await self.run_summarizer(self.context[1:-1])
+            self.set_summary(summary)
+        try:
+            self.downgrade_model()
+        except KeyError:
+            pass
+        return
+
+    async def apply_context_policy(self) -> bool:
+        """
+        Non-blocking counterpart of 'ChatBot.apply_context_policy'.
+        """
+        if self._context_policy is None:
+            return False
+        is_evicted = False
+        # The summary of evicted messages may itself exceed the budget, so repeat until nothing is evicted.
+        # Policies evict nothing, once protected messages alone exceed the budget, so each round summarizes
+        # at least the messages, which are required to fit it.
+        while True:
+            evicted = self.evict_context(self._context_policy.select(self))
+            if not evicted:
+                return is_evicted
+            is_evicted = True
+            if not self._context_policy.summarize:
+                return is_evicted
+            self.add_to_summary(evicted, await self.run_summarizer(evicted))
+
+    async def roll_summary(self) -> None:
+        """
+        Non-blocking counterpart of 'ChatBot.roll_summary'.
+        """
+        summary, key = await self.summarize_range(*self.get_summary_range())
+        self.set_summary(summary, key)
+        return
+
+    async def summarize_range(self, previous: RDict, messages: list) -> Tuple[str, str]:
+        """
+        Non-blocking counterpart of 'ChatBot.summarize_range'.
+        """
+        if self.summary_mode != "rolling":
+            if previous is not None:
+                messages = [self.sys_message(previous.text).to_openai(), *messages]
+            return await self.run_summarizer(messages), None
+        key = self.hash_messages(messages)
+        covered_key = key if previous is None else self.hash_messages(messages, previous.key)
+        summary = self.get_cached_summary(covered_key)
+        if summary is None:
+            summary = self.get_cached_summary(key)
+            if summary is None and messages:
+                summary = await self.run_summarizer(messages)
+                self.cache_summary(key, summary)
+            summary = self.merge_summaries(previous, summary)
+            if not messages or self.actors.token_counter.run(summary) > self.summary_max_tokens:
+                summary = await self.run_summarizer(summary)
+            self.cache_summary(covered_key, summary)
+        return summary, covered_key
+
+    def submit_summary(self, previous: RDict, messages: list) -> asyncio.Future:
+        """
+        Runs 'summarize_range' as a background task of the event loop.
+        The task caches summaries itself, since it runs in the same thread as the bot.
+        """
+        async def summarize() -> Tuple[str, str, dict]:
+            summary, key = await self.summarize_range(previous, messages)
+            return summary, key, {}
+
+        return asyncio.ensure_future(summarize())
+
+    async def wait_background_summary(self) -> bool:
+        """
+        Waits for pending background summary and swaps it in.
+        """
+        job = self._background_summary
+        if job is None:
+            return False
+        await asyncio.wait([job.future])
+        return self.swap_background_summary()
+
+    async def run_summarizer(self, obj: Union[str, list]) -> str:
+        summary = self.actors.summarizer.run(obj)
+        if inspect.isawaitable(summary):
+            summary = await summary
+        return summary
+
+    async def display_stream(self, deltas: AsyncIterator[str], *args, **kwargs) -> None:
+        """
+        Displays streamed message token-by-token.
+        """
+        print(f"[{self.name}]: ", end="", flush=True)
+        async for delta in deltas:
+            print(delta, end="", flush=True)
+        print()
+        return
+
+    async def process_output(self, *args, **kwargs) -> None:
+        """
+        Full pipeline of OpenAI output processing.
+        If 'stream' option is enabled, the answer is displayed, as soon as it arrives.
+        """
+        if self.openai.stream:
+            await self.display_stream(self.stream_answer(), *args, **kwargs)
+            return
+        msg = await self.get_answer()
+        self.append(msg)
+        self.display(*args, **kwargs)
+        return
+
+    async def fprocess_output(self, *args, **kwargs) -> None:
+        """
+        Full pipeline of OpenAI output processing.
+        """
+        msg = await self.fget_answer()
+        self.append(msg)
+        self.display(*args, **kwargs)
+        return
+
+    async def run(self, *args, **kwargs) -> None:
+        """
+        Main method. Executes dialogue with chat-bot.
+        Currently only console mode is implemented.
+        """
+        if self.usable_functions is not None:
+            return await self.frun(*args, **kwargs)
+        if self._runtime_mode == "app":
+            return await self.run_in_app_mode(*args, **kwargs)
+        elif self._runtime_mode == "console":
+            return await self.run_in_console_mode(*args, **kwargs)
+        else:
+            raise ValueError(self._mode_error)
+
+    async def frun(self, *args, **kwargs) -> None:
+        """
+        Main method. Executes dialogue with chat-bot.
+        Function calls are enabled in this method.
+        """
+        if self._runtime_mode == "app":
+            return await self.frun_in_app_mode(*args, **kwargs)
+        elif self._runtime_mode == "console":
+            return await self.frun_in_console_mode(*args, **kwargs)
+        else:
+            raise ValueError(self._mode_error)
+
+    async def run_in_app_mode(self, *args, **kwargs) -> None:
+        """
+        Runs bot in mobile application mode in the current event loop (see 'ChatBot.run_in_app_mode').
+        """
+        from .chat_server import ChatServer
+        await ChatServer(self.for_user, *args, **kwargs).serve()
+        return
+
+    async def run_in_console_mode(self, *args, **kwargs) -> None:
+        """
+        Runs bot in console mode.
+        """
+        while not self.is_over:
+            await self.process_output(*args, **kwargs)
+            self.process_input(*args, **kwargs)
+            await self.verify_context()
+        else:
+            await self.end_conversation(*args, **kwargs)
+        return
+
+    async def frun_in_app_mode(self, *args, **kwargs) -> None:
+        """
+        Runs bot in mobile application mode with function calls enabled (see 'ChatBot.run_in_app_mode').
+        """
+        return await self.run_in_app_mode(*args, **kwargs)
+
+    async def frun_in_console_mode(self, *args, **kwargs) -> None:
+        """
+        Runs bot in console mode.
+        """
+        while not self.is_over:
+            await self.fprocess_output(*args, **kwargs)
+            self.fprocess_input(*args, **kwargs)
+            await self.verify_context()
+        else:
+            await self.end_conversation(*args, **kwargs)
+        return
+
+    async def end_conversation(self, *args, **kwargs) -> None:
+        content = "Был рад помочь!"
+        msg = self.bot_message(content)
+        self.append(msg)
+        self.display(*args, **kwargs)
+        await self.verify_context()
+        self.chat.to_disk()
+        return
@@ -0,0 +1,314 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import Any, AsyncIterator, Callable, Iterable, List, Union
+import asyncio
+import re
+
+from pandas.core.frame import DataFrame
+from pandas.core.series import Series
+
+from .qagpt import QAGPT
+from ..utils import arequest_openai, astream_openai
+
+
+class AsyncQAGPT(QAGPT):
+    """
+    Asyncio-native counterpart of QAGPT.
+    Exposes the same interface: arguments, return values, retries and parsing of all methods match QAGPT,
+    but all requesting methods are coroutines (streaming ones are async generators),
+    so that a single event loop can drive lots of concurrent requests.
+    Example:
+        gpt = AsyncQAGPT()
+        answer = await gpt.get_list("Write list of all European countries")
+    """
+
+    async def ask(self, messages: list) -> str:
+        """
+        Sends request to OpenAI server and returns a answer in string format.
+        Args:
+            messages (list): List of messages (dicts). By default, it's supposed, that you make messages using 'form_messages' method.
+        Reurns:
+            answer (str): Model response in string format.
+        """
+        answers = await self.ask_all(messages)
+        return answers[self.selector(answers)]
+
+    async def ask_all(self, messages: list) -> List[str]:
+        """
+        Sends request to OpenAI server and returns all generated answers (n) in string format.
+        NOTE: Only the first answer is received in streaming mode.
+        Args:
+            messages (list): List of messages (dicts). By default, it's supposed, that you make messages using 'form_messages' method.
+        Returns:
+            answers (List[str]): Model responses in string format in the order of their indices.
+        """
+        if self.openai.stream:
+            return ["".join([delta async for delta in await self.open_stream(messages)])]
+        completion = await arequest_openai(messages=messages, **self.openai)
+        return self.answers_from_completion(completion)
+
+    async def open_stream(self, messages: list) -> AsyncIterator[str]:
+        """
+        Sends streaming request to OpenAI server and returns an async iterator over answer deltas.
+        Unlike 'stream', failed request is not retried.
+        """
+        return self.iter_deltas(await astream_openai(messages=messages, **self.openai))
+
+    async def stream(self, messages: list) -> AsyncIterator[str]:
+        """
+        Sends streaming request to OpenAI server and yields answer deltas, as soon as they arrive.
+        Failed request is retried according to 'self.retry_policy'.
+        Errors in the middle of the stream are not retried, since a part of the answer is already yielded.
+        Args:
+            messages (list): List of messages (dicts). By default, it's supposed, that you make messages using 'form_messages' method.
+        Yields:
+            delta (str): Next piece of model response.
+        """
+        async for delta in await self.retry_policy.acall(self.open_stream, messages):
+            yield delta
+
+    @staticmethod
+    async def iter_deltas(chunks: AsyncIterator[dict]) -> AsyncIterator[str]:
+        """
+        Converts an async iterator over completion chunks into an async iterator over answer deltas.
+        """
+        async for chunk in chunks:
+            delta = QAGPT.delta_from_chunk(chunk)
+            if delta:
+                yield delta
+
+    async def get_answer(self, messages: list) -> str:
+        """
+        Wrapper around 'ask' method for case of running out of TPM (tokens per minute) or RPM (requests per minute).
+        Failed requests are retried according to 'self.retry_policy'.
+        It is strongly recommended to use this method and not 'ask' one.
+        Args:
+            messages (list): List of messages (dicts). By default, it's supposed, that you make messages using 'form_messages' method.
+        Reurns:
+            answer (str): Model response in string format.
+        """
+        return await self.retry_policy.acall(self.ask, messages)
+
+    async def ask_parsed(self, messages: list, parser: Callable) -> Any:
+        """
+        Sends request to OpenAI server and converts the answer with 'parser'.
+        If several answers are generated (n > 1), all of them are converted,
+        and the result is selected among successfully converted ones by 'self.selector'.
+        Raises ParseError, if none of the answers can be converted.
+        """
+        return self.select_parsed(await self.ask_all(messages), parser)
+
+    async def get_parsed(self, messages: list, parser: Callable) -> Any:
+        """
+        Wrapper around 'ask_parsed' method, which is used by typed 'get_' methods.
+        Both failed requests and unparsable answers are retried according to 'self.retry_policy'
+        and share the same budget of attempts.
+        Args:
+            messages (list): List of messages (dicts).
+            parser (Callable): Function, which converts string answer into the result of specific type.
+        Returns:
+            answer (Any): Converted model response.
+        """
+        return await self.retry_policy.acall(self.ask_parsed, messages, parser)
+
+    async def get_int(self, request: str) -> int:
+        """
+        Return an API response for the request as an integer.
+        Args:
+            request (str): Text request to OpenAI API.
+        Returns:
+            answer (int): OpenAI API response as an integer.
+        """
+        return await self.get_parsed(self.form_messages(self.wrap_int(request)), self.parse_int)
+
+    async def get_float(self, request: str) -> float:
+        """
+        Return an API response for the request as a float.
+        Args:
+            request (str): Text request to OpenAI API.
+        Returns:
+            answer (float): OpenAI API response as a float.
+        """
+        return await self.get_parsed(self.form_messages(self.wrap_float(request)), self.parse_float)
+
+    async def get_prob(self, request: str) -> float:
+        """
+        Return an API response for the request as a probability (float from 0.0 to 1.0).
+        Args:
+            request (str): Text request to OpenAI API.
+        Returns:
+            answer (float): OpenAI API response as a probability.
+        """
+        return await self.get_parsed(self.form_messages(self.wrap_float(request)), self.parse_prob)
+
+    async def get_list(self, request: str) -> list:
+        """
+        Return an API response for the request as a list.
+        Args:
+            request (str): Text request to OpenAI API.
+        Returns:
+            answer (list): OpenAI API response as a list.
+        """
+        return await self.get_parsed(self.form_messages(self.wrap_list(request)), self.parse_list)
+
+    async def get_dict(self, request: str) -> dict:
+        """
+        Return an API response for the request as a dict.
+        Args:
+            request (str): Text request to OpenAI API.
+        Returns:
+            answer (dict): OpenAI API response as a dict.
+        """
+        return await self.get_parsed(self.form_messages(self.wrap_dict(request)), self.parse_dict)
+
+    async def get_str(self, request: str) -> str:
+        """
+        Return an API response for the request as a string.
+        Args:
+            request (str): Text request to OpenAI API.
+        Returns:
+            answer (str): OpenAI API response as a string.
+        """
+        return await self.get_answer(self.form_messages(request))
+
+    async def iter_str(self, request: str) -> AsyncIterator[str]:
+        """
+        Yield an API response for the request token-by-token.
+        Args:
+            request (str): Text request to OpenAI API.
+        Yields:
+            delta (str): Next piece of OpenAI API response.
+        """
+        async for delta in self.stream(self.form_messages(request)):
+            yield delta
+
+    async def iter_list(self, request: str) -> AsyncIterator[str]:
+        """
+        Yield an API response for the request element-by-element.
+        Each element is scrubbed and yielded, as soon as its line is complete in the stream.
+        Produces the same elements, as 'get_list' does.
+        Args:
+            request (str): Text request to OpenAI API.
+        Yields:
+            elem (str): Next element of OpenAI API response as a list.
+        """
+        buffer = ""
+        async for delta in self.stream(self.form_messages(self.wrap_list(request))):
+            lines, buffer = self.split_lines(buffer + delta)
+            for line in lines:
+                yield self.scrub_elem(line)
+        yield self.scrub_elem(buffer)
+
+    async def iter_dict(self, request: str) -> AsyncIterator[tuple]:
+        """
+        Yield an API response for the request pair-by-pair.
+        Each (key, value) pair is yielded, as soon as it's complete in the stream.
+        Args:
+            request (str): Text request to OpenAI API.
+        Yields:
+            pair (tuple): Next (key, value) pair of OpenAI API response as a dict.
+        """
+        buffer = ""
+        async for delta in self.stream(self.form_messages(self.wrap_dict(request))):
+            pairs, buffer = self.split_pairs(buffer + re.sub(r"[\{\}]", "", delta))
+            for pair in pairs:
+                yield pair
+        # The rest of the stream is the last pair, which is not followed by a separator.
+        for pair in self.split_pairs(buffer + "\n")[0]:
+            yield pair
+
+    async def get_type(self, request: str) -> str:
+        """
+        [EXPERIMENTAL]: Returns the name of type of the answer, that user wants to obtain. May work inaccurately.
+        Args:
+            request (str): Text request to OpenAI API.
+        Returns:
+            max_type (str): Predicted name of type of the answer, that user wants to obtain.
+        """
+        return await self.get_parsed(self.form_messages(self.wrap_dict(self.wrap_type(request))), self.parse_type)
+
+    async def __call__(self, request: str) -> Union[int, float, list, dict, str]:
+        """
+        [EXPERIMENTAL]: Returns an OpenAI API response to request in type, that user wants to obtain. May work inaccurately.
+        Args:
+            request (str): Text request to OpenAI API.
+        Returns:
+            answer (Union[int, float, list, dict, str]): OpenAI API answer in a most desired format.
+        """
+        return await getattr(self, f'get_{await self.get_type(request)}')(request)
+
+    async def run(self, request: str) -> str:
+        """
+        An alias for 'get_str' method for usage as an actor in AsyncChatBot
+        """
+        return await self.get_str(request)
+
+    async def map(
+        self,
+        requests: Iterable[str],
+        kind: str="str",
+        concurrency: int=8,
+        progress: Callable[[int, int], None]=None,
+        return_exceptions: bool=True) -> list:
+        """
+        Returns API responses for all requests, obtained with 'get_<kind>' method.
+        Requests are sent concurrently by the event loop, at most 'concurrency' at a time.
+        All requests still pass through process-wide rate limiter (see 'RAI.api.get_rate_limiter'),
+        so the concurrency is capped by RPM/TPM limits as well.
+        Args:
+            requests (Iterable[str]): Text requests to OpenAI API.
+            kind (str): Kind of the answers: "int", "float", "prob", "list", "dict", "str" or "type". Default: "str".
+            concurrency (int): Maximum number of simultaneous requests. Default: 8.
+            progress (Callable[[int, int], None]): Function, which is called with (n_done, n_total) after each completed request. Default: None.
+            return_exceptions (bool): Whether to put the exception into the results instead of the answer of a failed request (True),
+                                      or to cancel pending requests and raise the exception (False). Default: True.
+        Returns:
+            results (list): Answers (or exceptions) in the same order, as requests.
+        """
+        if concurrency < 1:
+            raise ValueError(f"Concurrency must be a positive integer, got: {concurrency}")
+        getter = self.get_getter(kind)
+        requests = list(requests)
+        total = len(requests)
+        results = [None] * total
+        semaphore = asyncio.Semaphore(concurrency)
+        n_done = 0
+
+        async def process(index: int, request: str) -> None:
+            nonlocal n_done
+            async with semaphore:
+                try:
+                    results[index] = await getter(request)
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results[index] = e
+            n_done += 1
+            if progress is not None:
+                progress(n_done, total)
+            return
+
+        tasks = [asyncio.ensure_future(process(index, request)) for index, request in enumerate(requests)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return results
+
+    async def apply_column(self, df: DataFrame, col: str, kind: str="str", **kwargs) -> Series:
+        """
+        Applies 'map' to the column of pandas DataFrame.
+        Args:
+            df (DataFrame): Source DataFrame.
+            col (str): Name of the column with requests.
+            kind (str): Kind of the answers (see 'map'). Default: "str".
+            **kwargs: Other 'map' kwargs (concurrency, progress, return_exceptions).
+        Returns:
+            answers (Series): Answers, aligned with the index of 'df'.
+        Example:
+            df["countries"] = await gpt.apply_column(df, "request", kind="list", concurrency=16)
+        """
+        results = await self.map(df[col].tolist(), kind=kind, **kwargs)
+        return Series(results, index=df.index, name=col, dtype=object)
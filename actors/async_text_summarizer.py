@@ -0,0 +1,69 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import Callable, List, Union
+from collections import deque
+
+from .async_qagpt import AsyncQAGPT
+from .text_summarizer import TextSummarizer
+
+
+class AsyncTextSummarizer(TextSummarizer):
+    """
+    Asyncio-native counterpart of TextSummarizer.
+    Example:
+        summarizer = AsyncTextSummarizer()
+        summary = await summarizer.run(text)
+    """
+
+    _gpt_class = AsyncQAGPT
+
+    async def run(self, obj: Union[str, list, dict], **kwargs) -> str:
+        # Raw text for summariztaion
+        if isinstance(obj, str):
+            return await self.summarize_str(obj, **kwargs)
+        # Message dict for summarization
+        elif isinstance(obj, dict):
+            return await self.summarize_dict(obj, **kwargs)
+        # List of messages for summarization
+        elif isinstance(obj, list):
+            return await self.summarize_list(obj, **kwargs)
+        elif isinstance(obj, deque):
+            # If a deque is given, process it as a list.
+            return await self.summarize_list(obj, **kwargs)
+        else:
+            raise TypeError(f"Unsupported type {type(obj)} for argument 'obj'.",
+                            f"Only str, dict and list are supported.")
+
+    async def summarize_str(
+            self,
+            string: str,
+            strategy: str="sequential",
+            concurrency: int=8,
+            progress: Callable[[int, int, int], None]=None,
+            on_partial: Callable[[int, List[str]], None]=None) -> str:
+        """
+        Non-blocking counterpart of 'TextSummarizer.summarize_str'.
+        """
+        chunks = self.get_chunks(string, strategy, concurrency)
+        level = 0
+        while len(chunks) > 1:
+            summaries = await self.gpt.map(
+                [self.wrap(chunk) for chunk in chunks],
+                concurrency=self.get_concurrency(strategy, concurrency),
+                progress=self.level_progress(progress, level),
+                return_exceptions=False)
+            if on_partial is not None:
+                on_partial(level, summaries)
+            chunks = self.chunker.run("\n".join(summaries), self.chunk_size)
+            level += 1
+        return await self.gpt.get_str(self.wrap(chunks[0]))
+
+    async def summarize_dict(self, dct: dict, **kwargs) -> str:
+        string = self.dict2str(dct)
+        return await self.summarize_str(string, **kwargs)
+
+    async def summarize_list(self, lst: list, **kwargs) -> str:
+        strings = [self.dict2str(dct) for dct in lst]
+        string = "\n".join(strings)
+        return await self.summarize_str(string, **kwargs)
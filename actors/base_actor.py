@@ -1,16 +1,20 @@
 # Created by: Ausar686
 # https://github.com/Ausar686
 
+from ..api import RetryPolicy
+
+
 class BaseActor:
 	"""
 	Base class for all RAI actors, which can be used in ChatBot
 	"""
 
-	def __init__(self, model: str="gpt-3.5-turbo"):
+	def __init__(self, model: str="gpt-3.5-turbo", retry_policy: RetryPolicy=None):
 		"""
 		Initialize an actor.
 		"""
 		self.set_model(model)
+		self.set_retry_policy(retry_policy)
 		return
 
 	def set_model(self, model: str) -> None:
@@ -20,6 +24,14 @@ class BaseActor:
 		self.model = model
 		return
 
+	def set_retry_policy(self, retry_policy: RetryPolicy=None) -> None:
+		"""
+		Set actor's policy for retrying failed requests to OpenAI API.
+		If None is passed, default RetryPolicy is used.
+		"""
+		self.retry_policy = RetryPolicy() if retry_policy is None else retry_policy
+		return
+
 	def run(self):
 		"""
 		Override this method for every subclass in order to use it properly as an actor in ChatBot.
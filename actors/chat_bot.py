@@ -1,18 +1,27 @@
 # Created by: Ausar686
 # https://github.com/Ausar686
 
-from typing import Any, Union
+from typing import Any, Callable, Iterator, List, Tuple, Union
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import copy
 import hashlib
 import json
+import logging
 import os
 import re
+import threading
 
+from .context_policy import ContextPolicy, make_context_policy
+from .qagpt import QAGPT
+from .selectors import get_selector
 from .token_counter import TokenCounter
 from .text_summarizer import TextSummarizer
 from ..chat import  Chat, Message
 from ..containers import RDict 
+from ..api import RetryPolicy, configure_cache, configure_client, get_rate_limiter
 from ..profile import Profile
-from ..utils import method_logger, retry, to_rdict, request_openai
+from ..utils import get_log_level, method_logger, request_openai, stream_openai
 
 
 class ChatBot:
@@ -58,10 +67,28 @@ class ChatBot:
             "temperature": 0,
             "stream": False,
             "n": 1
+        }),
+        "retry": RetryPolicy._defaults,
+        "choices": RDict({
+            "selector": "first"
+        }),
+        "summary": RDict({
+            "mode": "full",
+            "max_tokens": 1000,
+            "cache_size": 128,
+            "background": False,
+            "soft_threshold": 0.7
         })
     })
     
     _runtime_modes_available = ["console", "app"]
+
+    # "full": the whole context (including previous summary) is summarized on every compaction.
+    # "rolling": only messages after the previous summary are summarized and merged into it.
+    _summary_modes = ["full", "rolling"]
+    
+    # Default summarizer class. Is overridden in AsyncChatBot.
+    _summarizer_class = TextSummarizer
     
     # Errors initialization
     _api_key_error = """
@@ -76,8 +103,6 @@ class ChatBot:
     
     _last_message_len_error = "Last message is too long to proceed."
     
-    _n_answers_error = "Several answers option is not implemented yet."
-    
     _mode_error = f"Wrong mode value. Available modes are: {_runtime_modes_available}"
         
     def __init__(
@@ -89,24 +114,45 @@ class ChatBot:
         mode: str="console",
         profile: Profile=None,
         chat: Chat=None,
-        log: bool=False) -> None:
+        log: Union[bool, int, str]=False,
+        configure_shared: bool=True) -> None:
         """
         Initializes ChatBot instance using 2 config files.
+        'log' enables logging of ChatBot methods via 'logging' module:
+        True means logging.DEBUG level, int or str (i.e. "INFO") set the level explicitly.
+        'configure_shared' sets, whether process-wide HTTP client, rate limiter and completion cache
+        are configured from "http", "rate_limits" and "cache" sections (see 'for_user').
         """
         # Initialize utils for uploading data from '.ini' config file
-        self.log = log
+        self.set_log(log)
         self.name = None
         self.config_dir = None
         self.parameters = RDict()
         self.actors = RDict()
         self._synced_actors = []
         self._runtime_mode = mode
+        # Configuration files are kept to create bots for other users in app mode (see 'for_user').
+        self._config_paths = (config_path, actors_config_path, functions_config_path)
         # Load config options from '.json' config file
         self.from_config(config_path)
         # Set OpenAI API parameters
         self.set_openai_parameters()
+        if configure_shared:
+            # Configure shared HTTP client
+            self.set_http_parameters()
+            # Configure shared rate limiter
+            self.set_rate_limits()
+            self.set_cache()
+        # Set context summarization mode
+        self.set_summary_parameters()
+        # Set context management policy
+        self.set_context_policy()
+        # Set selector of the answer among several generated ones
+        self.set_selector()
         # Setup actors from config
         self.actors_from_config(actors_config_path)
+        # Set retry policy both for the bot and its actors
+        self.set_retry_policy()
         # Setup usable functions from config.
         self.functions_from_config(functions_config_path)
         # Initialize dialog attributes
@@ -115,6 +161,16 @@ class ChatBot:
         self.validate_init()
         return
     
+    def set_log(self, log: Union[bool, int, str]=False, logger: logging.Logger=None) -> None:
+        """
+        Sets logging level of ChatBot methods records (see 'RAI.utils.get_log_level').
+        Records are emitted via 'logger' (default: logger of the module of the class).
+        """
+        self.log = log
+        self._log_level = get_log_level(log)
+        self._logger = logger
+        return
+    
     @method_logger
     def from_config(self, config_path: str=None) -> None:
         """
@@ -200,7 +256,7 @@ class ChatBot:
         if "token_counter" not in self.actors:
             self.actors.token_counter = TokenCounter(self.openai.model)
         if "summarizer" not in self.actors:
-            self.actors.summarizer = TextSummarizer(self.actors.token_counter.model, self._defaults.text_summarizer.n_words)
+            self.actors.summarizer = self._summarizer_class(self.actors.token_counter.model, self._defaults.text_summarizer.n_words)
         self._synced_actors.append(self.actors.token_counter)
         return
     
@@ -232,6 +288,117 @@ class ChatBot:
                 self.openai[key] = value
         return
     
+    @method_logger
+    def set_http_parameters(self) -> None:
+        """
+        Configures process-wide HTTP client for OpenAI API,
+        if "http" section is present in configuration files.
+        NOTE: The client is shared among all bots and actors in the process.
+        """
+        if "http" not in self.parameters:
+            return
+        configure_client(**self.http)
+        return
+    
+    @method_logger
+    def set_rate_limits(self) -> None:
+        """
+        Configures process-wide rate limiter for OpenAI API,
+        if "rate_limits" section is present in configuration files.
+        The section maps model names to their limits: {"rpm": int, "tpm": int}.
+        NOTE: The limiter is shared among all bots and actors in the process.
+        """
+        if "rate_limits" not in self.parameters:
+            return
+        limiter = get_rate_limiter()
+        for model, limits in self.rate_limits.items():
+            limiter.set_limits(model, **limits)
+        return
+    
+    @method_logger
+    def set_cache(self) -> None:
+        """
+        Enables process-wide completion cache for OpenAI API,
+        if "cache" section is present in configuration files.
+        The section contains 'CompletionCache' parameters, e.g. {"path": "cache.sqlite", "ttl": 86400}.
+        NOTE: The cache is shared among all bots and actors in the process.
+        """
+        if "cache" not in self.parameters:
+            return
+        configure_cache(**self.cache)
+        return
+    
+    @method_logger
+    def set_summary_parameters(self) -> None:
+        """
+        Sets context summarization parameters, using "summary" section of configuration files:
+        mode ("full" or "rolling"), max_tokens (size of rolling summary, which triggers its compression)
+        and cache_size (number of summaries, cached by the hash of message range they cover).
+        If background is True, older messages are summarized in background, once the context exceeds
+        soft_threshold share of the limit (see 'schedule_background_summary').
+        """
+        params = RDict(self._defaults.summary)
+        if "summary" in self.parameters:
+            params.update(self.summary)
+        if params.mode not in self._summary_modes:
+            raise ValueError(f"Unknown summary mode: {params.mode}. Available: {self._summary_modes}.")
+        self.summary_mode = params.mode
+        self.summary_max_tokens = params.max_tokens
+        self._summary_cache_size = params.cache_size
+        self._summary_cache = OrderedDict()
+        self._summary_cache_lock = threading.Lock()
+        self.summary_background = params.background
+        self.summary_soft_threshold = params.soft_threshold
+        if not 0 < self.summary_soft_threshold < 1:
+            raise ValueError(f"Summary soft threshold must be in (0, 1), not {self.summary_soft_threshold}.")
+        self._background_summary = None
+        self._background_executor = None
+        return
+
+    @method_logger
+    def set_context_policy(self, policy: ContextPolicy=None) -> None:
+        """
+        Sets policy, which evicts context messages, once the context exceeds its budget (see 'RAI.actors.context_policy').
+        If None is passed, the policy is created from "context_policy" section of configuration files
+        (i.e. {"name": "sliding_window", "max_turns": 10}), if it is present. Otherwise no policy is used.
+        """
+        if policy is None and "context_policy" in self.parameters:
+            params = RDict(self.context_policy)
+            policy = make_context_policy(params.pop("name"), **params)
+        self._context_policy = policy
+        return
+
+    @method_logger
+    def set_selector(self, selector: Union[str, Callable[[list], int]]=None) -> None:
+        """
+        Sets selector of the answer, if several answers are generated ("n" > 1 in "openai" section).
+        If None is passed, "selector" option of "choices" section of configuration files is used ("first" by default).
+        Selector receives contents of the answers, which finished normally, and returns index of the chosen one
+        (see 'RAI.actors.selectors').
+        """
+        if selector is None:
+            selector = self.choices.get("selector") if "choices" in self.parameters else None
+        if selector is None:
+            selector = self._defaults.choices.selector
+        self.selector = get_selector(selector)
+        return
+
+    @method_logger
+    def set_retry_policy(self) -> None:
+        """
+        Sets policy for retrying failed requests to OpenAI API, using "retry" section of configuration files.
+        The policy is also set to all actors, which support it.
+        """
+        params = RDict(self._defaults.retry)
+        if "retry" in self.parameters:
+            params.update(self.retry)
+        max_attempts = params.pop("max_attempts")
+        self.retry_policy = RetryPolicy(max_attempts, **params)
+        for actor in self.actors.values():
+            if hasattr(actor, "set_retry_policy"):
+                actor.set_retry_policy(self.retry_policy)
+        return
+    
     @method_logger
     def functions_from_config(self, functions_config_path: str=None) -> None:
         """
@@ -291,7 +458,7 @@ class ChatBot:
             self.chat = Chat(chat_dct)
         else:
             self.chat = chat
-        self.context = [self.system_message.to_openai()]
+        self.set_context([self.system_message.to_openai()])
         return
     
     @method_logger
@@ -299,8 +466,8 @@ class ChatBot:
         """
         Validates initialization. Use this method to raise exceptions for not implemented options.
         """
-        if self.openai.n > 1:
-            raise NotImplementedError(self._n_answers_error)
+        if self.openai.n < 1:
+            raise ValueError(f"Number of answers must be a positive integer, got: {self.openai.n}")
         if self._runtime_mode not in ["console", "app"]:
             raise NotmplementedError(self._mode_error)
         return
@@ -324,7 +491,7 @@ class ChatBot:
         Appends message both to context and to chat.
         """
         self.chat.append(msg)
-        self.context.append(msg.to_openai())
+        self.push_context(msg.to_openai())
         return
     
     def user_message(self, text: str) -> Message:
@@ -371,6 +538,9 @@ class ChatBot:
         """
         Upgrades token limit of the using OpenAI API model.
         """
+        # NOTE: RDict returns None for missing keys, so KeyError is raised explicitly.
+        if self.openai.model not in self._defaults.upgrades:
+            raise KeyError(self.openai.model)
         self.openai.model = self._defaults.upgrades[self.openai.model]
         self.set_actors_model()
         return
@@ -379,6 +549,9 @@ class ChatBot:
         """
         Downgrades token limit of the using OpenAI API model.
         """
+        # NOTE: RDict returns None for missing keys, so KeyError is raised explicitly.
+        if self.openai.model not in self._defaults.downgrades:
+            raise KeyError(self.openai.model)
         self.openai.model = self._defaults.downgrades[self.openai.model]
         self.set_actors_model()
         return
@@ -391,11 +564,162 @@ class ChatBot:
             actor.set_model(self.openai.model)
         return
 
+    # Token counts of context messages are memoized in 'self._context_info' (one RDict per message)
+    # and their sums are maintained incrementally, so that the context is not re-encoded on every check.
+    # New messages are only estimated (see 'TokenCounter.estimate_from_str'). Exact counts are computed lazily,
+    # once the estimated size of the context comes close to the limit (see 'verify_context').
+    # Modify the context with the methods below, or call 'sync_context_info' after modifying it directly.
+
+    def make_context_info(self, message: dict, exact: bool=False) -> RDict:
+        """
+        Returns information about context message: its estimated size in tokens,
+        its exact size (None, if it was not counted yet) and the encoding, used to count it.
+        """
+        counter = self.actors.token_counter
+        return RDict({
+            "estimate": counter.count_message(message, exact=False),
+            "tokens": counter.count_message(message) if exact else None,
+            "encoding": counter.encoding_name,
+        })
+
+    def sync_context_info(self) -> None:
+        """
+        Re-estimates sizes of all context messages.
+        """
+        self._context_info = [self.make_context_info(message) for message in self.context]
+        self._context_estimate = sum(info.estimate for info in self._context_info)
+        self._context_tokens = 0
+        self._context_uncounted = len(self._context_info)
+        self._context_encoding = self.actors.token_counter.encoding_name
+        return
+
+    def is_context_info_synced(self) -> bool:
+        """
+        Checks, whether memoized sizes correspond to current context and encoding.
+        """
+        return (
+            len(self._context_info) == len(self.context)
+            and self._context_encoding == self.actors.token_counter.encoding_name)
+
+    def set_context(self, messages: list) -> None:
+        """
+        Replaces the context with the list of messages in OpenAI notation.
+        """
+        self.context = messages
+        self.sync_context_info()
+        return
+
+    def push_context(self, message: dict) -> None:
+        """
+        Appends message in OpenAI notation to the context.
+        """
+        self.context.append(message)
+        if len(self._context_info) != len(self.context) - 1:
+            self.sync_context_info()
+            return
+        info = self.make_context_info(message)
+        self._context_info.append(info)
+        self._context_estimate += info.estimate
+        self._context_uncounted += 1
+        return
+
+    def pop_context(self, index: int=-1) -> dict:
+        """
+        Removes message from the context and returns it.
+        """
+        message = self.context.pop(index)
+        if len(self._context_info) != len(self.context) + 1:
+            self.sync_context_info()
+            return message
+        info = self._context_info.pop(index)
+        self._context_estimate -= info.estimate
+        if info.tokens is None:
+            self._context_uncounted -= 1
+        else:
+            self._context_tokens -= info.tokens
+        return message
+
+    def insert_context(self, index: int, message: dict, **flags) -> None:
+        """
+        Inserts message in OpenAI notation into the context.
+        'flags' are stored in the memoized information about the message (i.e. pinned=True).
+        """
+        if not self.is_context_info_synced():
+            self.sync_context_info()
+        self.context.insert(index, message)
+        info = self.make_context_info(message)
+        info.update(flags)
+        self._context_info.insert(index, info)
+        self._context_estimate += info.estimate
+        self._context_uncounted += 1
+        return
+
+    def evict_context(self, indices: List[int]) -> list:
+        """
+        Removes messages with given indices from the context, keeping memoized sizes of the rest messages.
+        Returns removed messages in their original order.
+        """
+        if not self.is_context_info_synced():
+            self.sync_context_info()
+        indices = set(indices)
+        evicted = [message for i, message in enumerate(self.context) if i in indices]
+        for i in sorted(indices):
+            info = self._context_info[i]
+            self._context_estimate -= info.estimate
+            if info.tokens is None:
+                self._context_uncounted -= 1
+            else:
+                self._context_tokens -= info.tokens
+        self.context = [message for i, message in enumerate(self.context) if i not in indices]
+        self._context_info = [info for i, info in enumerate(self._context_info) if i not in indices]
+        return evicted
+
+    def pin_context(self, index: int=-1, pinned: bool=True) -> None:
+        """
+        Pins (or unpins) context message, so that context policies never evict it.
+        NOTE: Pins are reset, if the context is replaced (i.e. by 'set_context' or summarization).
+        """
+        if not self.is_context_info_synced():
+            self.sync_context_info()
+        self._context_info[index].pinned = pinned
+        return
+
+    def context_size(self, exact: bool=True) -> int:
+        """
+        Returns the current size of the bot context in tokens.
+        Args:
+            exact [bool]: Whether to count the size exactly (messages, which were not counted yet, are encoded)
+                or to return the estimate, which does not encode anything. Default: True.
+        """
+        if not self.is_context_info_synced():
+            self.sync_context_info()
+        counter = self.actors.token_counter
+        if not exact:
+            return self._context_estimate + counter._tokens_per_reply
+        if self._context_uncounted:
+            for message, info in zip(self.context, self._context_info):
+                if info.tokens is None:
+                    info.tokens = counter.count_message(message)
+                    self._context_tokens += info.tokens
+            self._context_uncounted = 0
+        return self._context_tokens + counter._tokens_per_reply
+
+    def is_context_surely_fit(self, limit: int=None) -> bool:
+        """
+        Checks by the estimated size, that the context fits the limit (default: 'size_limit') even with the maximal estimation error.
+        If False is returned, the context may still fit: exact size should be checked.
+        """
+        if limit is None:
+            limit = self.size_limit
+        counter = self.actors.token_counter
+        estimate = self.context_size(exact=False) - counter._tokens_per_reply
+        return counter.upper_bound(estimate) + counter._tokens_per_reply <= limit
+
     def __len__(self) -> int:
         """
         Returns the current size of the bot context in tokens.
         """
-        return self.actors.token_counter.run(self.context)
+        return self.context_size()
 
     @property
     def last_message_len(self) -> int:
@@ -418,7 +742,19 @@ class ChatBot:
         Updated context contains system message, summary and last message.
         Chat data is not affected by this method.
         """
+        # Turn boundary: swap in background summary, if it is ready.
+        self.swap_background_summary()
+        self.apply_context_policy()
+        # Exact counting is performed only, if the estimated size is within the safety margin of the limit.
+        if self.is_context_surely_fit():
+            self.schedule_background_summary()
+            return
         if len(self) > self.size_limit:
+            # Wait for pending background summary instead of starting another one.
+            if self._background_summary is not None:
+                self.swap_background_summary(wait=True)
+                self.verify_context()
+                return
             # Check for huge prompt injection
             if self.last_message_len > self.size_limit:
                 try:
@@ -432,21 +768,266 @@ class ChatBot:
             except KeyError:
                 self.summarize_context()
             self.verify_context()
+            return
+        self.schedule_background_summary()
         return
 
     def summarize_context(self) -> None:
         """
         Performs context summarization. By default, is used once context length reaches the limit.
         """
-        summary = self.actors.summarizer.run(self.context[1:-1])
-        msg = self.sys_message(summary)
-        msg_list = [self.system_message, msg, self.last_message]
-        self.context = [elem.to_openai() for elem in msg_list]
+        if self.summary_mode == "rolling":
+            self.roll_summary()
+        else:
+            summary = self.actors.summarizer.run(self.context[1:-1])
+            self.set_summary(summary)
         try:
             self.downgrade_model()
         except KeyError:
             pass
         return
+
+    def apply_context_policy(self) -> bool:
+        """
+        Evicts context messages, selected by the context policy (if it is set).
+        Returns True, if any messages were evicted.
+        """
+        if self._context_policy is None:
+            return False
+        is_evicted = False
+        # The summary of evicted messages may itself exceed the budget, so repeat until nothing is evicted.
+        # Policies evict nothing, once protected messages alone exceed the budget, so each round summarizes
+        # at least the messages, which are required to fit it.
+        while True:
+            evicted = self.evict_context(self._context_policy.select(self))
+            if not evicted:
+                return is_evicted
+            is_evicted = True
+            if not self._context_policy.summarize:
+                return is_evicted
+            self.add_to_summary(evicted, self.actors.summarizer.run(evicted))
+
+    def add_to_summary(self, messages: list, summary: str) -> None:
+        """
+        Merges summary of evicted messages into the rolling summary (it is created, if absent).
+        """
+        if len(self._context_info) > 1 and self._context_info[1].get("summary") is not None:
+            previous = RDict({"text": self.context[1].get("content"), "key": self._context_info[1].summary})
+            self.evict_context([1])
+            summary = self.merge_summaries(previous, summary)
+            key = self.hash_messages(messages, previous.key)
+        else:
+            key = self.hash_messages(messages)
+        self.insert_context(1, self.sys_message(summary).to_openai(), summary=key)
+        return
+
+    def roll_summary(self) -> None:
+        """
+        Summarizes only messages, appended after the previous summary (the watermark),
+        and merges the result into the previous summary. The merged summary is compressed,
+        once it exceeds 'summary_max_tokens'. Summaries are cached by the hash of message range they cover.
+        """
+        summary, key = self.summarize_range(*self.get_summary_range())
+        self.set_summary(summary, key)
+        return
+
+    def summarize_range(self, previous: RDict, messages: list) -> Tuple[str, str]:
+        """
+        Summarizes context messages after the previous summary (see 'get_summary_range').
+        In "rolling" mode the result is merged into the previous summary.
+        Returns:
+            summary [str]: Summary of the range.
+            key [str]: Key of the range for "rolling" mode (None for "full" mode).
+        """
+        summary, key, summaries = self.run_summary_job(self.make_summary_job(previous, messages))
+        self.cache_summaries(summaries)
+        return summary, key
+
+    def make_summary_job(self, previous: RDict, messages: list, snapshot: bool=False) -> RDict:
+        """
+        Collects everything, 'run_summary_job' needs to summarize the range: cached summaries are looked up here,
+        so that the job does not access the bot.
+        Args:
+            previous [RDict]: Previous rolling summary (see 'get_summary_range').
+            messages [list]: Messages to summarize.
+            snapshot [bool]: Whether to copy summarizer and token counter, so that the job can run in another thread,
+                while the bot changes its model. Default: False.
+        """
+        job = RDict({
+            "mode": self.summary_mode,
+            "previous": previous,
+            "messages": messages,
+            "max_tokens": self.summary_max_tokens,
+            "summarizer": self.actors.summarizer,
+            "token_counter": self.actors.token_counter,
+        })
+        if snapshot:
+            job.summarizer = copy.deepcopy(job.summarizer)
+            job.token_counter = copy.deepcopy(job.token_counter)
+        if self.summary_mode != "rolling":
+            if previous is not None:
+                job.messages = [self.sys_message(previous.text).to_openai(), *messages]
+            return job
+        job.key = self.hash_messages(messages)
+        job.covered_key = job.key if previous is None else self.hash_messages(messages, previous.key)
+        job.cached = {key: self.get_cached_summary(key) for key in (job.key, job.covered_key)}
+        return job
+
+    @classmethod
+    def run_summary_job(cls, job: RDict) -> Tuple[str, str, dict]:
+        """
+        Summarizes the range, prepared by 'make_summary_job'. The bot and its summary cache are not accessed.
+        Returns:
+            summary [str]: Summary of the range.
+            key [str]: Key of the range for "rolling" mode (None for "full" mode).
+            summaries [dict]: New summaries to cache by their keys (see 'cache_summaries').
+        """
+        if job.mode != "rolling":
+            return job.summarizer.run(job.messages), None, {}
+        summary = job.cached[job.covered_key]
+        if summary is not None:
+            return summary, job.covered_key, {}
+        summaries = {}
+        summary = job.cached[job.key]
+        if summary is None and job.messages:
+            summary = summaries[job.key] = job.summarizer.run(job.messages)
+        summary = cls.merge_summaries(job.previous, summary)
+        if not job.messages or job.token_counter.run(summary) > job.max_tokens:
+            summary = job.summarizer.run(summary)
+        summaries[job.covered_key] = summary
+        return summary, job.covered_key, summaries
+
+    def schedule_background_summary(self) -> None:
+        """
+        Starts summarization of older context messages in background, if background summarization is enabled
+        and the estimated context size exceeds 'summary_soft_threshold' share of the limit.
+        All messages except the last one are summarized. The summary is swapped in by 'swap_background_summary'.
+        """
+        if not self.summary_background or self._background_summary is not None:
+            return
+        if self.context_size(exact=False) < self.summary_soft_threshold * self.size_limit:
+            return
+        previous, messages = self.get_summary_range()
+        if len(messages) < 2:
+            return
+        n_covered = len(messages) + (previous is not None)
+        self._background_summary = RDict({
+            "future": self.submit_summary(previous, messages),
+            # Memoized information objects of summarized messages: the summary is swapped in,
+            # only if the context still starts with the same messages.
+            "infos": self._context_info[1:1 + n_covered],
+        })
+        return
+
+    def submit_summary(self, previous: RDict, messages: list) -> Future:
+        """
+        Runs summarization of the range in background thread (see 'run_summary_job').
+        The thread uses copies of the summarizer and the token counter and does not access the bot.
+        The result is (summary, key, summaries), summaries are cached by 'put_background_summary'.
+        """
+        job = self.make_summary_job(previous, messages, snapshot=True)
+        if self._background_executor is None:
+            self._background_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="RAI-summary")
+        return self._background_executor.submit(self.run_summary_job, job)
+
+    def swap_background_summary(self, wait: bool=False) -> bool:
+        """
+        Replaces summarized messages with the background summary, if it is ready (or if 'wait' is True).
+        Messages, appended after the summarization has started, are kept.
+        Returns True, if the summary was swapped in.
+        """
+        job = self._background_summary
+        if job is None or not (wait or job.future.done()):
+            return False
+        self._background_summary = None
+        try:
+            summary, key, summaries = job.future.result()
+        except Exception as e:
+            logger = self._logger or logging.getLogger(type(self).__module__)
+            logger.warning(f"Background summarization failed: {e!r}")
+            return False
+        return self.put_background_summary(job.infos, summary, key, summaries)
+
+    def put_background_summary(self, infos: list, summary: str, key: str, summaries: dict=None) -> bool:
+        """
+        Caches summaries, made in background, and replaces messages with 'infos' by the summary,
+        if the context still starts with them. Returns True, if the summary was swapped in.
+        """
+        self.cache_summaries(summaries or {})
+        n_covered = len(infos)
+        if (len(self._context_info) <= n_covered + 1
+                or any(a is not b for a, b in zip(self._context_info[1:1 + n_covered], infos))):
+            # The context was changed in the meantime, so the summary is outdated.
+            return False
+        self.evict_context(range(1, 1 + n_covered))
+        self.insert_context(1, self.sys_message(summary).to_openai(), summary=key)
+        return True
+
+    def get_summary_range(self) -> Tuple[RDict, list]:
+        """
+        Returns the previous rolling summary (RDict with its 'text' and range 'key' or None)
+        and context messages after it (excluding the system and the last messages).
+        """
+        if len(self._context_info) > 2 and self._context_info[1].get("summary") is not None:
+            previous = RDict({"text": self.context[1].get("content"), "key": self._context_info[1].summary})
+            return previous, self.context[2:-1]
+        return None, self.context[1:-1]
+
+    @staticmethod
+    def hash_messages(messages: list, previous_key: str="") -> str:
+        """
+        Returns the key of message range: SHA-256 of the messages, chained with the key of the range before them.
+        """
+        data = json.dumps(messages, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256((previous_key + data).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def merge_summaries(previous: RDict, summary: str) -> str:
+        """
+        Merges summary of new messages into the previous rolling summary.
+        """
+        return "\n".join(text for text in (previous and previous.text, summary) if text)
+
+    def cancel_background_summary(self) -> None:
+        """
+        Drops pending background summary, so that it is neither swapped in, nor cached.
+        """
+        job = self._background_summary
+        self._background_summary = None
+        if job is not None:
+            job.future.cancel()
+        return
+
+    def get_cached_summary(self, key: str) -> str:
+        with self._summary_cache_lock:
+            summary = self._summary_cache.get(key)
+            if summary is not None:
+                self._summary_cache.move_to_end(key)
+        return summary
+
+    def cache_summary(self, key: str, summary: str) -> None:
+        with self._summary_cache_lock:
+            self._summary_cache[key] = summary
+            self._summary_cache.move_to_end(key)
+            while len(self._summary_cache) > self._summary_cache_size:
+                self._summary_cache.popitem(last=False)
+        return
+
+    def cache_summaries(self, summaries: dict) -> None:
+        for key, summary in summaries.items():
+            self.cache_summary(key, summary)
+        return
+
+    def set_summary(self, summary: str, key: str=None) -> None:
+        """
+        Replaces the context with system message, summary and last message.
+        'key' marks the summary as rolling one (the watermark for the next compaction).
+        """
+        msg = self.sys_message(summary)
+        msg_list = [self.system_message, msg, self.last_message]
+        self.set_context([elem.to_openai() for elem in msg_list])
+        self._context_info[1].summary = key
+        return
     
     def fix_injection(self) -> None:
         """
@@ -456,33 +1037,42 @@ class ChatBot:
         error_text = self._last_message_len_error
         error_msg = self.bot_message(error_text)
         self.chat.append(error_msg)
-        self.context.pop()
+        self.pop_context()
         return
     
-    @retry(5)
     def get_completion(self) -> RDict:
         """
         Sends context to OpenAI API and receives response from it as a completion.
+        Failed requests are retried according to 'self.retry_policy'.
         """
-        json_data = request_openai(messages=self.context, **self.openai)
-        completion = to_rdict(json_data)
+        completion = self.retry_policy.call(request_openai, messages=self.context, **self.openai)
         return completion
     
-    @retry(5)
     def fget_completion(self) -> RDict:
         """
         Sends context to OpenAI API and receives response from it as a completion.
         Response CAN contain a function call from self.usable_functions.
+        Failed requests are retried according to 'self.retry_policy'.
         """
         if self.usable_functions is None:
             return self.get_completion()
-        json_data = request_openai(
+        completion = self.retry_policy.call(
+            request_openai,
             functions=self.usable_functions,
             messages=self.context,
             **self.openai)
-        completion = to_rdict(json_data)
         return completion
     
+    def get_stream(self) -> Iterator[RDict]:
+        """
+        Sends context to OpenAI API and yields completion chunks, as soon as they arrive.
+        Failed request is retried according to 'self.retry_policy',
+        while errors in the middle of the stream are raised as is.
+        Function calls are not supported for streaming.
+        """
+        chunks = self.retry_policy.call(stream_openai, messages=self.context, **self.openai)
+        yield from chunks
+    
     @staticmethod
     def completion_to_openai_message_list(completion: RDict) -> list:
         """
@@ -491,14 +1081,28 @@ class ChatBot:
         lst = [choice.message for choice in completion.choices]
         return lst
     
-    @staticmethod
-    def openai_message_list_to_dict(lst: list) -> RDict:
+    def openai_message_list_to_dict(self, lst: list) -> RDict:
         """
         Converts list of messages to a RDict:
         {"role": role, "content": content}
+        If there are several messages, the one is chosen by 'self.selector'.
         """
-        # [TODO]: Add proper processing of several generated variants
-        return lst[0]
+        if len(lst) == 1:
+            return lst[0]
+        return lst[self.selector([message.get("content") or "" for message in lst])]
+
+    def select_choice(self, completion: RDict) -> RDict:
+        """
+        Returns the choice of OpenAI Completion, chosen by 'self.selector' among the choices, which finished normally.
+        If none of them finished normally, returns the first choice.
+        """
+        choices = sorted(completion.choices, key=lambda choice: choice.get("index", 0))
+        if len(choices) == 1:
+            return choices[0]
+        valid = [choice for choice in choices if choice.finish_reason in ("stop", "function_call")]
+        if not valid:
+            return choices[0]
+        return valid[self.selector([choice.message.get("content") or "" for choice in valid])]
 
     @staticmethod
     def remove_numeration(text: str) -> str:
@@ -513,8 +1117,7 @@ class ChatBot:
         Calls function from OpenAI Completion.
         Raises ValueError if function is not presented in self.usable_functions
         """
-        # [TODO]: Add processing of multiple choices.
-        message = completion.choices[0].message
+        message = self.select_choice(completion).message
         call_data = message.function_call
         func_name = call_data.name
         if func_name not in self._usable_functions_names:
@@ -535,13 +1138,26 @@ class ChatBot:
         msg = Message(msg_dct)
         return msg
     
+    def deltas_to_message(self, deltas: List[str]) -> Message:
+        """
+        Assembles content deltas, obtained from a stream, into a Message.
+        Postprocessing is the same as in 'completion_to_message'.
+        """
+        msg_dct = RDict({"role": "assistant", "content": "".join(deltas)})
+        msg_dct["content"] = self.remove_numeration(msg_dct["content"])
+        msg = Message(msg_dct)
+        return msg
+    
     def process_completion(self, completion: RDict) -> Any:
         """
         Processes the completion.
         If function call is required, calls it and returns the result.
+        If several answers are generated, the one is chosen by 'self.selector' (see 'select_choice').
         """
-        # [TODO]: Add processing of multiple choices.
-        finish_reason = completion.choices[0].finish_reason
+        choice = self.select_choice(completion)
+        if len(completion.choices) > 1:
+            completion = RDict(completion, choices=[choice])
+        finish_reason = choice.finish_reason
         if finish_reason == "stop":
             return self.completion_to_message(completion)
         elif finish_reason == "function_call":
@@ -557,6 +1173,27 @@ class ChatBot:
         msg = self.process_completion(completion) 
         return msg
 
+    def stream_answer(self) -> Iterator[str]:
+        """
+        Streaming pipeline of answer obtaining from OpenAI API.
+        Yields content deltas, as soon as they arrive.
+        When the stream is finished, assembles the final Message
+        and appends it both to chat and context (as 'process_output' does).
+        NOTE: Yielded deltas are raw, while the final Message is postprocessed (i.e. numeration is removed).
+        Example:
+            for delta in bot.stream_answer():
+                print(delta, end="", flush=True)
+        """
+        deltas = []
+        for chunk in self.get_stream():
+            delta = QAGPT.delta_from_chunk(chunk)
+            if delta:
+                deltas.append(delta)
+                yield delta
+        msg = self.deltas_to_message(deltas)
+        self.append(msg)
+        return
+    
     def fget_answer(self) -> Message:
         """
         Full pipeline of answer obtaining from OpenAI API.
@@ -569,6 +1206,44 @@ class ChatBot:
         except Exception:
             return self.get_answer()
 
+    def reply(self, text: str) -> Message:
+        """
+        Processes one user message in app mode:
+        appends it, verifies the context, obtains the answer (with function calls, if they are enabled),
+        appends the answer and returns it.
+        """
+        self.add_user_message(text)
+        self.verify_context()
+        if self.usable_functions is not None:
+            msg = self.fget_answer()
+        elif self.openai.stream:
+            for _ in self.stream_answer():
+                pass
+            return self.last_message
+        else:
+            msg = self.get_answer()
+        self.append(msg)
+        return msg
+
+    def for_user(self, username: str) -> "ChatBot":
+        """
+        Creates a bot of the same class and configuration for another user (used by ChatServer in app mode).
+        If the chat of the user with this bot is saved on disk, it is loaded
+        and its messages are restored into the context (it is compacted on the next 'verify_context' call).
+        Process-wide HTTP client, rate limiter and cache are not reconfigured: they are configured once by this bot.
+        NOTE: Configuration files and saved chat are read from disk, so the method should not be called in the event loop.
+        """
+        bot = type(self)(*self._config_paths, mode="app", log=self.log, configure_shared=False)
+        bot.username = username
+        path = os.path.join(Chat._data_dir, username, bot.name)
+        if os.path.isdir(path):
+            bot.chat = Chat(path)
+            messages = [msg.to_openai() for msg in bot.chat.messages if msg.role != "system"]
+            bot.set_context([bot.system_message.to_openai(), *messages])
+        else:
+            bot.chat = Chat({"username": username, "bot_name": bot.name, "messages": [bot.system_message]})
+        return bot
+
     @property
     def last_message_fstring(self) -> str:
         """
@@ -603,8 +1278,19 @@ class ChatBot:
         Cleans the context for bot reusing
         NOTE: This method does NOT clean the entire chat (self.chat)
         """
-        self.context.clear()
-        self.context.append(self.system_message.to_openai())
+        self.cancel_background_summary()
+        self.set_context([self.system_message.to_openai()])
+        return
+
+    def close(self) -> None:
+        """
+        Cancels background summarization and stops its worker thread.
+        The bot can still be used afterwards: the thread is started again, once it is required.
+        """
+        self.cancel_background_summary()
+        if self._background_executor is not None:
+            self._background_executor.shutdown(wait=False, cancel_futures=True)
+            self._background_executor = None
         return
     
     def __getattr__(self, attr: str) -> Any:
@@ -634,10 +1320,24 @@ class ChatBot:
         print(self.last_message_fstring)
         return
 
+    def display_stream(self, deltas: Iterator[str], *args, **kwargs) -> None:
+        """
+        Displays streamed message token-by-token.
+        """
+        print(f"[{self.name}]: ", end="", flush=True)
+        for delta in deltas:
+            print(delta, end="", flush=True)
+        print()
+        return
+
     def process_output(self, *args, **kwargs) -> None:
         """
         Full pipeline of OpenAI output processing.
+        If 'stream' option is enabled, the answer is displayed, as soon as it arrives.
         """
+        if self.openai.stream:
+            self.display_stream(self.stream_answer(), *args, **kwargs)
+            return
         msg = self.get_answer()
         self.append(msg)
         self.display(*args, **kwargs) 
@@ -711,9 +1411,13 @@ class ChatBot:
     
     def run_in_app_mode(self, *args, **kwargs) -> None:
         """
-        Runs bot in mobile application mode.
+        Runs bot in mobile application mode: serves conversations of many users via ChatServer
+        until the process is interrupted. Each user gets a bot of the same class and configuration (see 'for_user').
+        Args and kwargs are passed to ChatServer (i.e. host, port, max_pending).
         """
-        pass
+        from .chat_server import ChatServer
+        ChatServer(self.for_user, *args, **kwargs).run()
+        return
     
     def run_in_console_mode(self, *args, **kwargs) -> None:
         """
@@ -729,9 +1433,9 @@ class ChatBot:
     
     def frun_in_app_mode(self, *args, **kwargs) -> None:
         """
-        Runs bot in mobile application mode.
+        Runs bot in mobile application mode with function calls enabled (see 'run_in_app_mode').
         """
-        pass
+        return self.run_in_app_mode(*args, **kwargs)
     
     def frun_in_console_mode(self, *args, **kwargs) -> None:
         """
@@ -0,0 +1,599 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import Callable
+import argparse
+import asyncio
+import inspect
+import re
+import threading
+
+from aiohttp import web
+import aiohttp
+import orjson
+
+from .async_chat_bot import AsyncChatBot
+from .chat_bot import ChatBot
+from ..api import get_async_client
+from ..chat import Message
+from ..containers import RDict
+
+
+class ChatSession:
+    """
+    Conversation of one user, hosted by ChatServer.
+    Messages are put into a bounded queue and are processed one by one by a single worker task,
+    so answers keep the order of messages, while different sessions are processed concurrently.
+    Sync bots (ChatBot) are run in worker threads, async bots (AsyncChatBot) - in the event loop.
+    """
+
+    _closed_error = "Session is closed."
+
+    def __init__(self, bot: ChatBot, max_pending: int) -> None:
+        """
+        Initializes session and starts its worker. Must be called from a running event loop.
+        Args:
+            bot [ChatBot]: Bot, which conducts the conversation.
+            max_pending [int]: Maximal number of messages, waiting to be processed.
+        """
+        self.bot = bot
+        self.queue = asyncio.Queue(max_pending)
+        self.closed = False
+        self._thread_reply = None
+        self.worker = asyncio.ensure_future(self.work())
+        return
+
+    @property
+    def chat_id(self) -> str:
+        return self.bot.chat.chat_id
+
+    def submit(self, text: str) -> asyncio.Future:
+        """
+        Puts user message into the queue without waiting.
+        Raises asyncio.QueueFull, if there are 'max_pending' messages in the queue already.
+        Returns:
+            future [asyncio.Future]: Future of the answer Message.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((text, future))
+        return future
+
+    async def put(self, text: str) -> asyncio.Future:
+        """
+        Puts user message into the queue, waiting for a free slot.
+        Returns:
+            future [asyncio.Future]: Future of the answer Message.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future))
+        return future
+
+    async def work(self) -> None:
+        """
+        Processes queued messages in order, until the session is closed.
+        """
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                return
+            text, future = item
+            try:
+                msg = await self.reply(text)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.set_exception(RuntimeError(self._closed_error))
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(msg)
+
+    async def reply(self, text: str) -> Message:
+        if inspect.iscoroutinefunction(self.bot.reply):
+            return await self.bot.reply(text)
+        # Threads can't be cancelled, so the reply is shielded to be waited for on close (see 'close').
+        self._thread_reply = asyncio.ensure_future(asyncio.to_thread(self.bot.reply, text))
+        return await asyncio.shield(self._thread_reply)
+
+    async def close(self, timeout: float=None) -> None:
+        """
+        Processes pending messages, stops the worker, saves the chat to disk and closes the bot (see 'ChatBot.close').
+        Messages, which are not processed within 'timeout' seconds, are dropped.
+        If a sync bot is answering a message in a worker thread at the timeout, the thread is waited for
+        (it can't be stopped), so that the chat does not change, while it is written.
+        """
+        self.closed = True
+        try:
+            await asyncio.wait_for(self.drain(), timeout)
+        except asyncio.TimeoutError:
+            self.worker.cancel()
+            await asyncio.wait([self.worker])
+            if self._thread_reply is not None:
+                await asyncio.wait([self._thread_reply])
+        self.cancel_pending()
+        await asyncio.to_thread(self.bot.chat.to_disk)
+        self.bot.close()
+        return
+
+    async def drain(self) -> None:
+        await self.queue.put(None)
+        await self.worker
+        return
+
+    def cancel_pending(self) -> None:
+        """
+        Fails futures of messages, which are left in the queue.
+        """
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is not None and not item[1].done():
+                item[1].set_exception(RuntimeError(self._closed_error))
+        return
+
+    def to_front(self) -> dict:
+        """
+        Returns session data with the messages of the chat (excluding system ones).
+        """
+        chat = self.bot.chat
+        return {
+            "chat_id": self.chat_id,
+            "username": chat.username,
+            "bot_name": chat.bot_name,
+            "pending": self.queue.qsize(),
+            "messages": [msg.to_front() for msg in chat.messages if msg.role != "system"],
+        }
+
+
+class ChatServer:
+    """
+    RAI asyncio server, which hosts conversations of many users with ChatBot (app mode).
+    Sessions are keyed by 'Chat.chat_id'. Each session has its own bot, created by 'bot_factory' from username.
+    Features:
+        - per-session ordering: messages of a session are answered one by one in the order of arrival;
+        - backpressure: each session queues at most 'max_pending' messages. HTTP requests beyond that
+            are rejected with 429 status, while WebSocket connections are not read until the queue has a free slot;
+        - graceful shutdown: new messages are rejected with 503 status, pending ones are answered
+            (within 'shutdown_timeout' seconds) and all chats are saved to disk (see 'Chat.to_disk').
+    Chats, saved on disk, are loaded, when their users start new sessions (see 'ChatBot.for_user').
+    HTTP interface (JSON bodies, messages are in 'Message.to_front' format):
+        POST /sessions {"username": str} - creates the session of the user (or returns existing one);
+        GET /sessions - lists sessions;
+        GET /sessions/{chat_id} - returns the session with its messages;
+        POST /sessions/{chat_id}/messages {"content": str} - sends user message and returns the answer;
+        GET /sessions/{chat_id}/ws - WebSocket: send {"content": str} frames, receive answers in the same order;
+        DELETE /sessions/{chat_id} - answers pending messages, saves the chat to disk and closes the session.
+    Example:
+        server = ChatServer.from_config("/path/to/config/file.json", port=8081)
+        server.run()
+    Command line:
+        python -m RAI.actors.chat_server /path/to/config/file.json --port 8081
+    """
+
+    _defaults = RDict({
+        "host": "127.0.0.1",
+        "port": 8081,
+        "max_pending": 8,
+        "max_sessions": 1000,
+        "shutdown_timeout": 60.0,
+        "retry_after": 1.0,
+    })
+
+    # Usernames are used as directory names of saved chats.
+    _username_pattern = re.compile(r"[\w.-]{1,64}")
+    _username_error = "Username must consist of 1-64 letters, digits, '_', '-' or '.'."
+
+    def __init__(
+        self,
+        bot_factory: Callable[[str], ChatBot],
+        host: str=None,
+        port: int=None,
+        *,
+        max_pending: int=None,
+        max_sessions: int=None,
+        shutdown_timeout: float=None) -> None:
+        """
+        Initializes server. The server is not started until 'run', 'serve' or 'start' is called.
+        Args:
+            bot_factory [Callable[[str], ChatBot]]: Function, which creates a bot for the username (i.e. 'ChatBot.for_user').
+            host [str]: Host to listen on. Default: None ("127.0.0.1").
+            port [int]: Port to listen on. 0 means any free port. Default: None (8081).
+        Kwargs:
+            max_pending [int]: Maximal number of queued messages per session. Default: None (8).
+            max_sessions [int]: Maximal number of sessions. Default: None (1000).
+            shutdown_timeout [float]: Number of seconds to answer pending messages on shutdown. Default: None (60.0).
+        """
+        self.bot_factory = bot_factory
+        self.host = self._defaults.host if host is None else host
+        self.port = self._defaults.port if port is None else port
+        self.max_pending = self._defaults.max_pending if max_pending is None else max_pending
+        self.max_sessions = self._defaults.max_sessions if max_sessions is None else max_sessions
+        self.shutdown_timeout = self._defaults.shutdown_timeout if shutdown_timeout is None else shutdown_timeout
+        if self.max_pending < 1:
+            raise ValueError(f"Parameter 'max_pending' must be positive, not {self.max_pending}.")
+        if self.max_sessions < 1:
+            raise ValueError(f"Parameter 'max_sessions' must be positive, not {self.max_sessions}.")
+        self.sessions = {}
+        self.closing = False
+        self._chat_ids = {}
+        # Tasks, which create sessions, by username.
+        self._opening = {}
+        self._websockets = set()
+        self._runner = None
+        self._loop = None
+        self._thread = None
+        return
+
+    @classmethod
+    def from_config(
+        cls,
+        config_path: str,
+        actors_config_path: str=None,
+        functions_config_path: str=None,
+        *,
+        bot_class: type=AsyncChatBot,
+        **kwargs) -> "ChatServer":
+        """
+        Creates server, which hosts bots of 'bot_class' with given configuration files.
+        Process-wide HTTP client, rate limiter and cache are configured once here, not per session.
+        Kwargs are passed to ChatServer.
+        """
+        bot = bot_class(config_path, actors_config_path, functions_config_path, mode="app")
+        return cls(bot.for_user, **kwargs)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def make_app(self) -> web.Application:
+        """
+        Creates aiohttp application with server routes.
+        """
+        app = web.Application()
+        app.router.add_post("/sessions", self.create_session)
+        app.router.add_get("/sessions", self.list_sessions)
+        app.router.add_get("/sessions/{chat_id}", self.get_session)
+        app.router.add_delete("/sessions/{chat_id}", self.delete_session)
+        app.router.add_post("/sessions/{chat_id}/messages", self.post_message)
+        app.router.add_get("/sessions/{chat_id}/ws", self.websocket)
+        app.on_shutdown.append(self.shutdown)
+        return app
+
+    # Sessions
+
+    async def open_session(self, username: str) -> ChatSession:
+        """
+        Returns the session of the user, creating it, if necessary.
+        Concurrent calls for the same user share the same session.
+        Raises ValueError, if username is invalid, and OverflowError, if there are 'max_sessions' sessions already.
+        Errors of 'bot_factory' are propagated.
+        """
+        if not self.is_valid_username(username):
+            raise ValueError(self._username_error)
+        chat_id = self._chat_ids.get(username)
+        if chat_id in self.sessions:
+            return self.sessions[chat_id]
+        task = self._opening.get(username)
+        if task is None:
+            if len(self.sessions) + len(self._opening) >= self.max_sessions:
+                raise OverflowError("Too many sessions.")
+            task = self._opening[username] = asyncio.ensure_future(self.start_session(username))
+        # Cancelled request must not cancel the session creation, which other requests may wait for.
+        return await asyncio.shield(task)
+
+    @classmethod
+    def is_valid_username(cls, username: str) -> bool:
+        return cls._username_pattern.fullmatch(username) is not None and username not in (".", "..")
+
+    async def start_session(self, username: str) -> ChatSession:
+        """
+        Creates the bot of the user in a worker thread (it reads files from disk) and starts its session.
+        """
+        try:
+            bot = await asyncio.to_thread(self.bot_factory, username)
+        finally:
+            del self._opening[username]
+        session = ChatSession(bot, self.max_pending)
+        self.sessions[session.chat_id] = session
+        self._chat_ids[username] = session.chat_id
+        return session
+
+    async def close_session(self, chat_id: str) -> None:
+        """
+        Answers pending messages of the session, saves its chat to disk and removes it.
+        """
+        session = self.sessions.get(chat_id)
+        if session is None:
+            return
+        await session.close(self.shutdown_timeout)
+        # The session could be replaced, while it was closing.
+        if self.sessions.get(chat_id) is session:
+            del self.sessions[chat_id]
+        return
+
+    async def shutdown(self, app: web.Application=None) -> None:
+        """
+        Rejects new messages, answers pending ones, saves all chats to disk and closes WebSocket connections.
+        Pooled connections of the async client in the server event loop are closed as well.
+        """
+        self.closing = True
+        # Sessions, which are being created, are closed as well.
+        await asyncio.gather(*self._opening.values(), return_exceptions=True)
+        await asyncio.gather(*(self.close_session(chat_id) for chat_id in list(self.sessions)))
+        for ws in list(self._websockets):
+            await ws.close(code=aiohttp.WSCloseCode.GOING_AWAY, message=b"Server shutdown")
+        await get_async_client().close()
+        return
+
+    # Request handling
+
+    async def create_session(self, request: web.Request) -> web.Response:
+        body = await self.read_json(request)
+        if not isinstance(body, dict) or not isinstance(body.get("username"), str):
+            return self.error_response(400, "Field 'username' (str) is required.")
+        if not self.is_valid_username(body["username"]):
+            return self.error_response(400, self._username_error)
+        if self.closing:
+            return self.error_response(503, "Server is shutting down.")
+        try:
+            session = await self.open_session(body["username"])
+        except OverflowError as e:
+            return self.error_response(503, str(e))
+        except Exception as e:
+            # I.e. corrupted saved chat, invalid configuration or missing tokenizer files in offline mode.
+            return self.error_response(500, f"Failed to create session: {type(e).__name__}: {e}")
+        return self.json_response(session.to_front())
+
+    async def list_sessions(self, request: web.Request) -> web.Response:
+        sessions = [
+            {"chat_id": chat_id, "username": session.bot.chat.username, "pending": session.queue.qsize()}
+            for chat_id, session in self.sessions.items()]
+        return self.json_response({"sessions": sessions})
+
+    async def get_session(self, request: web.Request) -> web.Response:
+        session = self.sessions.get(request.match_info["chat_id"])
+        if session is None:
+            return self.error_response(404, "Session not found.")
+        return self.json_response(session.to_front())
+
+    async def delete_session(self, request: web.Request) -> web.Response:
+        chat_id = request.match_info["chat_id"]
+        if chat_id not in self.sessions:
+            return self.error_response(404, "Session not found.")
+        await self.close_session(chat_id)
+        return self.json_response({"chat_id": chat_id, "closed": True})
+
+    async def post_message(self, request: web.Request) -> web.Response:
+        session = self.sessions.get(request.match_info["chat_id"])
+        if session is None:
+            return self.error_response(404, "Session not found.")
+        content = self.get_content(await self.read_json(request))
+        if content is None:
+            return self.error_response(400, "Field 'content' (non-empty str) is required.")
+        if self.closing or session.closed:
+            return self.error_response(503, "Session is closed.")
+        try:
+            future = session.submit(content)
+        except asyncio.QueueFull:
+            headers = {"Retry-After": str(self._defaults.retry_after)}
+            return self.error_response(429, "Too many pending messages in the session.", headers=headers)
+        try:
+            msg = await future
+        except Exception as e:
+            status = 503 if session.closed else 502
+            return self.error_response(status, f"{type(e).__name__}: {e}")
+        return self.json_response(msg.to_front())
+
+    async def websocket(self, request: web.Request) -> web.WebSocketResponse:
+        """
+        Handles WebSocket connection to the session.
+        Answers (or errors) are sent in the order of received messages by a separate task,
+        so that the client may send several messages without waiting for answers.
+        """
+        session = self.sessions.get(request.match_info["chat_id"])
+        if session is None:
+            return self.error_response(404, "Session not found.")
+        ws = web.WebSocketResponse(heartbeat=30.0)
+        await ws.prepare(request)
+        self._websockets.add(ws)
+        replies = asyncio.Queue()
+        sender = asyncio.ensure_future(self.send_replies(ws, replies))
+        try:
+            async for frame in ws:
+                if frame.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                try:
+                    content = self.get_content(orjson.loads(frame.data))
+                except ValueError:
+                    content = None
+                if content is None:
+                    future = self.failed_future(ValueError("Field 'content' (non-empty str) is required."))
+                elif self.closing or session.closed:
+                    future = self.failed_future(RuntimeError("Session is closed."))
+                else:
+                    # Waiting for a free slot stops reading the socket, which slows the client down.
+                    future = await session.put(content)
+                await replies.put(future)
+        finally:
+            await replies.put(None)
+            await sender
+            self._websockets.discard(ws)
+        return ws
+
+    async def send_replies(self, ws: web.WebSocketResponse, replies: asyncio.Queue) -> None:
+        while True:
+            future = await replies.get()
+            if future is None:
+                return
+            try:
+                payload = (await future).to_front()
+            except Exception as e:
+                payload = {"error": {"message": f"{type(e).__name__}: {e}"}}
+            if ws.closed:
+                continue
+            try:
+                await ws.send_str(orjson.dumps(payload).decode())
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    def failed_future(error: Exception) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        future.set_exception(error)
+        return future
+
+    @staticmethod
+    async def read_json(request: web.Request) -> object:
+        """
+        Returns JSON body of the request or None, if it is not a valid JSON.
+        """
+        try:
+            return await request.json(loads=orjson.loads)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def get_content(body: object) -> str:
+        """
+        Returns message content from request body or None, if it is missing or empty.
+        """
+        if not isinstance(body, dict):
+            return None
+        content = body.get("content")
+        if not isinstance(content, str) or not content:
+            return None
+        return content
+
+    @staticmethod
+    def json_response(body: dict, status: int=200) -> web.Response:
+        return web.json_response(body, status=status, dumps=lambda obj: orjson.dumps(obj).decode())
+
+    @staticmethod
+    def error_response(status: int, message: str, headers: dict=None) -> web.Response:
+        return web.json_response({"error": {"message": message}}, status=status, headers=headers)
+
+    # Lifecycle
+
+    async def setup(self) -> web.AppRunner:
+        """
+        Starts listening in the current event loop.
+        If the server was initialized with port 0, 'port' is set to the actual port.
+        """
+        runner = web.AppRunner(self.make_app())
+        await runner.setup()
+        site = web.TCPSite(runner, self.host, self.port)
+        try:
+            await site.start()
+        except Exception:
+            await runner.cleanup()
+            raise
+        self.port = runner.addresses[0][1]
+        return runner
+
+    async def serve(self) -> None:
+        """
+        Runs the server in the current event loop until the task is cancelled, then shuts it down gracefully.
+        """
+        runner = await self.setup()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+        return
+
+    def run(self) -> None:
+        """
+        Runs the server in the current thread until it is interrupted (SIGINT or SIGTERM), then shuts it down gracefully.
+        """
+        web.run_app(self.make_app(), host=self.host, port=self.port, shutdown_timeout=self.shutdown_timeout, print=None)
+        return
+
+    def start(self) -> "ChatServer":
+        """
+        Starts the server in a background thread and waits until it is ready to accept connections.
+        """
+        if self._thread is not None:
+            return self
+        ready = threading.Event()
+        failure = []
+
+        def serve() -> None:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                runner = loop.run_until_complete(self.setup())
+            except Exception as e:
+                failure.append(e)
+                ready.set()
+                loop.close()
+                return
+            self._loop = loop
+            self._runner = runner
+            ready.set()
+            loop.run_forever()
+            loop.run_until_complete(runner.cleanup())
+            loop.close()
+            return
+
+        self._thread = threading.Thread(target=serve, name="ChatServer", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if failure:
+            self._thread = None
+            raise failure[0]
+        return self
+
+    def stop(self) -> None:
+        """
+        Shuts down the server, started with 'start', gracefully.
+        """
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+        self._loop = None
+        self._runner = None
+        return
+
+    def __enter__(self) -> "ChatServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+        return
+
+
+def main(argv: list=None) -> None:
+    """
+    Runs ChatServer from command line.
+    """
+    parser = argparse.ArgumentParser(description="Multi-session chat server for ChatBot app mode.")
+    parser.add_argument("config", help="Path to ChatBot configuration file.")
+    parser.add_argument("--actors", default=None, help="Path to actors configuration file.")
+    parser.add_argument("--functions", default=None, help="Path to functions configuration file.")
+    parser.add_argument("--host", default=ChatServer._defaults.host)
+    parser.add_argument("--port", type=int, default=ChatServer._defaults.port)
+    parser.add_argument("--max-pending", type=int, default=None, help="Maximal number of queued messages per session.")
+    parser.add_argument("--max-sessions", type=int, default=None, help="Maximal number of sessions.")
+    parser.add_argument("--shutdown-timeout", type=float, default=None, help="Number of seconds to answer pending messages on shutdown.")
+    parser.add_argument("--sync", action="store_true", help="Host sync ChatBot instances (in worker threads) instead of AsyncChatBot.")
+    args = parser.parse_args(argv)
+    server = ChatServer.from_config(
+        args.config,
+        args.actors,
+        args.functions,
+        bot_class=ChatBot if args.sync else AsyncChatBot,
+        host=args.host,
+        port=args.port,
+        max_pending=args.max_pending,
+        max_sessions=args.max_sessions,
+        shutdown_timeout=args.shutdown_timeout)
+    print(f"Serving chat sessions on {server.url}")
+    server.run()
+    return
+
+
+if __name__ == "__main__":
+    main()
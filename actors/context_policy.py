@@ -0,0 +1,137 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import List
+
+
+class ContextPolicy:
+    """
+    Base class for ChatBot context management policies.
+    A policy decides, which context messages to evict, using memoized token counts of the bot
+    (see 'ChatBot.make_context_info'), so that it does not send any requests to OpenAI API.
+    The system message, the last message, pinned messages (see 'ChatBot.pin_context')
+    and rolling summary are never evicted.
+    Evicted messages are summarized into the rolling summary, if 'summarize' is True
+    (this is the only case, when eviction costs an API call).
+    """
+
+    def __init__(self, budget: int=None, summarize: bool=False) -> None:
+        """
+        Args:
+            budget [int]: Maximal size of the context in tokens. Default: None (limit of the bot model).
+            summarize [bool]: Whether to summarize evicted messages. Default: False.
+        """
+        if budget is not None and budget < 1:
+            raise ValueError(f"Parameter 'budget' must be positive, not {budget}.")
+        self.budget = budget
+        self.summarize = summarize
+        return
+
+    def get_budget(self, bot) -> int:
+        return bot.size_limit if self.budget is None else min(self.budget, bot.size_limit)
+
+    @staticmethod
+    def get_protected(bot) -> set:
+        """
+        Returns indices of context messages, which can't be evicted.
+        """
+        infos = bot._context_info
+        protected = {0, len(infos) - 1}
+        protected.update(i for i, info in enumerate(infos) if info.get("pinned") or info.get("summary") is not None)
+        return protected
+
+    def can_fit(self, bot, budget: int=None) -> bool:
+        """
+        Checks, that the context fits the budget (default: 'get_budget'), once all evictable messages are evicted.
+        """
+        if budget is None:
+            budget = self.get_budget(bot)
+        size = bot.context_size()
+        protected = self.get_protected(bot)
+        return size - sum(info.tokens for i, info in enumerate(bot._context_info) if i not in protected) <= budget
+
+    def select(self, bot) -> List[int]:
+        """
+        Returns sorted indices of context messages to evict.
+        """
+        return self.fit_budget(bot, [])
+
+    def fit_budget(self, bot, evicted: List[int]) -> List[int]:
+        """
+        Adds indices of the oldest messages to 'evicted', until the rest of the context fits the budget.
+        Exact token counts are computed only, if the estimated size of the context may exceed the budget.
+        If protected messages alone exceed the budget, no messages are added: eviction can't fit the context,
+        so it is left to model upgrade or summarization (see 'ChatBot.verify_context').
+        """
+        budget = self.get_budget(bot)
+        if bot.is_context_surely_fit(budget):
+            return evicted
+        if not self.can_fit(bot, budget):
+            return sorted(evicted)
+        size = bot.context_size()
+        infos = bot._context_info
+        size -= sum(infos[i].tokens for i in evicted)
+        protected = self.get_protected(bot)
+        excluded = set(evicted)
+        for i in range(len(infos)):
+            if size <= budget:
+                break
+            if i in protected or i in excluded:
+                continue
+            evicted.append(i)
+            size -= infos[i].tokens
+        return sorted(evicted)
+
+
+class SlidingWindowPolicy(ContextPolicy):
+    """
+    Keeps the system message and the last 'max_turns' turns (a turn starts with a user message) within the budget.
+    Example:
+        bot.set_context_policy(SlidingWindowPolicy(max_turns=10))
+    """
+
+    def __init__(self, max_turns: int=10, budget: int=None, summarize: bool=False) -> None:
+        super().__init__(budget, summarize)
+        if max_turns < 1:
+            raise ValueError(f"Parameter 'max_turns' must be positive, not {max_turns}.")
+        self.max_turns = max_turns
+        return
+
+    def select(self, bot) -> List[int]:
+        protected = self.get_protected(bot)
+        # Find the first message of the oldest turn in the window.
+        n_turns = 0
+        start = 1
+        for i in range(len(bot.context) - 1, 0, -1):
+            if bot.context[i].get("role") == "user":
+                n_turns += 1
+                if n_turns == self.max_turns:
+                    start = i
+                    break
+        evicted = [i for i in range(1, start) if i not in protected]
+        return self.fit_budget(bot, evicted)
+
+
+class EvictOldestPolicy(ContextPolicy):
+    """
+    Evicts the oldest messages, until the context fits the budget.
+    With 'summarize=True' evicted messages are merged into the rolling summary.
+    Example:
+        bot.set_context_policy(EvictOldestPolicy(summarize=True))
+    """
+    pass
+
+
+_policies = {
+    "sliding_window": SlidingWindowPolicy,
+    "evict_oldest": EvictOldestPolicy,
+}
+
+
+def make_context_policy(name: str, **kwargs) -> ContextPolicy:
+    """
+    Creates context policy by its name ("sliding_window" or "evict_oldest") and parameters.
+    """
+    if name not in _policies:
+        raise ValueError(f"Unknown context policy: {name}. Available: {list(_policies)}.")
+    return _policies[name](**kwargs)
@@ -0,0 +1,143 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import List, Tuple
+import math
+import re
+
+import numpy as np
+
+from .base_actor import BaseActor
+from .token_counter import TokenCounter
+from ..containers import RDict
+
+
+class ExtractiveCompressor(BaseActor):
+    """
+    Local extractive compression of text before abstractive summarization (no requests to OpenAI API).
+    Text is split into sentences, which are scored by TF-IDF cosine similarity to the whole text
+    (so that greetings and filler, which share no informative words with the rest of the text, get low scores).
+    The best sentences are kept in their original order, until the token budget is reached.
+    Example:
+        compressor = ExtractiveCompressor(keep_ratio=0.3)
+        short_text = compressor.run(text)
+    """
+
+    _defaults = RDict({
+        "keep_ratio": 0.3,
+        "min_tokens": 500,
+    })
+
+    # Sentences are separated by newlines and by whitespace after end punctuation.
+    _sentence_pattern = re.compile(r"(?<=[.!?…])\s+")
+    _word_pattern = re.compile(r"\w+", re.UNICODE)
+
+    def __init__(self, model: str="gpt-3.5-turbo", keep_ratio: float=None, min_tokens: int=None):
+        """
+        Args:
+            model [str]: Model, which encoding is used to count tokens. Default: "gpt-3.5-turbo".
+            keep_ratio [float]: Share of tokens to keep. Default: 0.3.
+            min_tokens [int]: Texts, shorter than this number of tokens, are not compressed. Default: 500.
+        """
+        super().__init__(model)
+        self.keep_ratio = self._defaults.keep_ratio if keep_ratio is None else keep_ratio
+        self.min_tokens = self._defaults.min_tokens if min_tokens is None else min_tokens
+        if not 0 < self.keep_ratio <= 1:
+            raise ValueError(f"Parameter 'keep_ratio' must be in (0, 1], not {self.keep_ratio}.")
+        self.token_counter = TokenCounter(self.model)
+        return
+
+    def set_model(self, model: str) -> None:
+        super().set_model(model)
+        if hasattr(self, "token_counter"):
+            self.token_counter.set_model(model)
+        return
+
+    def run(self, text: str, budget: int=None) -> str:
+        """
+        Compresses text.
+        Args:
+            text [str]: Text to compress.
+            budget [int]: Maximal size of the result in tokens. Default: None ('keep_ratio' of the text size).
+        Returns:
+            compressed [str]: Most informative sentences of the text in their original order.
+                Sentences from different lines are separated by newlines.
+        """
+        sentences, lines = self.split(text)
+        if len(sentences) < 2:
+            return text
+        sizes = np.array(self.token_counter.count_many(sentences))
+        total = int(sizes.sum())
+        if budget is None:
+            if total < self.min_tokens:
+                return text
+            budget = math.ceil(total * self.keep_ratio)
+        if total <= budget:
+            return text
+        keep = self.select(self.score(sentences), sizes, budget)
+        return self.join([sentences[i] for i in keep], [lines[i] for i in keep])
+
+    def split(self, text: str) -> Tuple[List[str], List[int]]:
+        """
+        Splits text into sentences.
+        Returns:
+            sentences [List[str]]: Non-empty sentences.
+            lines [List[int]]: Index of the line of each sentence.
+        """
+        sentences, lines = [], []
+        for n_line, line in enumerate(text.split("\n")):
+            for sentence in self._sentence_pattern.split(line):
+                sentence = sentence.strip()
+                if sentence:
+                    sentences.append(sentence)
+                    lines.append(n_line)
+        return sentences, lines
+
+    def score(self, sentences: List[str]) -> np.ndarray:
+        """
+        Returns TF-IDF cosine similarity of each sentence to the whole text.
+        """
+        vocabulary = {}
+        word_ids, sentence_ids = [], []
+        for n_sentence, sentence in enumerate(sentences):
+            for word in self._word_pattern.findall(sentence.lower()):
+                word_ids.append(vocabulary.setdefault(word, len(vocabulary)))
+                sentence_ids.append(n_sentence)
+        n_sentences, n_words = len(sentences), len(vocabulary)
+        if not n_words:
+            return np.zeros(n_sentences)
+        # Sparse term frequencies: unique (sentence, word) pairs with their counts.
+        pairs, tf = np.unique(np.array(sentence_ids) * n_words + np.array(word_ids), return_counts=True)
+        rows, cols = pairs // n_words, pairs % n_words
+        df = np.bincount(cols, minlength=n_words)
+        idf = np.log((1 + n_sentences) / (1 + df)) + 1
+        weights = tf * idf[cols]
+        centroid = np.bincount(cols, weights=weights, minlength=n_words)
+        dots = np.bincount(rows, weights=weights * centroid[cols], minlength=n_sentences)
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n_sentences)) * np.linalg.norm(centroid)
+        return np.divide(dots, norms, out=np.zeros(n_sentences), where=norms > 0)
+
+    @staticmethod
+    def select(scores: np.ndarray, sizes: np.ndarray, budget: int) -> List[int]:
+        """
+        Returns indices of the best sentences (in original order), which fit the budget together.
+        """
+        order = np.argsort(-scores, kind="stable")
+        fits = np.cumsum(sizes[order]) <= budget
+        # Sentences after the first one, which does not fit, may still fit the rest of the budget.
+        keep = list(order[fits])
+        used = int(sizes[keep].sum())
+        for i in order[~fits]:
+            if used + sizes[i] <= budget:
+                keep.append(i)
+                used += sizes[i]
+        return sorted(int(i) for i in keep)
+
+    @staticmethod
+    def join(sentences: List[str], lines: List[int]) -> str:
+        parts = []
+        for i, sentence in enumerate(sentences):
+            if i:
+                parts.append("\n" if lines[i] != lines[i - 1] else " ")
+            parts.append(sentence)
+        return "".join(parts)
@@ -1,7 +1,10 @@
 # Created by: Ausar686
 # https://github.com/Ausar686
 
+from typing import Iterable, Iterator
+
 from .base_actor import BaseActor
+from ..api import RetryPolicy
 from .qagpt import QAGPT
 from ..api_pmc_requests import PMCRequester
 
@@ -22,7 +25,8 @@ class KnowledgeBaseSearcher(BaseActor):
         ip: str=None,
         port: str=None,
         prompt: str=None,
-        url_prefix: str=None):
+        url_prefix: str=None,
+        retry_policy: RetryPolicy=None):
         """
         Initializes an instance of the class
         Args:
@@ -32,9 +36,10 @@ class KnowledgeBaseSearcher(BaseActor):
             port [str]: Knowledge base port for PMCR. If None is passed, uses Heuristics PMC port. Default: None.
             prompt [str]: Prompt to generate relevant articles' titles. If None is passed, uses default prompt. Default: None.
             url_prefix [str]: URL prefix for URL-generation from PMID (PMC-specific). If Non is passed, uses default prefix. Default: None.
+            retry_policy [RetryPolicy]: Policy for retrying failed requests to OpenAI API. If None is passed, uses default policy. Default: None.
         """
         # Initialize required parameters
-        super().__init__(model)
+        super().__init__(model, retry_policy)
         if ip is None:
             self.ip = self._defaults["ip"]
         else:
@@ -51,11 +56,20 @@ class KnowledgeBaseSearcher(BaseActor):
         self.url_prefix = self._defaults["url_prefix"]
         self.descr = self._defaults["descr"]
         # Initialize GPT instance
-        self.gpt = QAGPT(self.model)
+        self.gpt = QAGPT(self.model, retry_policy=self.retry_policy)
         # Initialize PMCR instance
         self.pmc = PMCRequester(ip_address=self.ip, port=self.port)
         return
     
+    def set_retry_policy(self, retry_policy: RetryPolicy=None) -> None:
+        """
+        Sets retry policy both for the instance and its QAGPT.
+        """
+        super().set_retry_policy(retry_policy)
+        if hasattr(self, "gpt"):
+            self.gpt.set_retry_policy(self.retry_policy)
+        return
+    
     def wrap(self, text: str) -> str:
         """
         Wrap an input string to further address it to OpenAI API.
@@ -72,9 +86,21 @@ class KnowledgeBaseSearcher(BaseActor):
         articles = self.gpt.get_list(request)
         return articles
     
-    def filter(self, articles: list=None) -> list:
+    def iter_generate(self, text: str=None) -> Iterator[str]:
+        """
+        Streaming counterpart of 'generate' method.
+        Yields names of the relevant articles, as soon as they are generated by QAGPT.
+        """
+        if text is None or text == "":
+            return
+        request = self.wrap(text)
+        yield from self.gpt.iter_list(request)
+    
+    def filter(self, articles: Iterable[str]=None) -> list:
         """
         Filters generated names of the articles with PMCRequester.
+        Articles can be passed as any iterable (i.e. a generator from 'iter_generate'),
+        so that filtering starts before all the names are generated.
         Returns a list of tuples: (article_title, article_url)
         """
         if articles is None or articles == []:
@@ -104,11 +130,11 @@ class KnowledgeBaseSearcher(BaseActor):
     def run(self, text: str=None) -> dict:
         """
         Executes full pipeline: 
-            1. Generates relevant article titles with QAGPT
+            1. Generates relevant article titles with QAGPT (streamed one-by-one)
             2. Filters generated titles with PMCR
             3. Converts the results into JSON format (Python dict)
         """
-        articles = self.generate(text)
+        articles = self.iter_generate(text)
         filtered_articles = self.filter(articles)
         json_data = self.to_json(text, filtered_articles)
         return json_data
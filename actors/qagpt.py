@@ -1,14 +1,19 @@
 # Created by: Ausar686
 # https://github.com/Ausar686
 
-from typing import Union
+from typing import Any, Callable, Iterable, Iterator, List, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
 import re
-import time
+
+from pandas.core.frame import DataFrame
+from pandas.core.series import Series
 
 from .base_actor import BaseActor
+from .selectors import get_selector
+from ..api import ParseError, RetryPolicy
 from ..containers.rdict import RDict
-from ..utils import request_openai, to_rdict
+from ..utils import request_openai, stream_openai
 
 
 class QAGPT(BaseActor):
@@ -16,8 +21,6 @@ class QAGPT(BaseActor):
     Wrapping class around OpenAI API to simplify development and automatic usage.
     """
     # TODO: Test and improve wrapping prompts.
-    # TODO: Implement streaming output.
-    # TODO: Implement processing of different 'n' values.
     # TODO: Check implementation of methods, so that to use static/class methods where needed. 
     def __init__(
         self, 
@@ -26,6 +29,8 @@ class QAGPT(BaseActor):
         temperature: float=0,
         stream: bool=False,
         n: int=1,
+        retry_policy: RetryPolicy=None,
+        selector: Union[str, Callable[[list], int]]="first",
         ):
         """
         Initializes QAGPT(Qusetion-Answer GPT) object instance.
@@ -34,14 +39,19 @@ class QAGPT(BaseActor):
             key (str): OpenAI API key. By default it's supposed, that you store it inside of 'OPENAI_API_KEY' environment variable. Default: None.
             temperature (float): Randomness of the results. The higher the value is, the more creative answers you will get.
                                  Lower values, yet, provide conservative answers. Should be in interval [0,2]. Default: 0.
-            stream (bool): Whether to provide a omplete answer at once (False), or token-by-token (True). Default: False.
-            n (int): Number of answers to generate. NOTE: Each answer consumes tokens. Default: 1. 
-        """
-        super().__init__(model)
-        if stream:
-            raise NotImplementedError("Streaming option coming soon...")
-        if n > 1:
-            raise NotImplementedError("Multiple output coming soon...")
+            stream (bool): Whether to receive a complete answer at once (False), or token-by-token (True). Default: False.
+            n (int): Number of answers to generate in a single request. NOTE: Each answer consumes tokens. Default: 1. 
+                     Typed 'get_' methods parse all answers, so that an unparsable answer does not require another request.
+            retry_policy (RetryPolicy): Policy for retrying failed requests and unparsable answers.
+                                        If None is passed, default RetryPolicy is used. Default: None.
+            selector (Union[str, Callable]): Selector of the answer among several ones: "first", "shortest"
+                                             or a callable, which returns index of the chosen answer (see 'RAI.actors.selectors').
+                                             Typed 'get_' methods select among successfully parsed answers only. Default: "first".
+        """
+        super().__init__(model, retry_policy)
+        if n < 1:
+            raise ValueError(f"Number of answers must be a positive integer, got: {n}")
+        self.selector = get_selector(selector)
         # Init OpenAI parameters
         self.openai = RDict()
         self.set_api_key(key)
@@ -50,8 +60,8 @@ class QAGPT(BaseActor):
         self.openai.stream = stream
         self.openai.n = n
         self._info = f"Instance of wrapping class around OpenAI API to simplify development and automatic usage.\nModel version: {self.model}"
-        self._sleep_time = 2
         self._supported_types = ['int', 'float', 'list', 'dict', 'str']
+        self._map_kinds = ['int', 'float', 'prob', 'list', 'dict', 'str', 'type']
         self._n_supported_types = len(self._supported_types)
         self._supported_roles = ['user', 'system', 'assistant']
         self._wrap_int_string = "Write only the integer as the answer."
@@ -59,6 +69,8 @@ class QAGPT(BaseActor):
         self._wrap_prob_string = "Write only the float from interval [0, 1] as the answer. The closer the result is to 0, the less the probability is. The closer the result is to 1, the greater the probability is."
         self._wrap_dict_string = "Write the answer in Python dictionary notation. Write only the pairs key:value from the dictionary, separated by newline symbol."
         self._wrap_list_string = "Write only the list. Each element of the list should be written on a separate line."
+        # Key/value pair of the answer. Pairs are separated either by commas or by newlines (as '_wrap_dict_string' requests).
+        self._pair_pattern = r"'[^']*':[^,\n]*"
         
     def set_api_key(self, key: str) -> None:
         """
@@ -118,27 +130,123 @@ class QAGPT(BaseActor):
         Reurns:
             answer (str): Model response in string format.
         """
-        json_data = request_openai(messages=messages, **self.openai)
-        completion = to_rdict(json_data)
-        answer = completion.choices[0].message.content
-        return answer
+        answers = self.ask_all(messages)
+        return answers[self.selector(answers)]
+
+    def ask_all(self, messages: list) -> List[str]:
+        """
+        Sends request to OpenAI server and returns all generated answers (n) in string format.
+        NOTE: Only the first answer is received in streaming mode.
+        """
+        if self.openai.stream:
+            return ["".join(self.open_stream(messages))]
+        completion = request_openai(messages=messages, **self.openai)
+        return self.answers_from_completion(completion)
+
+    def open_stream(self, messages: list) -> Iterator[str]:
+        """
+        Sends streaming request to OpenAI server and returns an iterator over answer deltas.
+        Unlike 'stream', failed request is not retried.
+        """
+        return self.iter_deltas(stream_openai(messages=messages, **self.openai))
+
+    def stream(self, messages: list) -> Iterator[str]:
+        """
+        Sends streaming request to OpenAI server and yields answer deltas, as soon as they arrive.
+        Failed request is retried according to 'self.retry_policy'.
+        Errors in the middle of the stream are not retried, since a part of the answer is already yielded.
+        Args:
+            messages (list): List of messages (dicts). By default, it's supposed, that you make messages using 'form_messages' method.
+        Yields:
+            delta (str): Next piece of model response.
+        """
+        yield from self.retry_policy.call(self.open_stream, messages)
+
+    @staticmethod
+    def iter_deltas(chunks: Iterator[dict]) -> Iterator[str]:
+        """
+        Converts an iterator over completion chunks into an iterator over answer deltas.
+        """
+        for chunk in chunks:
+            delta = QAGPT.delta_from_chunk(chunk)
+            if delta:
+                yield delta
+
+    @staticmethod
+    def delta_from_chunk(chunk: dict) -> str:
+        """
+        Returns content delta of the first answer from completion chunk (None, if there is no delta).
+        If several answers are generated (n > 1), chunks of other answers are skipped.
+        """
+        for choice in chunk.choices or []:
+            if choice.get("index", 0) == 0:
+                return choice.delta.get("content")
+        return None
+
+    def answer_from_completion(self, completion: RDict) -> str:
+        """
+        Extracts answer in string format from OpenAI Completion (selected by 'self.selector', if there are several ones).
+        """
+        answers = self.answers_from_completion(completion)
+        return answers[self.selector(answers)]
+
+    @staticmethod
+    def answers_from_completion(completion: RDict) -> List[str]:
+        """
+        Extracts all answers in string format from OpenAI Completion in the order of their indices.
+        """
+        choices = sorted(completion.choices, key=lambda choice: choice.get("index", 0))
+        return [choice.message.content for choice in choices]
     
     def get_answer(self, messages: list) -> str:
         """
         Wrapper around 'ask' method for case of running out of TPM (tokens per minute) or RPM (requests per minute).
+        Failed requests are retried according to 'self.retry_policy' (with backoff and 'Retry-After' support),
+        while fatal errors (i.e. invalid API key or bad request) are raised immediately.
         It is strongly recommended to use this method and not 'ask' one.
         Args:
             messages (list): List of messages (dicts). By default, it's supposed, that you make messages using 'form_messages' method.
         Reurns:
             answer (str): Model response in string format.
         """
-        while True:
+        return self.retry_policy.call(self.ask, messages)
+
+    def ask_parsed(self, messages: list, parser: Callable) -> Any:
+        """
+        Sends request to OpenAI server and converts the answer with 'parser'.
+        If several answers are generated (n > 1), all of them are converted,
+        and the result is selected among successfully converted ones by 'self.selector'.
+        Raises ParseError, if none of the answers can be converted.
+        """
+        return self.select_parsed(self.ask_all(messages), parser)
+
+    def select_parsed(self, answers: List[str], parser: Callable) -> Any:
+        """
+        Converts all answers with 'parser' and selects the result among successfully converted ones.
+        """
+        parsed = []
+        error = None
+        for answer in answers:
             try:
-                answer = self.ask(messages)
-                return answer
-            except Exception:
-                print(f"[INFO]: TPM/RPM limit exceeded. Waiting {self._sleep_time} seconds to continue requesting.")
-                time.sleep(self._sleep_time)
+                parsed.append(parser(answer))
+            except Exception as e:
+                error = e
+        if not parsed:
+            raise ParseError(f"Failed to parse the answer: {answers[0] if len(answers) == 1 else answers!r}") from error
+        return parsed[self.selector(parsed)]
+
+    def get_parsed(self, messages: list, parser: Callable) -> Any:
+        """
+        Wrapper around 'ask_parsed' method, which is used by typed 'get_' methods.
+        Both failed requests and unparsable answers are retried according to 'self.retry_policy'
+        and share the same budget of attempts.
+        Args:
+            messages (list): List of messages (dicts).
+            parser (Callable): Function, which converts string answer into the result of specific type.
+        Returns:
+            answer (Any): Converted model response.
+        """
+        return self.retry_policy.call(self.ask_parsed, messages, parser)
 
     # Here comes a bunch of prompt wrappings for obtaining an answer of specific type.
     # NOTE: It's not supposed, that you will use this methods manually.
@@ -176,6 +284,45 @@ class QAGPT(BaseActor):
             scrubbed_elm (str): Stripped 'elem' without index in the beginning. 
         """
         return re.sub(r'(?:\d*\.|-)\s*(.*)', r'\1',  elem.strip())
+
+    # Here comes a bunch of parsers, which convert raw API answer into a result of specific type.
+    # They raise an exception, if the answer can not be converted.
+    # NOTE: As with wrappings, it's not supposed, that you will use this methods manually.
+
+    def parse_int(self, answer: str) -> int:
+        return int(answer)
+
+    def parse_float(self, answer: str) -> float:
+        return float(answer)
+
+    def parse_prob(self, answer: str) -> float:
+        prob = self.parse_float(answer)
+        if not 0 <= prob <= 1:
+            raise ValueError(f"Probability must be in interval [0, 1], got {prob}.")
+        return prob
+
+    def parse_list(self, answer: str) -> list:
+        return list(map(self.scrub_elem, answer.split('\n')))
+
+    def parse_dict(self, answer: str) -> dict:
+        res_dict = {}
+        # Parse answer string with regexp, so that to get a list of strings with key/value pairs for the dict.
+        key_val_array = re.findall(self._pair_pattern + r"(?:[,\n]|$)", re.sub(r"[\{\}]", "", answer))
+        for elem in key_val_array:
+            key, value = self.parse_pair(elem)
+            res_dict[key] = value
+        return res_dict
+
+    def parse_pair(self, elem: str) -> tuple:
+        # Parse a string with key/value pair to obtain key/value independently.
+        value = re.sub(r'[,\n]$', '', re.sub(r"'[^']*':\s*", '', elem))
+        key = re.findall(r"'[^']*':", elem)[0][1:-2]
+        return key, value
+
+    def parse_type(self, answer: str) -> str:
+        prob_dict = {key:float(value) for key, value in self.parse_dict(answer).items()}
+        max_type = [type_ for type_ in prob_dict if prob_dict[type_] == max(prob_dict.values())][0]
+        return max_type
     
     def get_int(self, request: str) -> int:
         """
@@ -185,11 +332,7 @@ class QAGPT(BaseActor):
         Returns:
             answer (int): OpenAI API response as an integer.
         """
-        while True:
-            try:
-                return int(self.get_answer(self.form_messages(self.wrap_int(request))))
-            except Exception:
-                pass
+        return self.get_parsed(self.form_messages(self.wrap_int(request)), self.parse_int)
     
     def get_float(self, request: str) -> float:
         """
@@ -199,11 +342,7 @@ class QAGPT(BaseActor):
         Returns:
             answer (float): OpenAI API response as a float.
         """
-        while True:
-            try:
-                return float(self.get_answer(self.form_messages(self.wrap_float(request))))
-            except Exception:
-                pass
+        return self.get_parsed(self.form_messages(self.wrap_float(request)), self.parse_float)
     
     def get_prob(self, request: str) -> float:
         """
@@ -213,13 +352,7 @@ class QAGPT(BaseActor):
         Returns:
             answer (float): OpenAI API response as a probability.
         """
-        while True:
-            try:
-                answer = self.get_float(request)
-                assert 0 <= answer <= 1
-                return answer
-            except Exception:
-                pass
+        return self.get_parsed(self.form_messages(self.wrap_float(request)), self.parse_prob)
     
     def get_list(self, request: str) -> list:
         """
@@ -229,11 +362,7 @@ class QAGPT(BaseActor):
         Returns:
             answer (list): OpenAI API response as a list.
         """
-        while True:
-            try:
-                return list(map(self.scrub_elem, self.get_answer(self.form_messages(self.wrap_list(request))).split('\n')))
-            except Exception:
-                pass
+        return self.get_parsed(self.form_messages(self.wrap_list(request)), self.parse_list)
     
     def get_dict(self, request: str) -> dict:
         """
@@ -244,20 +373,7 @@ class QAGPT(BaseActor):
             answer (dict): OpenAI API response as a dict.
         """
         # [TODO]: Add functionallity to process answers with "".
-        while True:
-            try:
-                res_dict = {}
-                answer = self.get_answer(self.form_messages(self.wrap_dict(request)))
-                # Parse answer string with regexp, so that to get a list of strings with key/value pairs for the dict.
-                key_val_array = re.findall(r"'[^']*':[^,]*(?:,|$)", re.sub(r"[\{\}]", "", answer))
-                for elem in key_val_array:
-                    # Parse each string in list to obtain key/value independently.
-                    value = re.sub(r'[,\n]$', '', re.sub(r"'[^']*':\s*", '', elem))
-                    key = re.findall(r"'[^']*':", elem)[0][1:-2]
-                    res_dict[key] = value
-                return res_dict
-            except Exception:
-                pass
+        return self.get_parsed(self.form_messages(self.wrap_dict(request)), self.parse_dict)
     
     def get_str(self, request: str) -> str:
         """
@@ -269,6 +385,74 @@ class QAGPT(BaseActor):
         """
         return self.get_answer(self.form_messages(request))
     
+    # Here comes a bunch of streaming counterparts of 'get_' methods.
+    # They yield parsed parts of the answer, as soon as they are complete in the stream,
+    # so that the caller can start processing them without waiting for the whole answer.
+    # NOTE: Unlike 'get_' methods, they do not retry on failures, since a part of the answer may be already consumed.
+
+    @staticmethod
+    def split_lines(buffer: str) -> tuple:
+        """
+        Splits buffer into a list of complete lines and an incomplete rest.
+        """
+        *lines, rest = buffer.split('\n')
+        return lines, rest
+
+    def split_pairs(self, buffer: str) -> tuple:
+        """
+        Splits buffer into a list of complete key/value pairs and an incomplete rest.
+        A pair is considered complete, when it's followed by a comma or a newline.
+        """
+        pairs = []
+        pos = 0
+        for match in re.finditer(self._pair_pattern + r"[,\n]", buffer):
+            pairs.append(self.parse_pair(match.group()))
+            pos = match.end()
+        return pairs, buffer[pos:]
+
+    def iter_str(self, request: str) -> Iterator[str]:
+        """
+        Yield an API response for the request token-by-token.
+        Args:
+            request (str): Text request to OpenAI API.
+        Yields:
+            delta (str): Next piece of OpenAI API response.
+        """
+        yield from self.stream(self.form_messages(request))
+
+    def iter_list(self, request: str) -> Iterator[str]:
+        """
+        Yield an API response for the request element-by-element.
+        Each element is scrubbed and yielded, as soon as its line is complete in the stream.
+        Produces the same elements, as 'get_list' does.
+        Args:
+            request (str): Text request to OpenAI API.
+        Yields:
+            elem (str): Next element of OpenAI API response as a list.
+        """
+        buffer = ""
+        for delta in self.stream(self.form_messages(self.wrap_list(request))):
+            lines, buffer = self.split_lines(buffer + delta)
+            for line in lines:
+                yield self.scrub_elem(line)
+        yield self.scrub_elem(buffer)
+
+    def iter_dict(self, request: str) -> Iterator[tuple]:
+        """
+        Yield an API response for the request pair-by-pair.
+        Each (key, value) pair is yielded, as soon as it's complete in the stream.
+        Args:
+            request (str): Text request to OpenAI API.
+        Yields:
+            pair (tuple): Next (key, value) pair of OpenAI API response as a dict.
+        """
+        buffer = ""
+        for delta in self.stream(self.form_messages(self.wrap_dict(request))):
+            pairs, buffer = self.split_pairs(buffer + re.sub(r"[\{\}]", "", delta))
+            yield from pairs
+        # The rest of the stream is the last pair, which is not followed by a separator.
+        yield from self.split_pairs(buffer + "\n")[0]
+
     def get_type(self, request: str) -> str:
         """
         [EXPERIMENTAL]: Returns the name of type of the answer, that user wants to obtain. May work inaccurately.
@@ -277,10 +461,7 @@ class QAGPT(BaseActor):
         Returns:
             max_type (str): Predicted name of type of the answer, that user wants to obtain.
         """
-        prob_dict = self.get_dict(self.wrap_type(request))
-        prob_dict = {key:float(value) for key, value in prob_dict.items()}
-        max_type = [type_ for type_ in prob_dict if prob_dict[type_] == max(prob_dict.values())][0]
-        return max_type
+        return self.get_parsed(self.form_messages(self.wrap_dict(self.wrap_type(request))), self.parse_type)
     
     def __call__(self, request: str) -> Union[int, float, list, dict, str]:
         """
@@ -298,6 +479,76 @@ class QAGPT(BaseActor):
         """
         return self.get_str(request)
 
+    # Here come bulk counterparts of 'get_' methods for enrichment jobs.
+
+    def get_getter(self, kind: str) -> Callable:
+        """
+        Returns 'get_' method for the kind of the answer, i.e. 'get_list' for "list".
+        """
+        getter = getattr(self, f"get_{kind}", None)
+        if kind not in self._map_kinds or getter is None:
+            raise ValueError(f"Unsupported kind: {kind}. Available: {self._map_kinds}.")
+        return getter
+
+    def map(
+        self,
+        requests: Iterable[str],
+        kind: str="str",
+        concurrency: int=8,
+        progress: Callable[[int, int], None]=None,
+        return_exceptions: bool=True) -> list:
+        """
+        Returns API responses for all requests, obtained with 'get_<kind>' method.
+        Requests are sent concurrently by a pool of 'concurrency' threads.
+        All requests still pass through process-wide rate limiter (see 'RAI.api.get_rate_limiter'),
+        so the concurrency is capped by RPM/TPM limits as well.
+        Args:
+            requests (Iterable[str]): Text requests to OpenAI API.
+            kind (str): Kind of the answers: "int", "float", "prob", "list", "dict", "str" or "type". Default: "str".
+            concurrency (int): Maximum number of simultaneous requests. Default: 8.
+            progress (Callable[[int, int], None]): Function, which is called with (n_done, n_total) after each completed request. Default: None.
+            return_exceptions (bool): Whether to put the exception into the results instead of the answer of a failed request (True),
+                                      or to cancel pending requests and raise the exception (False). Default: True.
+        Returns:
+            results (list): Answers (or exceptions) in the same order, as requests.
+        """
+        if concurrency < 1:
+            raise ValueError(f"Concurrency must be a positive integer, got: {concurrency}")
+        getter = self.get_getter(kind)
+        requests = list(requests)
+        total = len(requests)
+        results = [None] * total
+        with ThreadPoolExecutor(max_workers=min(concurrency, max(total, 1))) as executor:
+            futures = {executor.submit(getter, request): index for index, request in enumerate(requests)}
+            for n_done, future in enumerate(as_completed(futures), 1):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    if not return_exceptions:
+                        for pending in futures:
+                            pending.cancel()
+                        raise
+                    results[futures[future]] = e
+                if progress is not None:
+                    progress(n_done, total)
+        return results
+
+    def apply_column(self, df: DataFrame, col: str, kind: str="str", **kwargs) -> Series:
+        """
+        Applies 'map' to the column of pandas DataFrame.
+        Args:
+            df (DataFrame): Source DataFrame.
+            col (str): Name of the column with requests.
+            kind (str): Kind of the answers (see 'map'). Default: "str".
+            **kwargs: Other 'map' kwargs (concurrency, progress, return_exceptions).
+        Returns:
+            answers (Series): Answers, aligned with the index of 'df'.
+        Example:
+            df["countries"] = gpt.apply_column(df, "request", kind="list", concurrency=16)
+        """
+        results = self.map(df[col].tolist(), kind=kind, **kwargs)
+        return Series(results, index=df.index, name=col, dtype=object)
+
     def __repr__(self):
         """
         Returns an information about the instance of class.
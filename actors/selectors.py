@@ -0,0 +1,53 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+"""
+Selectors of the answer among several candidates, generated by OpenAI API in a single request (n > 1).
+A selector takes a non-empty list of candidates (strings or parsed values) and returns the index of the chosen one.
+QAGPT typed getters pass only successfully parsed candidates, so "first" selects the first valid parse.
+"""
+
+from typing import Any, Callable, List, Union
+
+
+def select_first(candidates: List[Any]) -> int:
+    """
+    Selects the first candidate.
+    """
+    return 0
+
+
+def select_shortest(candidates: List[Any]) -> int:
+    """
+    Selects the candidate with the shortest string representation.
+    """
+    return min(range(len(candidates)), key=lambda i: len(str(candidates[i])))
+
+
+def by_score(scorer: Callable[[Any], float]) -> Callable[[List[Any]], int]:
+    """
+    Returns selector, which chooses the candidate with the highest score (the first one among equal).
+    Example:
+        gpt = QAGPT(n=3, selector=by_score(lambda answer: -abs(answer - 42)))
+    """
+    def select(candidates: List[Any]) -> int:
+        scores = [scorer(candidate) for candidate in candidates]
+        return scores.index(max(scores))
+    return select
+
+
+_selectors = {
+    "first": select_first,
+    "shortest": select_shortest,
+}
+
+
+def get_selector(selector: Union[str, Callable[[List[Any]], int]]) -> Callable[[List[Any]], int]:
+    """
+    Returns selector by its name ("first" or "shortest"). Callables are returned as is.
+    """
+    if callable(selector):
+        return selector
+    if selector not in _selectors:
+        raise ValueError(f"Unknown selector: {selector}. Available: {list(_selectors)} or a callable.")
+    return _selectors[selector]
@@ -0,0 +1,129 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import List, Tuple
+from itertools import accumulate
+
+import tiktoken
+
+from .base_actor import BaseActor
+from .token_counter import get_encoding_registry
+from ..containers import RDict
+
+
+class TextChunker(BaseActor):
+    """
+    Splits text into chunks of at most 'chunk_size' tokens.
+    The text is encoded only once: chunks are slices of its token sequence.
+    Each cut is snapped back to the nearest line end (or, if there is no line end, sentence end)
+    within the last 'snap_window' share of the chunk. If there are no such boundaries, the text is cut exactly at 'chunk_size'.
+    Cuts never split a multi-byte symbol.
+    Example:
+        chunker = TextChunker("gpt-3.5-turbo", chunk_size=1000, overlap=100)
+        chunks = chunker.run(text)
+    """
+
+    _defaults = RDict({
+        "chunk_size": 1000,
+        "overlap": 0,
+        "snap_window": 0.1,
+    })
+
+    _sentence_ends = (b".", b"!", b"?", b"...", "…".encode("utf-8"))
+
+    def __init__(
+            self,
+            model: str="gpt-3.5-turbo",
+            chunk_size: int=None,
+            overlap: int=None,
+            snap_window: float=None):
+        """
+        Args:
+            model [str]: Model, which encoding is used. Default: "gpt-3.5-turbo".
+            chunk_size [int]: Maximal size of a chunk in tokens. Default: 1000.
+            overlap [int]: Number of tokens, shared by consecutive chunks. Default: 0.
+            snap_window [float]: Share of the chunk, in which the cut is moved to line or sentence end. Default: 0.1.
+        """
+        super().__init__(model)
+        self.chunk_size = self._defaults.chunk_size if chunk_size is None else chunk_size
+        self.overlap = self._defaults.overlap if overlap is None else overlap
+        self.snap_window = self._defaults.snap_window if snap_window is None else snap_window
+        if self.chunk_size < 1:
+            raise ValueError(f"Parameter 'chunk_size' must be positive, not {self.chunk_size}.")
+        if not 0 <= self.overlap < self.chunk_size:
+            raise ValueError(f"Parameter 'overlap' must be non-negative and less than 'chunk_size', not {self.overlap}.")
+        if not 0 <= self.snap_window < 1:
+            raise ValueError(f"Parameter 'snap_window' must be in [0, 1), not {self.snap_window}.")
+        return
+
+    @property
+    def encoding(self) -> tiktoken.Encoding:
+        return get_encoding_registry().for_model(self.model)
+
+    def run(self, text: str, chunk_size: int=None) -> List[str]:
+        """
+        Splits text into chunks.
+        Args:
+            text [str]: Text to split.
+            chunk_size [int]: Overrides 'self.chunk_size' for this call. Default: None.
+        Returns:
+            chunks [List[str]]: Chunks of the text. If the text fits 'chunk_size', it is returned as a single chunk.
+        """
+        if chunk_size is None:
+            chunk_size = self.chunk_size
+        if chunk_size <= self.overlap:
+            raise ValueError(f"Chunk size must be greater than overlap ({self.overlap}), not {chunk_size}.")
+        tokens = self.encoding.encode_ordinary(text)
+        if len(tokens) <= chunk_size:
+            return [text]
+        pieces = self.encoding.decode_tokens_bytes(tokens)
+        data = b"".join(pieces)
+        # Byte offsets of token boundaries
+        offsets = [0, *accumulate(map(len, pieces))]
+        return [data[offsets[start]:offsets[end]].decode("utf-8") for start, end in self.split(pieces, chunk_size)]
+
+    def split(self, pieces: List[bytes], chunk_size: int) -> List[Tuple[int, int]]:
+        """
+        Returns chunks as (start, end) pairs of token indices.
+        Args:
+            pieces [List[bytes]]: Bytes of each token.
+            chunk_size [int]: Maximal size of a chunk in tokens.
+        """
+        n_tokens = len(pieces)
+        window = int(chunk_size * self.snap_window)
+        bounds = []
+        start = 0
+        while True:
+            end = min(start + chunk_size, n_tokens)
+            if end == n_tokens:
+                bounds.append((start, end))
+                break
+            end = self.snap(pieces, max(start + 1, end - window), end)
+            end = self.align(pieces, start + 1, end)
+            bounds.append((start, end))
+            start = self.align(pieces, start + 1, max(end - self.overlap, start + 1))
+        return bounds
+
+    def snap(self, pieces: List[bytes], low: int, end: int) -> int:
+        """
+        Moves the cut from 'end' back to the nearest line end (then sentence end) in (low, end].
+        """
+        for i in range(end, low, -1):
+            if b"\n" in pieces[i - 1]:
+                return i
+        for i in range(end, low, -1):
+            if pieces[i - 1].rstrip().endswith(self._sentence_ends):
+                return i
+        return end
+
+    @staticmethod
+    def align(pieces: List[bytes], low: int, end: int) -> int:
+        """
+        Moves the cut from 'end' back to a symbol boundary:
+        a token, which starts with UTF-8 continuation byte, can not start a chunk.
+        If there is no boundary in [low, end], returns 'end'.
+        """
+        for i in range(end, low - 1, -1):
+            if i == len(pieces) or not pieces[i] or pieces[i][0] & 0xC0 != 0x80:
+                return i
+        return end
@@ -1,10 +1,14 @@
 # Created by: Ausar686
 # https://github.com/Ausar686
 
-from typing import Union
+from typing import Callable, List, Union
 from collections import deque
+from functools import partial
 
 from .base_actor import BaseActor
+from ..api import RetryPolicy
+from .extractive_compressor import ExtractiveCompressor
+from .text_chunker import TextChunker
 from .token_counter import TokenCounter
 from .qagpt import QAGPT
 
@@ -24,19 +28,47 @@ class TextSummarizer(BaseActor):
     }
     
     _max_words = 200
+
+    # "sequential": chunks are summarized one by one.
+    # "map_reduce": chunks are summarized concurrently, then partial summaries are reduced level by level.
+    _strategies = ["sequential", "map_reduce"]
+    
+    # QAGPT class to use for requests. Is overridden in AsyncTextSummarizer.
+    _gpt_class = QAGPT
     
-    def __init__(self, model: str="gpt-3.5-turbo", n_words: int=50):
-        super().__init__(model)
+    def __init__(
+            self,
+            model: str="gpt-3.5-turbo",
+            n_words: int=50,
+            retry_policy: RetryPolicy=None,
+            overlap: int=0,
+            keep_ratio: float=None):
+        super().__init__(model, retry_policy)
         if n_words > self._max_words:
             raise ValueError("Too many words for summary. Maximum 200 words allowed.")
         self.n_words = n_words
         self.token_counter = TokenCounter(self.model)
-        self.gpt = QAGPT(model=self.model)
+        # Long texts are split into chunks, which fit the model limit, on token boundaries.
+        # 'overlap' is the number of tokens, shared by consecutive chunks.
+        self.chunker = TextChunker(self.model, overlap=overlap)
+        # If 'keep_ratio' is set, only the most informative sentences (this share of tokens)
+        # are sent for summarization (see 'ExtractiveCompressor').
+        self.compressor = None if keep_ratio is None else ExtractiveCompressor(self.model, keep_ratio)
+        self.gpt = self._gpt_class(model=self.model, retry_policy=self.retry_policy)
         return
 
     def set_model(self, model: str) -> None:
         super().set_model(model)
         self.upgrade_model()
+        for actor in ("token_counter", "chunker", "compressor"):
+            if getattr(self, actor, None) is not None:
+                getattr(self, actor).set_model(self.model)
+        return
+    
+    def set_retry_policy(self, retry_policy: RetryPolicy=None) -> None:
+        super().set_retry_policy(retry_policy)
+        if hasattr(self, "gpt"):
+            self.gpt.set_retry_policy(self.retry_policy)
         return
     
     def upgrade_model(self) -> None:
@@ -58,24 +90,38 @@ class TextSummarizer(BaseActor):
             """
         return prompt
     
+    @property
+    def chunk_size(self) -> int:
+        # Maximal size of text in a single request in tokens
+        return self._limits[self.model] - self.token_counter.run(self.wrap(""))
+
     @staticmethod
     def dict2str(dct: dict) -> str:
         # Converts message in a dict form to message in a dialog (string) form
         return f"[{dct.get('role')}]: {dct.get('content')}"
         
-    def run(self, obj: Union[str, list, dict]) -> str:
+    def run(self, obj: Union[str, list, dict], **kwargs) -> str:
+        """
+        Summarizes text, message or list of messages.
+        Args:
+            obj [Union[str, list, dict]]: Object for summarization.
+            **kwargs: Options of long texts summarization (see 'summarize_str'):
+                strategy, concurrency, progress, on_partial.
+        Returns:
+            summary [str]: Summary of the object.
+        """
         # Raw text for summariztaion
         if isinstance(obj, str):
-            return self.summarize_str(obj)
+            return self.summarize_str(obj, **kwargs)
         # Message dict for summarization
         elif isinstance(obj, dict):
-            return self.summarize_dict(obj)
+            return self.summarize_dict(obj, **kwargs)
         # List of messages for summarization
         elif isinstance(obj, list):
-            return self.summarize_list(obj)
+            return self.summarize_list(obj, **kwargs)
         elif isinstance(obj, deque):
             # If a deque is given, process it as a list.
-            return self.summarize_list(obj)
+            return self.summarize_list(obj, **kwargs)
         else:
             raise TypeError(f"Unsupported type {type(obj)} for argument 'obj'.",
                             f"Only str, dict and list are supported.")
@@ -86,45 +132,72 @@ class TextSummarizer(BaseActor):
             {string}
             """
         
-    def summarize_str(self, string: str) -> str:
-        request = self.wrap(string)
-        n_tokens = self.token_counter.run(request)
-        # If text is super long, split it in 2 parts
-        if n_tokens > self._limits[self.model]:
-            lines = request.split("\n")
-            n_lines = len(lines)
-            batch = "\n".join(lines[:n_lines//2])
-            n_tokens_batch = self.token_counter.run(batch)
-            if n_tokens_batch > self._limits[self.model]:
-                # Probably, it's a very long single message.
-                # Summarize it in a bruteforce manner.
-                return self.brute_summarize(string)
-            summary = self.summarize_str(batch)
-            new_string = summary + "\n" + "\n".join(lines[n_lines//2:])
-            return self.summarize_str(new_string)
-        answer = self.gpt.get_str(request)
-        return answer
+    def summarize_str(
+            self,
+            string: str,
+            strategy: str="sequential",
+            concurrency: int=8,
+            progress: Callable[[int, int, int], None]=None,
+            on_partial: Callable[[int, List[str]], None]=None) -> str:
+        """
+        Summarizes text. Text, which does not fit the model limit, is split into chunks (the text is encoded only once).
+        Chunks are summarized, then joined partial summaries are split and summarized again (level by level),
+        until they fit a single request, which produces the final summary.
+        Args:
+            string [str]: Text for summarization.
+            strategy [str]: "sequential" (one request at a time) or "map_reduce" (concurrent requests). Default: "sequential".
+            concurrency [int]: Maximal number of simultaneous requests for "map_reduce" strategy. Default: 8.
+            progress [Callable[[int, int, int], None]]: Function, which is called with (level, n_done, n_total)
+                after each completed request of the level. Default: None.
+            on_partial [Callable[[int, List[str]], None]]: Function, which is called with (level, summaries)
+                once partial summaries of the level are ready. Default: None.
+        Returns:
+            summary [str]: Summary of the text.
+        """
+        chunks = self.get_chunks(string, strategy, concurrency)
+        level = 0
+        while len(chunks) > 1:
+            summaries = self.gpt.map(
+                [self.wrap(chunk) for chunk in chunks],
+                concurrency=self.get_concurrency(strategy, concurrency),
+                progress=self.level_progress(progress, level),
+                return_exceptions=False)
+            if on_partial is not None:
+                on_partial(level, summaries)
+            chunks = self.chunker.run("\n".join(summaries), self.chunk_size)
+            level += 1
+        return self.gpt.get_str(self.wrap(chunks[0]))
+
+    def get_chunks(self, string: str, strategy: str, concurrency: int) -> List[str]:
+        # Validates summarization options, compresses text (if 'keep_ratio' is set)
+        # and splits it into chunks, which fit the model limit.
+        if strategy not in self._strategies:
+            raise ValueError(f"Unknown strategy: {strategy}. Available: {self._strategies}.")
+        if concurrency < 1:
+            raise ValueError(f"Concurrency must be a positive integer, got: {concurrency}")
+        if self.compressor is not None:
+            string = self.compressor.run(string)
+        return self.chunker.run(string, self.chunk_size)
 
-    def brute_summarize(self, string: str) -> str:
-        # Split large string with no newlines into two parts
-        # Summarize first one and add the result to second one
-        # Then summarize the mixed string
-        size = len(string)
-        batch = string[:size//2]
-        summary = self.summarize_str(batch)
-        new_string = summary + string[size//2:]
-        return self.summarize_str(new_string)
+    @staticmethod
+    def get_concurrency(strategy: str, concurrency: int) -> int:
+        return concurrency if strategy == "map_reduce" else 1
+
+    @staticmethod
+    def level_progress(progress: Callable[[int, int, int], None], level: int) -> Callable[[int, int], None]:
+        # Adapts summarization progress hook to 'QAGPT.map' progress hook.
+        return None if progress is None else partial(progress, level)
     
-    def summarize_dict(self, dct: dict) -> str:
+    def summarize_dict(self, dct: dict, **kwargs) -> str:
         # Convert message in a dict form to message in a dialog (string) form.
         # And then call 'summarize_str'
         string = self.dict2str(dct)
-        return self.summarize_str(string)
+        return self.summarize_str(string, **kwargs)
     
-    def summarize_list(self, lst: list) -> str:
+    def summarize_list(self, lst: list, **kwargs) -> str:
         # Convert all messages from the list (dicts) to strings
         # Then join the strings via newline
         # And then call 'summarize_str'
         strings = [self.dict2str(dct) for dct in lst]
         string = "\n".join(strings)
-        return self.summarize_str(string)
\ No newline at end of file
+        return self.summarize_str(string, **kwargs)
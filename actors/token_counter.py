@@ -1,17 +1,168 @@
 # Created by: Ausar686
 # https://github.com/Ausar686
 
-from typing import Union
+from typing import Dict, Iterable, List, Union
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import math
+import os
+import threading
 
 import tiktoken
+import tiktoken.model
 
 from .base_actor import BaseActor
 from ..chat import Message
 
 
+class EncodingRegistry:
+    """
+    RAI process-wide registry of tiktoken encodings.
+    Each distinct encoding is loaded only once, on first use, even if it is shared
+    by several models (i.e. all gpt-3.5-turbo and gpt-4 variants use 'cl100k_base').
+    The registry is thread-safe. Use 'get_encoding_registry' to obtain the shared instance.
+    BPE files are loaded from local cache directory, if they are staged there (see 'RAI.actors.tokenizer_assets').
+    NOTE: Call 'preload' in the parent process before forking workers,
+    so that workers share loaded encodings (copy-on-write) instead of loading them again.
+    """
+
+    def __init__(self) -> None:
+        self._encodings = {}
+        self._model_encodings = {}
+        self._model_names = {}
+        self._lock = threading.Lock()
+        return
+
+    @staticmethod
+    def encoding_name_for_model(model: str) -> str:
+        """
+        Returns the name of the encoding, used by the model, without loading the encoding.
+        Raises KeyError, if the model is unknown.
+        """
+        resolver = getattr(tiktoken.model, "encoding_name_for_model", None)
+        if resolver is not None:
+            return resolver(model)
+        if model in tiktoken.model.MODEL_TO_ENCODING:
+            return tiktoken.model.MODEL_TO_ENCODING[model]
+        prefixes = getattr(tiktoken.model, "MODEL_PREFIX_TO_ENCODING", None) or getattr(tiktoken.model, "_MODEL_PREFIX_TO_ENCODING", {})
+        for prefix, name in prefixes.items():
+            if model.startswith(prefix):
+                return name
+        raise KeyError(f"Could not map model {model} to a tokeniser.")
+
+    def get(self, name: str) -> tiktoken.Encoding:
+        """
+        Returns the encoding by its name. Loads the encoding on first call.
+        """
+        encoding = self._encodings.get(name)
+        if encoding is not None:
+            return encoding
+        with self._lock:
+            encoding = self._encodings.get(name)
+            if encoding is None:
+                # Import here, so that 'python -m RAI.actors.tokenizer_assets' does not find it already imported.
+                from .tokenizer_assets import prepare
+                prepare(name)
+                encoding = tiktoken.get_encoding(name)
+                self._encodings[name] = encoding
+        return encoding
+
+    def name_for_model(self, model: str) -> str:
+        """
+        Returns (cached) name of the encoding, used by the model, without loading the encoding.
+        """
+        name = self._model_names.get(model)
+        if name is None:
+            name = self.encoding_name_for_model(model)
+            self._model_names[model] = name
+        return name
+
+    def for_model(self, model: str) -> tiktoken.Encoding:
+        """
+        Returns the encoding, used by the model. Loads the encoding on first call.
+        """
+        encoding = self._model_encodings.get(model)
+        if encoding is not None:
+            return encoding
+        encoding = self.get(self.name_for_model(model))
+        self._model_encodings[model] = encoding
+        return encoding
+
+    def preload(self, models: Iterable[str]) -> None:
+        """
+        Loads encodings for all models in advance (i.e. before forking worker processes).
+        """
+        for model in models:
+            self.for_model(model)
+        return
+
+    @property
+    def loaded(self) -> list:
+        """
+        Returns names of already loaded encodings.
+        """
+        return list(self._encodings)
+
+
+_encoding_registry = EncodingRegistry()
+
+
+def get_encoding_registry() -> EncodingRegistry:
+    """
+    Returns process-wide EncodingRegistry instance.
+    """
+    return _encoding_registry
+
+
+def _encode_part(encoding_name: str, text: str, count_only: bool) -> Union[List[int], int]:
+    # Is executed in worker processes (see 'TokenCounter.encode_many').
+    tokens = _encoding_registry.get(encoding_name).encode_ordinary(text)
+    return len(tokens) if count_only else tokens
+
+
+def split_text(text: str, size: int) -> List[str]:
+    """
+    Splits text into parts of approximately 'size' characters at line boundaries.
+    Text is split only after a newline, which is followed by non-whitespace symbol,
+    so that encoding of the parts gives the same tokens, as encoding of the whole text.
+    A line, which is longer than 'size', is not split.
+    """
+    parts = []
+    start = 0
+    n_chars = len(text)
+    while n_chars - start > size:
+        end = start + size
+        while True:
+            end = text.find("\n", end)
+            if end == -1 or end + 1 >= n_chars or not text[end + 1].isspace():
+                break
+            end += 1
+        if end == -1 or end + 1 >= n_chars:
+            break
+        parts.append(text[start:end + 1])
+        start = end + 1
+    parts.append(text[start:])
+    return parts
+
+
 class TokenCounter(BaseActor):
     _tokens_per_message = 3
+    _tokens_per_reply = 3
+    # Estimator parameters (see 'estimate_from_str'), calibrated for 'cl100k_base'
+    # on English prose, documentation, Python code and Russian text (see 'RAI.benchmarks.token_estimation').
+    # On average the estimate exceeds the exact size by ~10-15%. Exact size of a single message
+    # did not exceed the estimate by more than 46% (short code lines), and of a whole context - by more than 5%.
+    # Thus exact size <= estimate * (1 + _estimate_error) is used as a safety bound.
+    # NOTE: The bound does not hold for texts, dominated by emoji or other rare symbols.
+    _bytes_per_token = 3.6
+    _estimate_error = 0.5
+    # Batch encoding parameters (see 'encode_many'): texts are encoded in threads (tiktoken releases the GIL),
+    # if their total size exceeds '_batch_min_chars', and documents, larger than '_process_min_chars',
+    # are split into parts of '_process_part_chars' and encoded in worker processes.
+    _batch_threads = min(8, os.cpu_count() or 1)
+    _batch_min_chars = 64 * 1024
+    _process_min_chars = 4 * 1024 ** 2
+    _process_part_chars = 1024 ** 2
     _models = [
         "gpt-3.5-turbo",
         "gpt-3.5-turbo-16k",
@@ -20,48 +171,149 @@ class TokenCounter(BaseActor):
     ]
     
     def __init__(self, model: str="gpt-3.5-turbo"):
+        # TokenCounter is a lightweight handle: encodings are loaded lazily by the shared registry.
         super().__init__(model)
-        self.encodings = {key: tiktoken.encoding_for_model(key) for key in self._models}
         return
 
     @property
-    def encoding(self):
-        return self.encodings[self.model]
+    def encoding(self) -> tiktoken.Encoding:
+        return _encoding_registry.for_model(self.model)
+
+    @property
+    def encodings(self) -> Dict[str, tiktoken.Encoding]:
+        return {key: _encoding_registry.for_model(key) for key in self._models}
+
+    @property
+    def encoding_name(self) -> str:
+        """
+        Returns the name of the encoding of current model. Does not load the encoding.
+        """
+        return _encoding_registry.name_for_model(self.model)
     
-    def run(self, obj: Union[str, dict, list, None]) -> int:
+    def run(self, obj: Union[str, dict, list, None], exact: bool=True) -> int:
+        """
+        Returns the size of the object in tokens.
+        If 'exact' is False, the size is estimated without encoding (see 'estimate_from_str'),
+        which is much faster, but is accurate only up to '_estimate_error'.
+        """
         if obj is None:
             return 0
         if isinstance(obj, str):
-            return self.count_from_str(obj)
+            return self.count_from_str(obj, exact)
         elif isinstance(obj, dict):
-            return self.count_from_dict(obj)
+            return self.count_from_dict(obj, exact)
         elif isinstance(obj, list):
-            return self.count_from_list(obj)
+            return self.count_from_list(obj, exact)
         elif isinstance(obj, deque):
             # Counting for list and deque are the same
-            return self.count_from_list(obj)
+            return self.count_from_list(obj, exact)
         elif isinstance(obj, Message):
             # Counting for Message is equal to counting from dict
-            return self.count_from_dict(obj.to_openai())
+            return self.count_from_dict(obj.to_openai(), exact)
         else:
             raise TypeError(f"Parameter 'obj' must be str, dict, list, deque, Message or None, not {type(obj)}.")
             
-    def count_from_str(self, string: str) -> int:
-        return len(self.encoding.encode(string))
+    def count_from_str(self, string: str, exact: bool=True) -> int:
+        # Empty content (i.e. None in function call messages) takes no tokens both exactly and by estimate.
+        if not string:
+            return 0
+        if not exact:
+            return self.estimate_from_str(string)
+        return len(self.encoding.encode_ordinary(string))
+
+    def estimate_from_str(self, string: str) -> int:
+        # Estimates the size of the string by the number of its bytes in UTF-8 encoding.
+        # Non-ASCII symbols take more bytes and more tokens, so a single ratio fits both ASCII and other texts.
+        if not string:
+            return 0
+        n_bytes = len(string) if string.isascii() else len(string.encode("utf-8"))
+        return math.ceil(n_bytes / self._bytes_per_token)
+
+    def upper_bound(self, estimate: int) -> int:
+        # Returns the maximal exact size for the estimated one.
+        return math.ceil(estimate * (1 + self._estimate_error))
     
-    def count_from_dict(self, dct: dict) -> int:
+    def count_from_dict(self, dct: dict, exact: bool=True) -> int:
         # Here we assume, that a message is provided in OpenAI dict form:
         # {"role": role, "content": content}
         # So we simply call 'count_from_str' on content
-        return self.count_from_str(dct.get("content"))
+        return self.count_from_str(dct.get("content"), exact)
+    
+    def count_message(self, message: dict, exact: bool=True) -> int:
+        # Size of a single message in a list of messages, including message formatting tokens.
+        # Is used to count the size of the list incrementally.
+        return self._tokens_per_message + self.count_from_dict(message, exact)
     
-    def count_from_list(self, lst: list) -> int:
+    def count_from_list(self, lst: list, exact: bool=True) -> int:
         # Here we assume that a list of messages in OpenAI dict form is given:
         # [{"role": role, "content": content}, ...]
-        # So we simply iterate over the list and call 'count_from_dict'
-        num_tokens = 0
-        for message in lst:
-            num_tokens += self._tokens_per_message
-            num_tokens += self.count_from_dict(message)
-        num_tokens += 3 # every reply is primed with <|start|>assistant<|message|>
-        return num_tokens
\ No newline at end of file
+        # So we count all contents at once with 'count_many' and add message formatting tokens
+        if exact:
+            num_tokens = sum(self.count_many([message.get("content") for message in lst]))
+        else:
+            num_tokens = sum(self.estimate_from_str(message.get("content")) for message in lst)
+        num_tokens += self._tokens_per_message * len(lst)
+        num_tokens += self._tokens_per_reply # every reply is primed with <|start|>assistant<|message|>
+        return num_tokens
+
+    def encode_many(self, strings: List[str], num_threads: int=None) -> List[List[int]]:
+        """
+        Encodes a batch of strings. Special tokens are encoded as ordinary text.
+        Small batches are encoded sequentially, large ones - in threads,
+        and multi-megabyte documents are split at line boundaries and encoded in worker processes.
+        Args:
+            strings [List[str]]: Strings to encode. None is encoded as an empty string.
+            num_threads [int]: Maximal number of threads (processes). Default: None ('_batch_threads').
+        Returns:
+            tokens [List[List[int]]]: Tokens of each string.
+        """
+        return self._encode_many(strings, num_threads, count_only=False)
+
+    def count_many(self, strings: List[str], num_threads: int=None) -> List[int]:
+        """
+        Returns sizes of a batch of strings in tokens. See 'encode_many' for details.
+        """
+        return self._encode_many(strings, num_threads, count_only=True)
+
+    def _encode_many(self, strings: List[str], num_threads: int, count_only: bool) -> list:
+        if num_threads is None:
+            num_threads = self._batch_threads
+        strings = ["" if string is None else string for string in strings]
+        encoding = self.encoding
+        results = [None] * len(strings)
+        huge = [i for i, string in enumerate(strings) if len(string) >= self._process_min_chars]
+        if huge and num_threads > 1:
+            self._encode_in_processes(strings, huge, results, num_threads, count_only)
+        rest = [i for i, result in enumerate(results) if result is None]
+        texts = [strings[i] for i in rest]
+        if num_threads > 1 and len(texts) > 1 and sum(map(len, texts)) >= self._batch_min_chars:
+            tokens = self._encode_in_threads(encoding, texts, num_threads)
+        else:
+            tokens = [encoding.encode_ordinary(text) for text in texts]
+        for i, elem in zip(rest, tokens):
+            results[i] = len(elem) if count_only else elem
+        return results
+
+    @staticmethod
+    def _encode_in_threads(encoding: tiktoken.Encoding, texts: List[str], num_threads: int) -> List[List[int]]:
+        # Encodes texts in threads by contiguous groups (one task per thread instead of one per text,
+        # as in 'tiktoken.Encoding.encode_ordinary_batch', to avoid scheduling overhead on many short messages).
+        step = math.ceil(len(texts) / num_threads)
+        groups = [texts[i:i+step] for i in range(0, len(texts), step)]
+        with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+            results = executor.map(lambda group: [encoding.encode_ordinary(text) for text in group], groups)
+            return [tokens for group_tokens in results for tokens in group_tokens]
+
+    def _encode_in_processes(self, strings: List[str], indices: List[int], results: list, num_threads: int, count_only: bool) -> None:
+        # Encodes huge documents by parts in worker processes and puts them into 'results'.
+        encoding_name = self.encoding_name
+        with ProcessPoolExecutor(max_workers=num_threads) as executor:
+            futures = {
+                i: [executor.submit(_encode_part, encoding_name, part, count_only) for part in split_text(strings[i], self._process_part_chars)]
+                for i in indices}
+            for i, parts in futures.items():
+                if count_only:
+                    results[i] = sum(future.result() for future in parts)
+                else:
+                    results[i] = [token for future in parts for token in future.result()]
+        return
\ No newline at end of file
@@ -0,0 +1,258 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import Iterable, List
+import argparse
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+
+import requests
+
+from ..containers import RDict
+
+
+# tiktoken BPE files with their SHA-256 checksums (the same, as tiktoken itself expects).
+_asset_base_url = "https://openaipublic.blob.core.windows.net/encodings"
+_assets = RDict({
+    "r50k_base": RDict({
+        "file": "r50k_base.tiktoken",
+        "sha256": "306cd27f03c1a714eca7108e03d66b7dc042abe8c258b44c199a7ed9838dd930",
+    }),
+    "p50k_base": RDict({
+        "file": "p50k_base.tiktoken",
+        "sha256": "94b5ca7dff4d00767bc256fdd1b27e5b17361d7b8a5f968547f9f23eb70d2069",
+    }),
+    "p50k_edit": RDict({
+        "file": "p50k_base.tiktoken",
+        "sha256": "94b5ca7dff4d00767bc256fdd1b27e5b17361d7b8a5f968547f9f23eb70d2069",
+    }),
+    "cl100k_base": RDict({
+        "file": "cl100k_base.tiktoken",
+        "sha256": "223921b76ee99bde995b7ff738513eef100fb51d18c93597a113bcffe865b2a7",
+    }),
+    "o200k_base": RDict({
+        "file": "o200k_base.tiktoken",
+        "sha256": "446a9538cb6c348e3516120d7c08b09f57c36495e2acfffe59a5bf8b0cfb1a2d",
+    }),
+})
+
+# Encodings, used by the models, which RAI supports out of the box.
+_default_encodings = ["cl100k_base"]
+
+_default_cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "RAI", "tiktoken")
+
+# Names of encodings, which files were already verified in this process.
+_verified = set()
+_verified_lock = threading.Lock()
+
+
+def get_cache_dir() -> str:
+    """
+    Returns directory, in which RAI stages BPE files:
+    TIKTOKEN_CACHE_DIR environment variable, if it is set, or RAI default directory ('~/.cache/RAI/tiktoken').
+    """
+    return os.environ.get("TIKTOKEN_CACHE_DIR") or _default_cache_dir
+
+
+def get_tiktoken_cache_dir() -> str:
+    """
+    Returns directory, from which tiktoken itself loads cached BPE files (the same lookup, as tiktoken does):
+    TIKTOKEN_CACHE_DIR, DATA_GYM_CACHE_DIR or 'data-gym-cache' in the system temporary directory.
+    Empty string means, that tiktoken caching is disabled.
+    """
+    if "TIKTOKEN_CACHE_DIR" in os.environ:
+        return os.environ["TIKTOKEN_CACHE_DIR"]
+    if "DATA_GYM_CACHE_DIR" in os.environ:
+        return os.environ["DATA_GYM_CACHE_DIR"]
+    return os.path.join(tempfile.gettempdir(), "data-gym-cache")
+
+
+def is_offline() -> bool:
+    """
+    Checks, whether network access is disabled with RAI_OFFLINE environment variable.
+    """
+    return os.environ.get("RAI_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+def get_asset_url(name: str) -> str:
+    """
+    Returns URL of BPE file of the encoding.
+    """
+    return f"{_asset_base_url}/{_assets[name].file}"
+
+
+def get_asset_path(name: str, cache_dir: str=None) -> str:
+    """
+    Returns path to BPE file of the encoding in the cache directory.
+    Files are named the same way, as tiktoken names them (SHA-1 of the URL), so that tiktoken loads them without network.
+    """
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    return os.path.join(cache_dir, hashlib.sha1(get_asset_url(name).encode()).hexdigest())
+
+
+def sha256_file(path: str) -> str:
+    """
+    Returns SHA-256 checksum of the file.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 ** 2), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def verify(name: str, cache_dir: str=None) -> bool:
+    """
+    Checks, whether BPE file of the encoding is staged and has correct checksum.
+    """
+    path = get_asset_path(name, cache_dir)
+    return os.path.exists(path) and sha256_file(path) == _assets[name].sha256
+
+
+def stage(names: Iterable[str]=None, cache_dir: str=None, source: str=None) -> List[str]:
+    """
+    Puts BPE files of the encodings into the cache directory, verifying their checksums.
+    Already staged files with correct checksums are skipped.
+    Args:
+        names [Iterable[str]]: Names of encodings. Default: None (encodings of supported models).
+        cache_dir [str]: Target directory. Default: None (see 'get_cache_dir').
+        source [str]: Local directory with '<encoding>.tiktoken' files (i.e. for air-gapped hosts).
+            If None is passed, files are downloaded from OpenAI public storage. Default: None.
+    Returns:
+        paths [List[str]]: Paths to staged files.
+    Raises:
+        ValueError: If the file has wrong checksum.
+    """
+    if names is None:
+        names = _default_encodings
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    paths = []
+    for name in names:
+        if name not in _assets:
+            raise ValueError(f"Unknown encoding: {name}. Available: {list(_assets)}.")
+        path = get_asset_path(name, cache_dir)
+        paths.append(path)
+        if verify(name, cache_dir):
+            continue
+        if source is not None:
+            with open(os.path.join(source, _assets[name].file), "rb") as file:
+                data = file.read()
+        else:
+            r = requests.get(get_asset_url(name), timeout=(10, 60))
+            r.raise_for_status()
+            data = r.content
+        checksum = hashlib.sha256(data).hexdigest()
+        if checksum != _assets[name].sha256:
+            raise ValueError(f"Checksum mismatch for encoding {name}: expected {_assets[name].sha256}, got {checksum}.")
+        # Write atomically, so that concurrent workers never read a partial file.
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+    return paths
+
+
+def prepare(name: str) -> None:
+    """
+    Prepares loading of the encoding by tiktoken without network.
+    Is called by 'EncodingRegistry' before the encoding is loaded.
+    If tiktoken's own cache (see 'get_tiktoken_cache_dir') has no BPE file of the encoding, while RAI cache directory has,
+    the staged file is verified (once per process) and copied into tiktoken's cache.
+    File, which is already in tiktoken's cache, is verified as well (tiktoken itself does not check cached files):
+    if it is corrupted, it is replaced with the staged one or ValueError is raised, if the file is not staged.
+    The environment is not modified, so that other users of tiktoken in the process are not affected.
+    If the file is not staged and RAI_OFFLINE is set, raises FileNotFoundError instead of going to the network.
+    """
+    if name not in _assets or name in _verified:
+        return
+    with _verified_lock:
+        if name in _verified:
+            return
+        path = get_asset_path(name)
+        tiktoken_dir = get_tiktoken_cache_dir()
+        target = get_asset_path(name, tiktoken_dir) if tiktoken_dir else None
+        corrupted = None
+        if target is not None and target != path and os.path.exists(target):
+            checksum = sha256_file(target)
+            if checksum == _assets[name].sha256:
+                _verified.add(name)
+                return
+            corrupted = (
+                f"Cached BPE file of encoding {name} ({target}) is corrupted: "
+                f"expected checksum {_assets[name].sha256}, got {checksum}.")
+            if not os.path.exists(path):
+                raise ValueError(f"{corrupted} Remove it or stage the encoding in {get_cache_dir()}.")
+        if not os.path.exists(path):
+            if is_offline():
+                raise FileNotFoundError(
+                    f"BPE file of encoding {name} is not staged in {get_cache_dir()}, while RAI_OFFLINE is set. "
+                    f"Stage it with: python -m RAI.actors.tokenizer_assets stage --encodings {name}")
+            return
+        checksum = sha256_file(path)
+        if checksum != _assets[name].sha256:
+            raise ValueError(
+                f"Staged BPE file of encoding {name} ({path}) is corrupted: expected checksum {_assets[name].sha256}, got {checksum}. "
+                f"Remove it and stage again.")
+        if target is not None and target != path:
+            copy_asset(path, target)
+            if corrupted is not None and sha256_file(target) != _assets[name].sha256:
+                raise ValueError(f"{corrupted} Failed to replace it with the staged file {path}.")
+        _verified.add(name)
+    return
+
+
+def copy_asset(path: str, target: str) -> None:
+    """
+    Atomically puts staged BPE file into tiktoken's cache (as a hard link, if possible).
+    Write errors are ignored, as tiktoken ignores them for its default cache directory
+    (tiktoken then loads the file from the network, unless RAI_OFFLINE is set).
+    """
+    tmp_path = f"{target}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.link(path, tmp_path)
+        except OSError:
+            shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, target)
+    except OSError as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if is_offline():
+            raise FileNotFoundError(f"Failed to copy staged BPE file {path} into tiktoken cache {target}: {e}") from e
+    return
+
+
+def main(argv: list=None) -> None:
+    """
+    Stages or verifies tiktoken BPE files from command line.
+    """
+    parser = argparse.ArgumentParser(description="Stage tiktoken BPE files for offline usage of RAI.")
+    parser.add_argument("command", choices=["stage", "verify"])
+    parser.add_argument("--encodings", nargs="+", default=_default_encodings, help=f"Available: {list(_assets)}.")
+    parser.add_argument("--cache-dir", default=None, help="Target directory. Default: TIKTOKEN_CACHE_DIR or ~/.cache/RAI/tiktoken.")
+    parser.add_argument("--source", default=None, help="Local directory with <encoding>.tiktoken files instead of downloading.")
+    args = parser.parse_args(argv)
+    cache_dir = get_cache_dir() if args.cache_dir is None else args.cache_dir
+    if args.command == "stage":
+        for name, path in zip(args.encodings, stage(args.encodings, cache_dir, args.source)):
+            print(f"{name}: {path}")
+        print(f"Set TIKTOKEN_CACHE_DIR={cache_dir} in workers, if it differs from the default one.")
+        return
+    failed = [name for name in args.encodings if not verify(name, cache_dir)]
+    for name in args.encodings:
+        print(f"{name}: {'FAILED' if name in failed else 'OK'}")
+    if failed:
+        raise SystemExit(1)
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from .async_client import AsyncOpenAIClient, configure_async_client, get_async_client
+from .cache import CompletionCache, configure_cache, disable_cache, get_cache
+from .client import OpenAIClient, configure_client, get_client
+from .errors import APIConnectionError, APIError, APITimeoutError, OpenAIError, ParseError
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .retry import RetryPolicy
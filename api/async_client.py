@@ -0,0 +1,268 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import AsyncIterator, Tuple, Union
+import asyncio
+import logging
+import os
+import threading
+
+import aiohttp
+
+from .client import OpenAIClient
+from .errors import APIConnectionError, APITimeoutError, make_api_error
+from .streaming import aiter_sse_chunks
+from ..containers import RDict, loads_rdict
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncOpenAIClient:
+    """
+    RAI non-blocking HTTP client for OpenAI API, built on top of aiohttp.
+    Keeps a pool of keep-alive connections, so that a single event loop
+    can drive lots of concurrent requests over a limited number of connections.
+    Usually you don't need to create instances of this class manually:
+    use 'get_async_client' to obtain process-wide shared instance
+    and 'configure_async_client' to change its parameters.
+    NOTE: Call 'await get_async_client().close()' before the event loop is closed
+    to release pooled connections gracefully, or use the client as an async context manager:
+        async with get_async_client() as client:
+            ...
+    """
+
+    _defaults = RDict({
+        "base_url": OpenAIClient._defaults.base_url,
+        "limit": 100,
+        "limit_per_host": 0,
+        "connect_timeout": OpenAIClient._defaults.connect_timeout,
+        "read_timeout": OpenAIClient._defaults.read_timeout,
+        "lazy": OpenAIClient._defaults.lazy,
+    })
+
+    _chat_completions_path = OpenAIClient._chat_completions_path
+
+    def __init__(
+        self,
+        base_url: str=None,
+        *,
+        limit: int=None,
+        limit_per_host: int=None,
+        connect_timeout: float=None,
+        read_timeout: float=None,
+        lazy: bool=None) -> None:
+        """
+        Initializes client instance.
+        Args:
+            base_url [str]: Base URL of OpenAI API. If None is passed, uses OPENAI_BASE_URL environment variable
+                or default OpenAI URL, if the variable is not set. Default: None.
+        Kwargs:
+            limit [int]: Maximum number of simultaneously opened connections. Default: None (100).
+            limit_per_host [int]: Maximum number of simultaneously opened connections per host. 0 means no limit. Default: None (0).
+            connect_timeout [float]: Timeout in seconds for establishing connection. Default: None (10).
+            read_timeout [float]: Timeout in seconds for reading a response. Default: None (600).
+            lazy [bool]: Whether to decode completions into lazy views (LazyRDict),
+                which convert nested objects only when they are accessed. Default: None (False).
+        """
+        if base_url is None:
+            base_url = os.environ.get("OPENAI_BASE_URL", self._defaults.base_url)
+        self.base_url = base_url.rstrip("/")
+        self.limit = self._defaults.limit if limit is None else limit
+        self.limit_per_host = self._defaults.limit_per_host if limit_per_host is None else limit_per_host
+        self.connect_timeout = self._defaults.connect_timeout if connect_timeout is None else connect_timeout
+        self.read_timeout = self._defaults.read_timeout if read_timeout is None else read_timeout
+        self.lazy = self._defaults.lazy if lazy is None else lazy
+        # aiohttp session is bound to the event loop, in which it was created.
+        # So sessions are kept per loop, and sessions of closed loops are dropped (see 'release_sessions').
+        self._sessions = {}
+        return
+
+    @property
+    def timeout(self) -> aiohttp.ClientTimeout:
+        """
+        Returns default client timeout.
+        """
+        return aiohttp.ClientTimeout(total=None, connect=self.connect_timeout, sock_read=self.read_timeout)
+
+    @staticmethod
+    def make_timeout(timeout: Union[float, Tuple[float, float]]) -> aiohttp.ClientTimeout:
+        """
+        Converts either total timeout or (connect, read) pair into aiohttp.ClientTimeout.
+        """
+        if isinstance(timeout, (tuple, list)):
+            connect, read = timeout
+            return aiohttp.ClientTimeout(total=None, connect=connect, sock_read=read)
+        return aiohttp.ClientTimeout(total=timeout)
+
+    def url(self, path: str, base_url: str=None) -> str:
+        """
+        Returns full URL for API path.
+        If 'base_url' is passed, it is used instead of client's one.
+        """
+        if base_url is None:
+            base_url = self.base_url
+        return f"{base_url.rstrip('/')}{path}"
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """
+        Returns aiohttp session for the running event loop. Creates it, if required.
+        """
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            await self.release_sessions()
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={"Connection": "keep-alive"})
+            self._sessions[loop] = session
+        return session
+
+    async def release_sessions(self) -> None:
+        """
+        Drops sessions of closed event loops (i.e. of previous 'asyncio.run' calls).
+        Closed loop can't close their connections anymore, so a warning is logged for sessions,
+        which were not closed with 'close' (their sockets are closed, once they are garbage collected).
+        """
+        for loop, session in list(self._sessions.items()):
+            if not loop.is_closed():
+                continue
+            del self._sessions[loop]
+            if not session.closed:
+                logger.warning(
+                    "aiohttp session of a closed event loop was not closed. "
+                    "Call 'await client.close()' before the event loop is closed.")
+        return
+
+    async def post(
+        self,
+        path: str,
+        json_data: dict,
+        *,
+        api_key: str=None,
+        base_url: str=None,
+        timeout: Union[float, Tuple[float, float]]=None) -> aiohttp.ClientResponse:
+        """
+        Sends POST request to OpenAI API using pooled session.
+        The response must be released by the caller (i.e. via 'async with').
+        Args:
+            path [str]: API path, relative to 'base_url' (i.e. "/chat/completions").
+            json_data [dict]: Request body.
+        Kwargs:
+            api_key [str]: OpenAI API key. Default: None.
+            base_url [str]: Base URL to send the request to. If None is passed, uses client's 'base_url'. Default: None.
+            timeout [Union[float, tuple]]: Either total timeout or (connect, read) pair.
+                If None is passed, uses client timeouts. Default: None.
+        Returns:
+            aiohttp.ClientResponse
+        Raises:
+            APIError: If API responded with an error status code.
+            APIConnectionError: If the response was not received.
+        """
+        session = await self.get_session()
+        headers = {"Authorization": f"Bearer {api_key}"}
+        kwargs = {} if timeout is None else {"timeout": self.make_timeout(timeout)}
+        try:
+            r = await session.post(self.url(path, base_url), headers=headers, json=json_data, **kwargs)
+        except asyncio.TimeoutError as e:
+            raise APITimeoutError(str(e)) from e
+        except aiohttp.ClientError as e:
+            raise APIConnectionError(str(e)) from e
+        if r.status >= 400:
+            async with r:
+                raise make_api_error(r.status, r.headers, await r.text())
+        return r
+
+    async def chat_completion(self, **kwargs) -> RDict:
+        """
+        Sends request to chat completions endpoint and returns JSON response, decoded into RDict (see 'RAI.containers.loads_rdict').
+        'api_key', 'base_url' and 'timeout' kwargs are used for the request itself and are not sent in the request body.
+        """
+        api_key = kwargs.pop("api_key", None)
+        timeout = kwargs.pop("timeout", None)
+        base_url = kwargs.pop("base_url", None)
+        kwargs["stream"] = False
+        async with await self.post(self._chat_completions_path, kwargs, api_key=api_key, base_url=base_url, timeout=timeout) as r:
+            try:
+                return loads_rdict(await r.read(), lazy=self.lazy)
+            except asyncio.TimeoutError as e:
+                raise APITimeoutError(str(e)) from e
+            except aiohttp.ClientError as e:
+                raise APIConnectionError(str(e)) from e
+
+    async def stream_chat_completion(self, **kwargs) -> AsyncIterator[dict]:
+        """
+        Sends streaming request to chat completions endpoint
+        and returns an async iterator, which yields completion chunks, as soon as they arrive.
+        The request itself is sent eagerly, so that API errors are raised by this coroutine,
+        while the errors in the middle of the stream are raised by the iterator.
+        Special kwargs are the same, as in 'chat_completion'.
+        """
+        api_key = kwargs.pop("api_key", None)
+        timeout = kwargs.pop("timeout", None)
+        base_url = kwargs.pop("base_url", None)
+        kwargs["stream"] = True
+        r = await self.post(self._chat_completions_path, kwargs, api_key=api_key, base_url=base_url, timeout=timeout)
+        return self.iter_chunks(r)
+
+    @staticmethod
+    async def iter_chunks(r: aiohttp.ClientResponse) -> AsyncIterator[dict]:
+        """
+        Yields completion chunks from streaming response and releases the connection afterwards.
+        """
+        async with r:
+            try:
+                async for chunk in aiter_sse_chunks(r.content):
+                    yield chunk
+            except asyncio.TimeoutError as e:
+                raise APITimeoutError(str(e)) from e
+            except aiohttp.ClientError as e:
+                raise APIConnectionError(str(e)) from e
+
+    async def close(self) -> None:
+        """
+        Closes pooled connections of the running event loop and releases sessions of closed loops.
+        Sessions of other running loops (i.e. in other threads) must be closed from their loops.
+        """
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+        await self.release_sessions()
+        return
+
+    async def __aenter__(self) -> "AsyncOpenAIClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+        return
+
+
+_async_client = None
+_async_client_lock = threading.Lock()
+
+
+def get_async_client() -> AsyncOpenAIClient:
+    """
+    Returns process-wide AsyncOpenAIClient instance. Creates it on first call.
+    """
+    global _async_client
+    if _async_client is None:
+        with _async_client_lock:
+            if _async_client is None:
+                _async_client = AsyncOpenAIClient()
+    return _async_client
+
+
+def configure_async_client(**kwargs) -> AsyncOpenAIClient:
+    """
+    Replaces process-wide AsyncOpenAIClient instance with a new one, created with given kwargs.
+    Returns:
+        AsyncOpenAIClient
+    """
+    global _async_client
+    with _async_client_lock:
+        _async_client = AsyncOpenAIClient(**kwargs)
+    return _async_client
@@ -0,0 +1,236 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import Union
+from collections import OrderedDict
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import orjson
+
+from ..containers import RDict, loads_rdict
+
+
+class CompletionCache:
+    """
+    RAI cache for OpenAI API completions.
+    Completions are keyed by the hash of canonicalized request body (model, messages and all other parameters)
+    and are stored in memory (LRU) and, optionally, on disk (SQLite database).
+    By default only deterministic requests (temperature == 0 and a single choice) are cached.
+    Usually you don't need to create instances of this class manually:
+    use 'configure_cache' to enable process-wide cache and 'get_cache' to obtain it.
+    Example:
+        cache = configure_cache("cache/completions.sqlite", ttl=24*3600)
+        ...
+        print(cache.stats)
+    """
+
+    _defaults = RDict({
+        "max_entries": 1024,
+        "max_disk_entries": 100000,
+        "ttl": None,
+        "only_deterministic": True,
+    })
+
+    # Request kwargs, which do not affect the completion.
+    _ignored_keys = {"api_key", "timeout", "stream", "cache"}
+
+    def __init__(
+        self,
+        path: str=None,
+        *,
+        max_entries: int=None,
+        max_disk_entries: int=None,
+        ttl: float=None,
+        only_deterministic: bool=None) -> None:
+        """
+        Initializes cache.
+        Args:
+            path [str]: Path to SQLite database file. If None is passed, cache is kept only in memory. Default: None.
+        Kwargs:
+            max_entries [int]: Maximum number of completions in memory. Default: None (1024).
+            max_disk_entries [int]: Maximum number of completions on disk. Default: None (100000).
+            ttl [float]: Time-to-live of completions in seconds. None means no expiration. Default: None.
+            only_deterministic [bool]: Whether to cache only requests with temperature == 0 and n == 1. Default: None (True).
+        """
+        self.path = path
+        self.max_entries = self._defaults.max_entries if max_entries is None else max_entries
+        self.max_disk_entries = self._defaults.max_disk_entries if max_disk_entries is None else max_disk_entries
+        self.ttl = self._defaults.ttl if ttl is None else ttl
+        self.only_deterministic = self._defaults.only_deterministic if only_deterministic is None else only_deterministic
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None if path is None else self.connect(path)
+        return
+
+    @staticmethod
+    def connect(path: str) -> sqlite3.Connection:
+        """
+        Opens SQLite database and creates completions table, if required.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS completions "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)")
+        db.execute("CREATE INDEX IF NOT EXISTS completions_accessed ON completions (accessed)")
+        return db
+
+    def make_key(self, request: dict) -> str:
+        """
+        Returns the hash of canonicalized request body.
+        """
+        body = {key: value for key, value in request.items() if key not in self._ignored_keys}
+        data = orjson.dumps(body, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(data).hexdigest()
+
+    def is_cacheable(self, request: dict) -> bool:
+        """
+        Checks, whether the completion for the request can be cached.
+        """
+        if not self.only_deterministic:
+            return True
+        return request.get("temperature") == 0 and request.get("n", 1) in (None, 1)
+
+    def is_expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def get(self, key: str) -> Union[dict, None]:
+        """
+        Returns cached completion (as RDict) for the key or None, if there is no valid completion.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if not self.is_expired(created, now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return loads_rdict(value)
+                del self._memory[key]
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created FROM completions WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value, created = row
+                    if not self.is_expired(created, now):
+                        self._db.execute("UPDATE completions SET accessed = ? WHERE key = ?", (now, key))
+                        self._remember(key, created, value)
+                        self.hits += 1
+                        return loads_rdict(value)
+                    self._db.execute("DELETE FROM completions WHERE key = ?", (key,))
+            self.misses += 1
+        return None
+
+    def set(self, key: str, completion: dict) -> None:
+        """
+        Stores completion in the cache.
+        """
+        now = time.time()
+        value = orjson.dumps(completion)
+        with self._lock:
+            self._remember(key, now, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO completions (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now))
+                self._evict_disk()
+        return
+
+    def _remember(self, key: str, created: float, value: bytes) -> None:
+        # Puts the entry into memory and evicts least recently used entries.
+        # Must be called under the lock.
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+        return
+
+    def _evict_disk(self) -> None:
+        # Removes expired and least recently used entries from disk.
+        # Must be called under the lock.
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM completions WHERE created < ?", (time.time() - self.ttl,))
+        (size,) = self._db.execute("SELECT COUNT(*) FROM completions").fetchone()
+        if size > self.max_disk_entries:
+            self._db.execute(
+                "DELETE FROM completions WHERE key IN "
+                "(SELECT key FROM completions ORDER BY accessed LIMIT ?)",
+                (size - self.max_disk_entries,))
+        return
+
+    def clear(self) -> None:
+        """
+        Removes all completions both from memory and disk and resets counters.
+        """
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM completions")
+            self.hits = 0
+            self.misses = 0
+        return
+
+    @property
+    def stats(self) -> RDict:
+        """
+        Returns cache statistics: hits, misses, hit rate and number of completions in memory.
+        """
+        total = self.hits + self.misses
+        return RDict({
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_entries": len(self._memory),
+        })
+
+    def close(self) -> None:
+        """
+        Closes the database connection.
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+        return
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Union[CompletionCache, None]:
+    """
+    Returns process-wide CompletionCache instance or None, if caching is disabled (default).
+    """
+    return _cache
+
+
+def configure_cache(path: str=None, **kwargs) -> CompletionCache:
+    """
+    Enables process-wide completion cache, created with given parameters.
+    Returns:
+        CompletionCache
+    """
+    global _cache
+    with _cache_lock:
+        _cache = CompletionCache(path, **kwargs)
+    return _cache
+
+
+def disable_cache() -> None:
+    """
+    Disables process-wide completion cache.
+    """
+    global _cache
+    with _cache_lock:
+        _cache = None
+    return
@@ -0,0 +1,210 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import Iterator, Tuple, Union
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .errors import APIConnectionError, APITimeoutError, make_api_error
+from .streaming import iter_sse_chunks
+from ..containers import RDict, loads_rdict
+
+
+class OpenAIClient:
+    """
+    RAI HTTP client for OpenAI API.
+    Keeps a pool of keep-alive connections, so that consequent requests
+    reuse already established TCP+TLS connections instead of opening new ones.
+    Usually you don't need to create instances of this class manually:
+    use 'get_client' to obtain process-wide shared instance
+    and 'configure_client' to change its parameters.
+    """
+
+    _defaults = RDict({
+        "base_url": "https://api.openai.com/v1",
+        "pool_connections": 4,
+        "pool_maxsize": 16,
+        "connect_timeout": 10,
+        "read_timeout": 600,
+        "lazy": False,
+    })
+
+    _chat_completions_path = "/chat/completions"
+
+    def __init__(
+        self,
+        base_url: str=None,
+        *,
+        pool_connections: int=None,
+        pool_maxsize: int=None,
+        connect_timeout: float=None,
+        read_timeout: float=None,
+        lazy: bool=None) -> None:
+        """
+        Initializes client instance.
+        Args:
+            base_url [str]: Base URL of OpenAI API. If None is passed, uses OPENAI_BASE_URL environment variable
+                or default OpenAI URL, if the variable is not set. Default: None.
+        Kwargs:
+            pool_connections [int]: Number of connection pools (one per host) to cache. Default: None (4).
+            pool_maxsize [int]: Maximum number of keep-alive connections per host. Default: None (16).
+            connect_timeout [float]: Timeout in seconds for establishing connection. Default: None (10).
+            read_timeout [float]: Timeout in seconds for reading a response. Default: None (600).
+            lazy [bool]: Whether to decode completions into lazy views (LazyRDict),
+                which convert nested objects only when they are accessed. Default: None (False).
+        """
+        if base_url is None:
+            base_url = os.environ.get("OPENAI_BASE_URL", self._defaults.base_url)
+        self.base_url = base_url.rstrip("/")
+        self.pool_connections = self._defaults.pool_connections if pool_connections is None else pool_connections
+        self.pool_maxsize = self._defaults.pool_maxsize if pool_maxsize is None else pool_maxsize
+        self.connect_timeout = self._defaults.connect_timeout if connect_timeout is None else connect_timeout
+        self.read_timeout = self._defaults.read_timeout if read_timeout is None else read_timeout
+        self.lazy = self._defaults.lazy if lazy is None else lazy
+        self.session = self.make_session()
+        return
+
+    def make_session(self) -> requests.Session:
+        """
+        Creates 'requests.Session' with pooled keep-alive connections.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Connection": "keep-alive"})
+        return session
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """
+        Returns default (connect, read) timeout pair.
+        """
+        return (self.connect_timeout, self.read_timeout)
+
+    def url(self, path: str, base_url: str=None) -> str:
+        """
+        Returns full URL for API path.
+        If 'base_url' is passed, it is used instead of client's one.
+        """
+        if base_url is None:
+            base_url = self.base_url
+        return f"{base_url.rstrip('/')}{path}"
+
+    def post(
+        self,
+        path: str,
+        json_data: dict,
+        *,
+        api_key: str=None,
+        base_url: str=None,
+        timeout: Union[float, Tuple[float, float]]=None,
+        stream: bool=False) -> requests.Response:
+        """
+        Sends POST request to OpenAI API using pooled session.
+        Args:
+            path [str]: API path, relative to 'base_url' (i.e. "/chat/completions").
+            json_data [dict]: Request body.
+        Kwargs:
+            api_key [str]: OpenAI API key. Default: None.
+            base_url [str]: Base URL to send the request to. If None is passed, uses client's 'base_url'. Default: None.
+            timeout [Union[float, tuple]]: Either total timeout or (connect, read) pair.
+                If None is passed, uses client timeouts. Default: None.
+            stream [bool]: Whether to keep the response body unread for streaming. Default: False.
+        Returns:
+            requests.Response
+        Raises:
+            APIError: If API responded with an error status code.
+            APIConnectionError: If the response was not received.
+        """
+        headers = {"Authorization": f"Bearer {api_key}"}
+        if timeout is None:
+            timeout = self.timeout
+        try:
+            r = self.session.post(self.url(path, base_url), headers=headers, json=json_data, timeout=timeout, stream=stream)
+        except requests.exceptions.Timeout as e:
+            raise APITimeoutError(str(e)) from e
+        except requests.exceptions.ConnectionError as e:
+            raise APIConnectionError(str(e)) from e
+        if r.status_code >= 400:
+            with r:
+                raise make_api_error(r.status_code, r.headers, r.text)
+        return r
+
+    def chat_completion(self, **kwargs) -> RDict:
+        """
+        Sends request to chat completions endpoint and returns JSON response, decoded into RDict (see 'RAI.containers.loads_rdict').
+        'api_key', 'base_url' and 'timeout' kwargs are used for the request itself and are not sent in the request body.
+        """
+        api_key = kwargs.pop("api_key", None)
+        timeout = kwargs.pop("timeout", None)
+        base_url = kwargs.pop("base_url", None)
+        kwargs["stream"] = False
+        r = self.post(self._chat_completions_path, kwargs, api_key=api_key, base_url=base_url, timeout=timeout)
+        return loads_rdict(r.content, lazy=self.lazy)
+
+    def stream_chat_completion(self, **kwargs) -> Iterator[dict]:
+        """
+        Sends streaming request to chat completions endpoint
+        and returns an iterator, which yields completion chunks, as soon as they arrive.
+        The request itself is sent eagerly, so that API errors are raised by this method,
+        while the errors in the middle of the stream are raised by the iterator.
+        Special kwargs are the same, as in 'chat_completion'.
+        """
+        api_key = kwargs.pop("api_key", None)
+        timeout = kwargs.pop("timeout", None)
+        base_url = kwargs.pop("base_url", None)
+        kwargs["stream"] = True
+        r = self.post(self._chat_completions_path, kwargs, api_key=api_key, base_url=base_url, timeout=timeout, stream=True)
+        return self.iter_chunks(r)
+
+    @staticmethod
+    def iter_chunks(r: requests.Response) -> Iterator[dict]:
+        """
+        Yields completion chunks from streaming response and releases the connection afterwards.
+        """
+        with r:
+            try:
+                yield from iter_sse_chunks(r.iter_lines(chunk_size=None))
+            except requests.exceptions.RequestException as e:
+                raise APIConnectionError(str(e)) from e
+
+    def close(self) -> None:
+        """
+        Closes all pooled connections.
+        """
+        self.session.close()
+        return
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> OpenAIClient:
+    """
+    Returns process-wide OpenAIClient instance. Creates it on first call.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenAIClient()
+    return _client
+
+
+def configure_client(**kwargs) -> OpenAIClient:
+    """
+    Replaces process-wide OpenAIClient instance with a new one, created with given kwargs.
+    Connections of the previous client are not closed explicitly,
+    so that requests, which are currently in progress, are not affected.
+    Returns:
+        OpenAIClient
+    """
+    global _client
+    with _client_lock:
+        _client = OpenAIClient(**kwargs)
+    return _client
@@ -0,0 +1,95 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import Mapping, Union
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import json
+
+
+class OpenAIError(Exception):
+    """
+    Base class for all errors, raised while communicating with OpenAI API.
+    """
+    pass
+
+
+class APIError(OpenAIError):
+    """
+    OpenAI API responded with an error status code.
+    """
+
+    def __init__(self, message: str, status: int=None, retry_after: float=None, body: str=None) -> None:
+        """
+        Args:
+            message [str]: Error message.
+            status [int]: HTTP status code of the response. Default: None.
+            retry_after [float]: Number of seconds to wait before the next request,
+                if the server provided it in 'Retry-After' header. Default: None.
+            body [str]: Raw response body. Default: None.
+        """
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.body = body
+        return
+
+
+class APIConnectionError(OpenAIError):
+    """
+    Request to OpenAI API failed before a response was received.
+    """
+    pass
+
+
+class APITimeoutError(APIConnectionError):
+    """
+    Request to OpenAI API timed out.
+    """
+    pass
+
+
+class ParseError(ValueError):
+    """
+    OpenAI API answer can not be converted into the requested type.
+    """
+    pass
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Union[float, None]:
+    """
+    Parses 'Retry-After' (either seconds or HTTP-date) or 'Retry-After-Ms' header.
+    Returns number of seconds to wait or None, if there is no valid header.
+    """
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return max(float(value) / 1000, 0.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def make_api_error(status: int, headers: Mapping[str, str], body: str) -> APIError:
+    """
+    Creates APIError from error response data.
+    """
+    message = body
+    try:
+        message = json.loads(body)["error"]["message"]
+    except (ValueError, KeyError, TypeError):
+        pass
+    return APIError(f"[{status}]: {message}", status=status, retry_after=parse_retry_after(headers), body=body)
@@ -0,0 +1,216 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import Dict, Union
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket, which is refilled continuously with 'capacity' tokens per minute.
+    Consumption is allowed to put the bucket into debt: the caller is then told
+    how long to wait until the debt is paid off. Thus callers are served in the order
+    of their reservations (FIFO) without any background threads.
+    """
+
+    _period = 60.0
+
+    def __init__(self, capacity: float) -> None:
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        return
+
+    @property
+    def rate(self) -> float:
+        """
+        Returns refill rate in tokens per second.
+        """
+        return self.capacity / self._period
+
+    def refill(self, now: float) -> None:
+        """
+        Adds tokens, accumulated since the last update.
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return
+
+    def reserve(self, amount: float, now: float) -> float:
+        """
+        Consumes 'amount' tokens and returns number of seconds to wait before using them.
+        """
+        self.refill(now)
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def resize(self, capacity: float, now: float) -> None:
+        """
+        Changes capacity of the bucket, keeping its current level (clamped to the new capacity) and debt.
+        """
+        self.refill(now)
+        self.capacity = capacity
+        self.tokens = min(capacity, self.tokens)
+        return
+
+    def give_back(self, amount: float) -> None:
+        """
+        Returns tokens to the bucket (or takes them, if 'amount' is negative).
+        """
+        self.tokens = min(self.capacity, self.tokens + amount)
+        return
+
+
+class RateLimiter:
+    """
+    RAI client-side rate limiter for OpenAI API.
+    Keeps separate requests-per-minute (RPM) and tokens-per-minute (TPM) buckets for each model,
+    so that all actors in the process share the same quota and queue their requests
+    instead of failing with 429 errors.
+    Models without configured limits are not limited at all.
+    Usually you don't need to create instances of this class manually:
+    use 'get_rate_limiter' to obtain process-wide shared instance.
+    Example:
+        get_rate_limiter().set_limits("gpt-3.5-turbo", rpm=3500, tpm=90000)
+    """
+
+    def __init__(self, limits: Dict[str, dict]=None) -> None:
+        """
+        Initializes rate limiter.
+        Args:
+            limits [dict]: Mapping from model name to its limits: {"rpm": int, "tpm": int}. Default: None.
+        """
+        self._lock = threading.Lock()
+        self._rpm = {}
+        self._tpm = {}
+        self._blocked_until = {}
+        self._counters = {}
+        if limits is not None:
+            for model, model_limits in limits.items():
+                self.set_limits(model, **model_limits)
+        return
+
+    def set_limits(self, model: str, rpm: int=None, tpm: int=None) -> None:
+        """
+        Sets limits for the model. None means no limit.
+        Existing buckets are resized, so that tokens, which are already reserved, are not handed out again
+        (every ChatBot sets the limits from its configuration on initialization).
+        """
+        with self._lock:
+            now = time.monotonic()
+            for buckets, capacity in ((self._rpm, rpm), (self._tpm, tpm)):
+                if capacity is None:
+                    buckets.pop(model, None)
+                elif model in buckets:
+                    buckets[model].resize(capacity, now)
+                else:
+                    buckets[model] = TokenBucket(capacity)
+        return
+
+    def is_limited(self, model: str) -> bool:
+        """
+        Checks, whether there are any limits for the model.
+        """
+        return model in self._rpm or model in self._tpm or model in self._blocked_until
+
+    def estimate(self, model: str, messages: list, max_tokens: int=None, n: int=1, **kwargs) -> int:
+        """
+        Estimates the number of tokens, which the request will consume,
+        in the same way as OpenAI API does: prompt tokens plus 'max_tokens' for each choice.
+        Other request kwargs are ignored, so that the whole request body can be passed.
+        Returns 0, if there is no TPM limit for the model.
+        """
+        if model not in self._tpm:
+            return 0
+        # Import here to avoid circular imports, since actors depend on API layer.
+        from ..actors.token_counter import TokenCounter
+        counter = self._counters.get(model)
+        if counter is None:
+            counter = TokenCounter(model if model in TokenCounter._models else TokenCounter._models[0])
+            self._counters[model] = counter
+        return counter.run(messages) + (max_tokens or 0) * (n or 1)
+
+    def reserve(self, model: str, tokens: int=0) -> float:
+        """
+        Reserves one request and 'tokens' tokens for the model.
+        Returns number of seconds to wait before sending the request.
+        """
+        if not self.is_limited(model):
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            delay = max(self._blocked_until.get(model, now) - now, 0.0)
+            if delay == 0:
+                self._blocked_until.pop(model, None)
+            if model in self._rpm:
+                delay = max(delay, self._rpm[model].reserve(1, now))
+            if model in self._tpm:
+                delay = max(delay, self._tpm[model].reserve(tokens, now))
+        return delay
+
+    def acquire(self, model: str, tokens: int=0) -> float:
+        """
+        Blocks until the request can be sent without exceeding the limits.
+        Returns the time spent waiting.
+        """
+        delay = self.reserve(model, tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def aacquire(self, model: str, tokens: int=0) -> float:
+        """
+        Asynchronous counterpart of 'acquire'.
+        """
+        delay = self.reserve(model, tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def reconcile(self, model: str, estimated: int, usage: Union[dict, None]) -> None:
+        """
+        Corrects TPM bucket using actual 'usage' from API response.
+        """
+        if model not in self._tpm or not usage:
+            return
+        actual = usage.get("total_tokens")
+        if actual is None:
+            return
+        with self._lock:
+            bucket = self._tpm.get(model)
+            if bucket is not None:
+                bucket.give_back(estimated - actual)
+        return
+
+    def notify_error(self, model: str, exc: Exception) -> None:
+        """
+        Processes an error of the request to the model.
+        If API responded with 429 and provided 'Retry-After' header, blocks the model.
+        """
+        if getattr(exc, "status", None) == 429 and getattr(exc, "retry_after", None):
+            self.block(model, exc.retry_after)
+        return
+
+    def block(self, model: str, seconds: float) -> None:
+        """
+        Suspends all requests to the model for 'seconds' (i.e. after 429 response),
+        so that other callers wait instead of amplifying the overload.
+        """
+        with self._lock:
+            until = time.monotonic() + seconds
+            self._blocked_until[model] = max(self._blocked_until.get(model, until), until)
+        return
+
+
+_rate_limiter = RateLimiter()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Returns process-wide RateLimiter instance.
+    """
+    return _rate_limiter
@@ -0,0 +1,161 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import Any, Callable
+import asyncio
+import functools
+import inspect
+import logging
+import random
+import time
+
+from .errors import APIConnectionError, APIError, ParseError
+from ..containers import RDict
+
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+    """
+    RAI policy for retrying failed requests to OpenAI API.
+    Implements exponential backoff with jitter, respects 'Retry-After' header
+    and never retries fatal errors (i.e. invalid API key or bad request).
+    The number of attempts is limited by 'max_attempts' and (optionally) by 'deadline'.
+    Example:
+        policy = RetryPolicy(max_attempts=3, deadline=30)
+        json_data = policy.call(request_openai, messages=messages, **params)
+    """
+
+    _defaults = RDict({
+        "max_attempts": 5,
+        "base_delay": 1.0,
+        "max_delay": 60.0,
+        "multiplier": 2.0,
+        "jitter": 0.5,
+        "deadline": None,
+    })
+
+    # Request timeout, conflict, rate limit and server errors
+    _retryable_statuses = {408, 409, 429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        max_attempts: int=None,
+        *,
+        base_delay: float=None,
+        max_delay: float=None,
+        multiplier: float=None,
+        jitter: float=None,
+        deadline: float=None) -> None:
+        """
+        Initializes retry policy.
+        Args:
+            max_attempts [int]: Maximum number of attempts (including the first one). Default: None (5).
+        Kwargs:
+            base_delay [float]: Delay in seconds before the first retry. Default: None (1.0).
+            max_delay [float]: Maximum backoff delay in seconds. Default: None (60.0).
+            multiplier [float]: Backoff multiplier. Default: None (2.0).
+            jitter [float]: Fraction of the delay, which is randomized. Should be in [0, 1]. Default: None (0.5).
+            deadline [float]: Total time budget in seconds for all attempts. None means no deadline. Default: None.
+        """
+        self.max_attempts = self._defaults.max_attempts if max_attempts is None else max_attempts
+        self.base_delay = self._defaults.base_delay if base_delay is None else base_delay
+        self.max_delay = self._defaults.max_delay if max_delay is None else max_delay
+        self.multiplier = self._defaults.multiplier if multiplier is None else multiplier
+        self.jitter = self._defaults.jitter if jitter is None else jitter
+        self.deadline = deadline
+        if self.max_attempts < 1:
+            raise ValueError("Parameter 'max_attempts' must be positive.")
+        if not 0 <= self.jitter <= 1:
+            raise ValueError("Parameter 'jitter' must be in interval [0, 1].")
+        return
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        """
+        Classifies an exception as either retryable (True) or fatal (False).
+        Rate limit, server, connection and parsing errors are retryable.
+        Authentication, bad request and any other unexpected errors are fatal.
+        """
+        if isinstance(exc, APIError):
+            return exc.status in self._retryable_statuses or (exc.status is not None and exc.status >= 500)
+        return isinstance(exc, (APIConnectionError, ParseError))
+
+    def get_delay(self, attempt: int, exc: BaseException=None) -> float:
+        """
+        Returns delay in seconds before the next attempt.
+        Args:
+            attempt [int]: Number of the failed attempt (starting from 1).
+            exc [BaseException]: Exception, raised during the failed attempt. Default: None.
+        """
+        # Parsing errors are not caused by server overload, so there is no need to wait.
+        if isinstance(exc, ParseError):
+            return 0.0
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        delay = delay * (1 - self.jitter) + random.uniform(0, delay * self.jitter)
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def next_delay(self, attempt: int, exc: BaseException, start: float) -> float:
+        """
+        Returns delay before the next attempt or re-raises 'exc',
+        if it's fatal or the budget of attempts/time is exhausted.
+        """
+        if not self.is_retryable(exc) or attempt >= self.max_attempts:
+            raise exc
+        delay = self.get_delay(attempt, exc)
+        if self.deadline is not None and time.monotonic() - start + delay > self.deadline:
+            raise exc
+        logger.info(
+            "Attempt %d/%d failed with %s: %s. Retrying in %.2f seconds.",
+            attempt, self.max_attempts, type(exc).__name__, exc, delay)
+        return delay
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Calls 'func' with given args and kwargs, retrying it according to the policy.
+        """
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                delay = self.next_delay(attempt, e, start)
+            time.sleep(delay)
+
+    async def acall(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Asynchronous counterpart of 'call'. 'func' must be a coroutine function.
+        """
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                delay = self.next_delay(attempt, e, start)
+            await asyncio.sleep(delay)
+
+    def __call__(self, func: Callable) -> Callable:
+        """
+        Allows to use the policy as a decorator. Supports both regular and coroutine functions.
+        """
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await self.acall(func, *args, **kwargs)
+            return async_wrapper
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.call(func, *args, **kwargs)
+        return wrapper
+
+    def __repr__(self) -> str:
+        return (f"RetryPolicy(max_attempts={self.max_attempts}, base_delay={self.base_delay}, "
+                f"max_delay={self.max_delay}, multiplier={self.multiplier}, "
+                f"jitter={self.jitter}, deadline={self.deadline})")
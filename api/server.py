@@ -0,0 +1,702 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import Callable, Dict, Iterator, Union
+import argparse
+import asyncio
+import hashlib
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+
+from aiohttp import web
+import aiohttp
+import orjson
+
+from ..containers import RDict
+
+
+class LatencyModel:
+    """
+    RAI random latency distribution for LocalOpenAIServer.
+    Supported distributions: "constant", "uniform", "normal", "lognormal" and "exponential".
+    Negative samples are clipped to zero.
+    Example:
+        latency = LatencyModel("lognormal", mean=0.8, std=0.3, seed=0)
+        latency = LatencyModel.from_spec("uniform:0.2:1.0")
+    """
+
+    _distributions = ("constant", "uniform", "normal", "lognormal", "exponential")
+
+    def __init__(
+        self,
+        distribution: str="constant",
+        *,
+        mean: float=0.0,
+        std: float=0.0,
+        low: float=0.0,
+        high: float=0.0,
+        seed: int=None) -> None:
+        """
+        Initializes latency distribution.
+        Args:
+            distribution [str]: Name of the distribution. Default: "constant".
+        Kwargs:
+            mean [float]: Mean latency in seconds ("constant", "normal", "lognormal", "exponential"). Default: 0.0.
+            std [float]: Standard deviation of latency in seconds ("normal", "lognormal"). Default: 0.0.
+            low [float]: Lower bound of latency in seconds ("uniform"). Default: 0.0.
+            high [float]: Upper bound of latency in seconds ("uniform"). Default: 0.0.
+            seed [int]: Seed of random generator, which makes samples reproducible. Default: None.
+        """
+        if distribution not in self._distributions:
+            raise ValueError(f"Unknown latency distribution: {distribution}. Available: {self._distributions}.")
+        self.distribution = distribution
+        self.mean = mean
+        self.std = std
+        self.low = low
+        self.high = high
+        self.rng = random.Random(seed)
+        return
+
+    @classmethod
+    def from_spec(cls, spec: Union[float, str, dict, "LatencyModel"]=None, seed: int=None) -> "LatencyModel":
+        """
+        Creates LatencyModel from one of the following specifications:
+            None: no latency;
+            float: constant latency in seconds;
+            str: "<distribution>:<param1>[:<param2>]", i.e. "constant:0.5", "uniform:0.2:1.0",
+                "normal:<mean>:<std>", "lognormal:<mean>:<std>", "exponential:<mean>";
+            dict: kwargs of LatencyModel constructor;
+            LatencyModel: returned as is.
+        """
+        if spec is None:
+            return cls(seed=seed)
+        if isinstance(spec, LatencyModel):
+            return spec
+        if isinstance(spec, (int, float)):
+            return cls("constant", mean=spec, seed=seed)
+        if isinstance(spec, dict):
+            return cls(**{"seed": seed, **spec})
+        if isinstance(spec, str):
+            distribution, *params = spec.split(":")
+            params = [float(param) for param in params]
+            if distribution == "uniform":
+                return cls(distribution, low=params[0], high=params[1], seed=seed)
+            if distribution in ("normal", "lognormal"):
+                return cls(distribution, mean=params[0], std=params[1], seed=seed)
+            return cls(distribution, mean=params[0] if params else 0.0, seed=seed)
+        raise TypeError(f"Latency specification must be either None, float, str, dict or LatencyModel, got: {type(spec)}")
+
+    def sample(self) -> float:
+        """
+        Returns random latency in seconds.
+        """
+        if self.distribution == "constant":
+            value = self.mean
+        elif self.distribution == "uniform":
+            value = self.rng.uniform(self.low, self.high)
+        elif self.distribution == "normal":
+            value = self.rng.gauss(self.mean, self.std)
+        elif self.distribution == "lognormal":
+            if self.mean <= 0:
+                return 0.0
+            # Convert mean and std of the latency into parameters of underlying normal distribution.
+            sigma = math.sqrt(math.log(1 + (self.std / self.mean) ** 2))
+            mu = math.log(self.mean) - sigma ** 2 / 2
+            value = self.rng.lognormvariate(mu, sigma)
+        else:
+            value = self.rng.expovariate(1 / self.mean) if self.mean > 0 else 0.0
+        return max(value, 0.0)
+
+    def __repr__(self) -> str:
+        return f"LatencyModel(distribution={self.distribution!r}, mean={self.mean}, std={self.std}, low={self.low}, high={self.high})"
+
+
+class Cassette:
+    """
+    RAI storage of recorded chat completion exchanges.
+    Each interaction is keyed by the hash of canonicalized request body, so that
+    the same request is answered with the same completion in replay mode.
+    Cassette is stored as JSON file: {"interactions": [{"key": str, "request": dict, "response": dict}, ...]}.
+    """
+
+    # Request kwargs, which do not affect the completion.
+    _ignored_keys = {"stream"}
+
+    def __init__(self, path: str) -> None:
+        """
+        Initializes cassette and loads interactions from file, if it exists.
+        Args:
+            path [str]: Path to cassette file.
+        """
+        self.path = path
+        self.interactions = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                data = orjson.loads(file.read())
+            for interaction in data.get("interactions", []):
+                self.interactions[interaction["key"]] = interaction
+        return
+
+    def make_key(self, request: dict) -> str:
+        """
+        Returns the hash of canonicalized request body.
+        """
+        body = {key: value for key, value in request.items() if key not in self._ignored_keys}
+        return hashlib.sha256(orjson.dumps(body, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    def get(self, request: dict) -> Union[dict, None]:
+        """
+        Returns recorded completion for the request or None, if the request was not recorded.
+        """
+        interaction = self.interactions.get(self.make_key(request))
+        if interaction is None:
+            return None
+        return interaction["response"]
+
+    def record(self, request: dict, response: dict) -> None:
+        """
+        Adds the interaction to the cassette. Call 'save' to write it to file.
+        """
+        key = self.make_key(request)
+        with self._lock:
+            self.interactions[key] = {"key": key, "request": request, "response": response}
+            self.dirty = True
+        return
+
+    def save(self) -> None:
+        """
+        Atomically writes cassette to file, if it has unsaved interactions.
+        Interactions, which are recorded during the write, stay unsaved ('dirty' is set again).
+        """
+        with self._save_lock:
+            with self._lock:
+                if not self.dirty:
+                    return
+                self.dirty = False
+                interactions = list(self.interactions.values())
+            self.write(interactions)
+        return
+
+    def write(self, interactions: list) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        data = orjson.dumps({"interactions": interactions}, option=orjson.OPT_INDENT_2)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, self.path)
+        return
+
+    def __len__(self) -> int:
+        return len(self.interactions)
+
+
+def echo_responder(request: dict, reply_words: int=50) -> str:
+    """
+    Default responder of LocalOpenAIServer.
+    Deterministically answers with the first words of the last message,
+    limited by 'reply_words' and request's 'max_tokens'.
+    """
+    messages = request.get("messages") or [{}]
+    words = str(messages[-1].get("content") or "").split()
+    limit = reply_words
+    if request.get("max_tokens") is not None:
+        limit = min(limit, request["max_tokens"])
+    if not words:
+        return "OK"
+    return " ".join(words[:limit])
+
+
+class LocalOpenAIServer:
+    """
+    RAI local stand-in for OpenAI API, which implements '/v1/chat/completions' endpoint.
+    It is designed for offline and deterministic benchmarks and load tests of RAI actors.
+    Supported features:
+        - regular and streaming (server-sent events) completions, including function calls;
+        - configurable latency distribution of responses and of streamed chunks;
+        - error injection: 429 (with Retry-After header), 500 and timeouts (the server hangs);
+        - three modes: "mock" (completions are generated locally),
+            "record" (requests are forwarded to upstream API and exchanges are saved into cassette file)
+            and "replay" (completions are taken from cassette file).
+    Point RAI to the server with either 'configure_client(base_url=server.url)',
+    "base_url" in "http" section of ChatBot configuration, OPENAI_BASE_URL environment variable
+    or 'base_url' kwarg of a single request.
+    Example:
+        with LocalOpenAIServer(port=0, latency="lognormal:0.5:0.2", errors={429: 0.05}, seed=0) as server:
+            configure_client(base_url=server.url)
+            ...
+    Command line:
+        python -m RAI.api.server --port 8080 --latency uniform:0.2:1.0 --error 429:0.05
+    """
+
+    _defaults = RDict({
+        "host": "127.0.0.1",
+        "port": 8080,
+        "mode": "mock",
+        "token_latency": 0.0,
+        "retry_after": 1.0,
+        "hang_time": 600.0,
+        "upstream": "https://api.openai.com/v1",
+        "reply_words": 50,
+    })
+
+    _modes = ("mock", "record", "replay")
+    _error_kinds = (429, 500, "timeout")
+    _chat_completions_path = "/v1/chat/completions"
+
+    def __init__(
+        self,
+        host: str=None,
+        port: int=None,
+        *,
+        mode: str=None,
+        latency: Union[float, str, dict, LatencyModel]=None,
+        token_latency: float=None,
+        errors: Dict[Union[int, str], float]=None,
+        retry_after: float=None,
+        hang_time: float=None,
+        cassette: str=None,
+        upstream: str=None,
+        responder: Callable[[dict], str]=None,
+        reply_words: int=None,
+        seed: int=None) -> None:
+        """
+        Initializes server. The server is not started until 'run' or 'start' is called.
+        Args:
+            host [str]: Host to listen on. Default: None ("127.0.0.1").
+            port [int]: Port to listen on. 0 means any free port. Default: None (8080).
+        Kwargs:
+            mode [str]: Either "mock", "record" or "replay". Default: None ("mock").
+            latency [Union[float, str, dict, LatencyModel]]: Latency of responses (see 'LatencyModel.from_spec'). Default: None (no latency).
+            token_latency [float]: Delay in seconds between streamed chunks. Default: None (0.0).
+            errors [dict]: Probabilities of injected errors: {429: float, 500: float, "timeout": float}. Default: None (no errors).
+            retry_after [float]: Value of Retry-After header of injected 429 errors. Default: None (1.0).
+            hang_time [float]: Number of seconds the server hangs on injected timeouts. Default: None (600.0).
+            cassette [str]: Path to cassette file. Required in "record" and "replay" modes. Default: None.
+            upstream [str]: Base URL of API to forward requests to in "record" mode. Default: None (OpenAI URL).
+            responder [Callable[[dict], str]]: Function, which generates completion content from request body in "mock" mode.
+                Default: None ('echo_responder').
+            reply_words [int]: Maximum number of words in 'echo_responder' completions. Default: None (50).
+            seed [int]: Seed of random generators, which makes latency and errors reproducible. Default: None.
+        """
+        self.host = self._defaults.host if host is None else host
+        self.port = self._defaults.port if port is None else port
+        self.mode = self._defaults.mode if mode is None else mode
+        if self.mode not in self._modes:
+            raise ValueError(f"Unknown mode: {self.mode}. Available: {self._modes}.")
+        self.latency = LatencyModel.from_spec(latency, seed=seed)
+        self.token_latency = self._defaults.token_latency if token_latency is None else token_latency
+        self.errors = {} if errors is None else dict(errors)
+        for kind in self.errors:
+            if kind not in self._error_kinds:
+                raise ValueError(f"Unknown error kind: {kind}. Available: {self._error_kinds}.")
+        if sum(self.errors.values()) > 1:
+            raise ValueError("Total probability of injected errors must not exceed 1.")
+        self.retry_after = self._defaults.retry_after if retry_after is None else retry_after
+        self.hang_time = self._defaults.hang_time if hang_time is None else hang_time
+        if self.mode != "mock" and cassette is None:
+            raise ValueError(f"Cassette path is required in '{self.mode}' mode.")
+        self.cassette = None if cassette is None else Cassette(cassette)
+        self.upstream = self._defaults.upstream if upstream is None else upstream.rstrip("/")
+        self.reply_words = self._defaults.reply_words if reply_words is None else reply_words
+        self.responder = responder
+        self.rng = random.Random(seed)
+        self.stats = RDict({"requests": 0, "completions": 0, "errors": RDict({str(kind): 0 for kind in self._error_kinds})})
+        self._upstream_session = None
+        self._save_task = None
+        self._runner = None
+        self._loop = None
+        self._thread = None
+        return
+
+    @property
+    def url(self) -> str:
+        """
+        Returns base URL of the server, which should be used as 'base_url' of RAI clients.
+        """
+        return f"http://{self.host}:{self.port}/v1"
+
+    def make_app(self) -> web.Application:
+        """
+        Creates aiohttp application with server routes.
+        """
+        app = web.Application(client_max_size=64 * 1024 ** 2)
+        app.router.add_post(self._chat_completions_path, self.chat_completions)
+        app.on_cleanup.append(self.close_upstream_session)
+        app.on_cleanup.append(self.flush_cassette)
+        return app
+
+    # Request handling
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        """
+        Handles requests to chat completions endpoint.
+        """
+        try:
+            body = await request.json(loads=orjson.loads)
+        except ValueError:
+            return self.error_response(400, "Request body is not a valid JSON.", "invalid_request_error")
+        if not isinstance(body, dict) or "model" not in body or "messages" not in body:
+            return self.error_response(400, "Both 'model' and 'messages' are required.", "invalid_request_error")
+        self.stats.requests += 1
+        latency = self.latency.sample()
+        if latency > 0:
+            await asyncio.sleep(latency)
+        error = self.choose_error()
+        if error is not None:
+            self.stats.errors[str(error)] += 1
+            if error == "timeout":
+                await asyncio.sleep(self.hang_time)
+                return self.error_response(504, "Request timed out.", "timeout")
+            if error == 429:
+                headers = {"Retry-After": str(self.retry_after)}
+                return self.error_response(429, "Rate limit reached.", "rate_limit_exceeded", headers=headers)
+            return self.error_response(500, "The server had an error while processing your request.", "server_error")
+        if self.mode == "mock":
+            completion = self.make_completion(body)
+        elif self.mode == "replay":
+            completion = self.cassette.get(body)
+            if completion is None:
+                return self.error_response(404, "No recorded interaction for the request.", "cassette_miss")
+        else:
+            completion = await self.forward(request, body)
+            if isinstance(completion, web.Response):
+                return completion
+        self.stats.completions += 1
+        if body.get("stream"):
+            return await self.stream_completion(request, completion)
+        return web.json_response(completion, dumps=lambda obj: orjson.dumps(obj).decode())
+
+    def choose_error(self) -> Union[int, str, None]:
+        """
+        Randomly chooses the error to inject according to error probabilities.
+        Returns None, if no error should be injected.
+        """
+        if not self.errors:
+            return None
+        value = self.rng.random()
+        for kind, probability in self.errors.items():
+            if value < probability:
+                return kind
+            value -= probability
+        return None
+
+    @staticmethod
+    def error_response(status: int, message: str, code: str, headers: dict=None) -> web.Response:
+        """
+        Returns error response in OpenAI API format.
+        """
+        body = {"error": {"message": message, "type": code, "param": None, "code": code}}
+        return web.json_response(body, status=status, headers=headers)
+
+    # Mock mode
+
+    def make_completion(self, request: dict) -> dict:
+        """
+        Generates chat completion for the request.
+        """
+        n = request.get("n") or 1
+        function_name = self.choose_function(request)
+        choices = []
+        for index in range(n):
+            if function_name is not None:
+                arguments = self.make_arguments(request, function_name)
+                message = {"role": "assistant", "content": None, "function_call": {"name": function_name, "arguments": arguments}}
+                finish_reason = "function_call"
+            else:
+                if self.responder is not None:
+                    content = self.responder(request)
+                else:
+                    content = echo_responder(request, self.reply_words)
+                message = {"role": "assistant", "content": content}
+                finish_reason = "stop"
+            choices.append({"index": index, "message": message, "finish_reason": finish_reason})
+        prompt_tokens = sum(self.estimate_tokens(message.get("content")) + 4 for message in request["messages"]) + 3
+        completion_tokens = sum(
+            self.estimate_tokens(choice["message"]["content"] or choice["message"]["function_call"]["arguments"])
+            for choice in choices)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request["model"],
+            "choices": choices,
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @staticmethod
+    def choose_function(request: dict) -> Union[str, None]:
+        """
+        Returns the name of the function, which should be called, or None.
+        In "auto" mode a function is called only in response to user message.
+        """
+        functions = request.get("functions")
+        function_call = request.get("function_call", "auto")
+        if not functions or function_call == "none":
+            return None
+        if isinstance(function_call, dict):
+            return function_call.get("name")
+        if request["messages"][-1].get("role") != "user":
+            return None
+        return functions[0]["name"]
+
+    @staticmethod
+    def make_arguments(request: dict, function_name: str) -> str:
+        """
+        Returns JSON arguments for the function call, filled with placeholder values of required parameters.
+        """
+        placeholders = {"string": "", "number": 0, "integer": 0, "boolean": False, "array": [], "object": {}}
+        schema = {}
+        for function in request.get("functions", []):
+            if function.get("name") == function_name:
+                schema = function.get("parameters") or {}
+                break
+        properties = schema.get("properties", {})
+        required = schema.get("required", list(properties))
+        arguments = {}
+        for name in required:
+            spec = properties.get(name, {})
+            if spec.get("enum"):
+                arguments[name] = spec["enum"][0]
+            else:
+                arguments[name] = placeholders.get(spec.get("type"), "")
+        return orjson.dumps(arguments).decode()
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """
+        Roughly estimates the number of tokens in the text (~4 characters per token).
+        """
+        if not text:
+            return 0
+        return len(text) // 4 + 1
+
+    # Record mode
+
+    async def forward(self, request: web.Request, body: dict) -> Union[dict, web.Response]:
+        """
+        Forwards the request to upstream API and records the exchange into the cassette.
+        Streaming requests are forwarded as regular ones and are streamed back from the recorded completion.
+        """
+        if self._upstream_session is None:
+            self._upstream_session = aiohttp.ClientSession()
+        headers = {"Authorization": request.headers.get("Authorization", "")}
+        url = f"{self.upstream}/chat/completions"
+        async with self._upstream_session.post(url, json={**body, "stream": False}, headers=headers) as r:
+            data = await r.read()
+            if r.status >= 400:
+                return web.Response(body=data, status=r.status, content_type="application/json")
+        completion = orjson.loads(data)
+        self.cassette.record(body, completion)
+        # The file is written in a worker thread, so that recording does not stall concurrent requests.
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.ensure_future(self.save_cassette())
+        return completion
+
+    async def save_cassette(self) -> None:
+        """
+        Saves the cassette in a worker thread, until there are no unsaved interactions.
+        """
+        while self.cassette.dirty:
+            await asyncio.to_thread(self.cassette.save)
+        return
+
+    async def flush_cassette(self, app: web.Application=None) -> None:
+        """
+        Waits for the pending save and writes the rest of recorded interactions on server stop.
+        """
+        if self._save_task is not None:
+            await self._save_task
+            self._save_task = None
+        if self.cassette is not None:
+            await self.save_cassette()
+        return
+
+    async def close_upstream_session(self, app: web.Application=None) -> None:
+        """
+        Closes the session, which is used to forward requests to upstream API.
+        """
+        if self._upstream_session is not None:
+            await self._upstream_session.close()
+            self._upstream_session = None
+        return
+
+    # Streaming
+
+    async def stream_completion(self, request: web.Request, completion: dict) -> web.StreamResponse:
+        """
+        Streams the completion back to the client as server-sent events.
+        """
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        for chunk in self.iter_chunks(completion):
+            await response.write(b"data: " + orjson.dumps(chunk) + b"\n\n")
+            if self.token_latency > 0:
+                await asyncio.sleep(self.token_latency)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    @staticmethod
+    def iter_chunks(completion: dict) -> Iterator[dict]:
+        """
+        Splits chat completion into completion chunks, which OpenAI API sends in streaming mode.
+        Content is split into words (with preceding whitespaces), function arguments - into short pieces.
+        """
+        base = {"id": completion.get("id"), "object": "chat.completion.chunk", "created": completion.get("created"), "model": completion.get("model")}
+
+        def make_chunk(index: int, delta: dict, finish_reason: str=None) -> dict:
+            return {**base, "choices": [{"index": index, "delta": delta, "finish_reason": finish_reason}]}
+
+        for choice in completion.get("choices", []):
+            index = choice.get("index", 0)
+            message = choice.get("message", {})
+            function_call = message.get("function_call")
+            if function_call is not None:
+                yield make_chunk(index, {"role": "assistant", "content": None, "function_call": {"name": function_call["name"], "arguments": ""}})
+                arguments = function_call.get("arguments", "")
+                for start in range(0, len(arguments), 8):
+                    yield make_chunk(index, {"function_call": {"arguments": arguments[start:start + 8]}})
+            else:
+                yield make_chunk(index, {"role": "assistant", "content": ""})
+                for piece in re.findall(r"\s*\S+", message.get("content") or ""):
+                    yield make_chunk(index, {"content": piece})
+            yield make_chunk(index, {}, choice.get("finish_reason", "stop"))
+        return
+
+    # Lifecycle
+
+    def run(self) -> None:
+        """
+        Runs the server in the current thread until it is interrupted.
+        """
+        web.run_app(self.make_app(), host=self.host, port=self.port, print=None)
+        return
+
+    def start(self) -> "LocalOpenAIServer":
+        """
+        Starts the server in a background thread and waits until it is ready to accept connections.
+        If the server was initialized with port 0, 'port' is set to the actual port.
+        """
+        if self._thread is not None:
+            return self
+        ready = threading.Event()
+        failure = []
+
+        def serve() -> None:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                runner = web.AppRunner(self.make_app())
+                loop.run_until_complete(runner.setup())
+                site = web.TCPSite(runner, self.host, self.port)
+                loop.run_until_complete(site.start())
+            except Exception as e:
+                failure.append(e)
+                ready.set()
+                loop.close()
+                return
+            self._loop = loop
+            self._runner = runner
+            self.port = runner.addresses[0][1]
+            ready.set()
+            loop.run_forever()
+            loop.run_until_complete(runner.cleanup())
+            loop.close()
+            return
+
+        self._thread = threading.Thread(target=serve, name="LocalOpenAIServer", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if failure:
+            self._thread = None
+            raise failure[0]
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops the server, started with 'start'.
+        """
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+        self._loop = None
+        self._runner = None
+        return
+
+    def __enter__(self) -> "LocalOpenAIServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+        return
+
+
+def parse_error(spec: str) -> tuple:
+    """
+    Parses error injection specification "<kind>:<probability>", i.e. "429:0.05" or "timeout:0.01".
+    """
+    kind, probability = spec.rsplit(":", 1)
+    if kind.isdigit():
+        kind = int(kind)
+    return kind, float(probability)
+
+
+def main(argv: list=None) -> None:
+    """
+    Runs LocalOpenAIServer from command line.
+    """
+    parser = argparse.ArgumentParser(description="Local stand-in server for OpenAI chat completions API.")
+    parser.add_argument("--host", default=LocalOpenAIServer._defaults.host)
+    parser.add_argument("--port", type=int, default=LocalOpenAIServer._defaults.port)
+    parser.add_argument("--mode", choices=LocalOpenAIServer._modes, default=LocalOpenAIServer._defaults.mode)
+    parser.add_argument("--latency", default=None, help="Latency distribution, i.e. 0.5, uniform:0.2:1.0 or lognormal:0.8:0.3.")
+    parser.add_argument("--token-latency", type=float, default=None, help="Delay in seconds between streamed chunks.")
+    parser.add_argument("--error", action="append", default=[], help="Injected error probability, i.e. 429:0.05, 500:0.01 or timeout:0.01.")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After header of injected 429 errors.")
+    parser.add_argument("--hang-time", type=float, default=None, help="Number of seconds the server hangs on injected timeouts.")
+    parser.add_argument("--cassette", default=None, help="Path to cassette file (required in record and replay modes).")
+    parser.add_argument("--upstream", default=None, help="Base URL of upstream API in record mode.")
+    parser.add_argument("--reply-words", type=int, default=None, help="Maximum number of words in mock completions.")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    latency = args.latency
+    try:
+        latency = float(latency)
+    except (TypeError, ValueError):
+        pass
+    server = LocalOpenAIServer(
+        args.host,
+        args.port,
+        mode=args.mode,
+        latency=latency,
+        token_latency=args.token_latency,
+        errors=dict(parse_error(spec) for spec in args.error),
+        retry_after=args.retry_after,
+        hang_time=args.hang_time,
+        cassette=args.cassette,
+        upstream=args.upstream,
+        reply_words=args.reply_words,
+        seed=args.seed)
+    print(f"Serving OpenAI chat completions API on {server.url} (mode: {server.mode})")
+    server.run()
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Union
+
+from ..containers import loads_rdict
+
+
+class SSEDecoder:
+    """
+    Incremental decoder for server-sent events (SSE) stream.
+    Lines are fed one by one, and the data of an event is returned,
+    as soon as the event is finished (i.e. an empty line is met).
+    Only 'data' field is processed, since OpenAI API does not use other ones.
+    """
+
+    _done = "[DONE]"
+
+    def __init__(self) -> None:
+        self._data = []
+        self.done = False
+        return
+
+    def feed(self, line: Union[str, bytes]) -> Union[str, None]:
+        """
+        Processes a single line of the stream.
+        Returns event data, if the line finishes an event, or None otherwise.
+        """
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        line = line.rstrip("\r\n")
+        if not line:
+            return self.flush()
+        # Lines, starting with colon, are comments.
+        if line.startswith(":"):
+            return None
+        field, _, value = line.partition(":")
+        if field == "data":
+            self._data.append(value[1:] if value.startswith(" ") else value)
+        return None
+
+    def flush(self) -> Union[str, None]:
+        """
+        Finishes current event and returns its data (or None, if there is no data).
+        """
+        if not self._data:
+            return None
+        data = "\n".join(self._data)
+        self._data = []
+        if data == self._done:
+            self.done = True
+            return None
+        return data
+
+
+def iter_sse_chunks(lines: Iterable[Union[str, bytes]]) -> Iterator[dict]:
+    """
+    Converts an iterable of SSE stream lines into an iterator of JSON chunks (as RDict).
+    Stops on '[DONE]' event.
+    """
+    decoder = SSEDecoder()
+    for line in lines:
+        data = decoder.feed(line)
+        if data is not None:
+            yield loads_rdict(data)
+        if decoder.done:
+            return
+    data = decoder.flush()
+    if data is not None:
+        yield loads_rdict(data)
+
+
+async def aiter_sse_chunks(lines: AsyncIterable[Union[str, bytes]]) -> AsyncIterator[dict]:
+    """
+    Asynchronous counterpart of 'iter_sse_chunks'.
+    """
+    decoder = SSEDecoder()
+    async for line in lines:
+        data = decoder.feed(line)
+        if data is not None:
+            yield loads_rdict(data)
+        if decoder.done:
+            return
+    data = decoder.flush()
+    if data is not None:
+        yield loads_rdict(data)
@@ -0,0 +1,2 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
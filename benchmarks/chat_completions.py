@@ -0,0 +1,89 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+"""
+Measures throughput of RAI request layer against LocalOpenAIServer.
+Usage:
+    python -m RAI.benchmarks.chat_completions --requests 200 --latency lognormal:0.3:0.1 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ..api import RetryPolicy, get_async_client
+from ..api.server import LocalOpenAIServer
+from ..utils import arequest_openai, request_openai
+
+
+def make_request(i: int, base_url: str) -> dict:
+    return {
+        "model": "gpt-3.5-turbo",
+        "messages": [{"role": "user", "content": f"Request number {i}. Tell me something."}],
+        "temperature": 0,
+        "api_key": "local",
+        "base_url": base_url,
+    }
+
+
+def run_threads(n_requests: int, concurrency: int, base_url: str, policy: RetryPolicy) -> list:
+    latencies = []
+
+    def call(i: int) -> None:
+        start = time.perf_counter()
+        policy.call(request_openai, **make_request(i, base_url))
+        latencies.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(call, range(n_requests)))
+    return latencies
+
+
+async def run_async(n_requests: int, concurrency: int, base_url: str, policy: RetryPolicy) -> list:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await policy.acall(arequest_openai, **make_request(i, base_url))
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(call(i) for i in range(n_requests)))
+    await get_async_client().close()
+    return latencies
+
+
+def report(name: str, latencies: list, elapsed: float) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{name:>8}: {len(latencies) / elapsed:8.1f} req/s | "
+        f"p50 {quantiles[49] * 1000:7.1f} ms | p95 {quantiles[94] * 1000:7.1f} ms | p99 {quantiles[98] * 1000:7.1f} ms")
+    return
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", default="lognormal:0.3:0.1")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of injected 429 errors.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    errors = {429: args.error_rate} if args.error_rate else None
+    policy = RetryPolicy(max_attempts=10, base_delay=0.05, max_delay=1.0)
+    with LocalOpenAIServer(port=0, latency=args.latency, errors=errors, retry_after=0.1, seed=args.seed) as server:
+        start = time.perf_counter()
+        latencies = run_threads(args.requests, args.concurrency, server.url, policy)
+        report("threads", latencies, time.perf_counter() - start)
+        start = time.perf_counter()
+        latencies = asyncio.run(run_async(args.requests, args.concurrency, server.url, policy))
+        report("asyncio", latencies, time.perf_counter() - start)
+        print(f"server stats: {server.stats}")
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+"""
+Benchmark of extractive pre-compression of summarization input: token reduction and local compression time.
+Corpus files are read as in 'RAI.benchmarks.token_estimation' (by default, README files and sources of RAI)
+and rendered as a dialog, as TextSummarizer does with lists of messages.
+Usage:
+    python -m RAI.benchmarks.extractive_compression --corpus chats.jsonl --keep-ratio 0.2 0.3 0.5
+"""
+
+import argparse
+import time
+
+from ..actors import ExtractiveCompressor, TextSummarizer, TokenCounter
+from .token_estimation import get_default_corpus, read_corpus
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", nargs="+", default=None, help="Corpus files (.txt, .md, .py, .json, .jsonl).")
+    parser.add_argument("--model", default="gpt-3.5-turbo")
+    parser.add_argument("--keep-ratio", type=float, nargs="+", default=[0.2, 0.3, 0.5])
+    args = parser.parse_args()
+    paths = args.corpus if args.corpus is not None else get_default_corpus()
+    roles = ["user", "assistant"]
+    messages = [
+        {"role": roles[i % 2], "content": text}
+        for i, text in enumerate(text for path in paths for text in read_corpus(path))]
+    dialog = "\n".join(TextSummarizer.dict2str(message) for message in messages)
+    counter = TokenCounter(args.model)
+    n_tokens = counter.run(dialog)
+    print(f"Messages: {len(messages)}. Tokens: {n_tokens}.")
+    for keep_ratio in args.keep_ratio:
+        compressor = ExtractiveCompressor(args.model, keep_ratio)
+        start = time.perf_counter()
+        compressed = compressor.run(dialog)
+        duration = time.perf_counter() - start
+        n_compressed = counter.run(compressed)
+        print(
+            f"keep_ratio {keep_ratio}: {n_compressed} tokens ({n_tokens / n_compressed:.1f}x less), "
+            f"compression time {duration * 1e3:.1f} ms")
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+"""
+Compares decoding paths of chat completions into attribute-accessible containers:
+    baseline: json.loads + recursive 'to_rdict' (previous path of 'request_openai' callers);
+    eager: 'loads_rdict' (orjson + single in-place conversion pass);
+    lazy: 'loads_rdict(lazy=True)' (nested objects are converted on access).
+Each path reads the finish reason of the first choice.
+Usage:
+    python -m RAI.benchmarks.json_decoding --number 20000
+"""
+
+import argparse
+import json
+import timeit
+
+import orjson
+
+from ..containers import loads_rdict
+from ..utils import to_rdict
+
+
+def make_completion(n_choices: int, n_words: int, with_function: bool) -> dict:
+    message = {"role": "assistant", "content": " ".join(["word"] * n_words)}
+    if with_function:
+        message["function_call"] = {"name": "get_weather", "arguments": orjson.dumps({"city": "Paris", "unit": "celsius"}).decode()}
+    return {
+        "id": "chatcmpl-7QyqpwdfhqwajicIEznoc6Q47XAyW",
+        "object": "chat.completion",
+        "created": 1686676106,
+        "model": "gpt-3.5-turbo-0613",
+        "choices": [{"index": index, "message": dict(message), "finish_reason": "stop"} for index in range(n_choices)],
+        "usage": {"prompt_tokens": 2048, "completion_tokens": n_words * n_choices, "total_tokens": 2048 + n_words * n_choices},
+    }
+
+
+def make_chunk() -> dict:
+    return {
+        "id": "chatcmpl-7QyqpwdfhqwajicIEznoc6Q47XAyW",
+        "object": "chat.completion.chunk",
+        "created": 1686676106,
+        "model": "gpt-3.5-turbo-0613",
+        "choices": [{"index": 0, "delta": {"content": " word"}, "finish_reason": None}],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+    payloads = {
+        "chunk": make_chunk(),
+        "short answer": make_completion(1, 20, False),
+        "function call": make_completion(1, 0, True),
+        "long answer, n=3": make_completion(3, 500, True),
+    }
+    paths = {
+        "baseline": lambda data: to_rdict(json.loads(data)).choices[0].finish_reason,
+        "eager": lambda data: loads_rdict(data).choices[0].finish_reason,
+        "lazy": lambda data: loads_rdict(data, lazy=True).choices[0].finish_reason,
+    }
+    print(f"{'payload':>18} | " + " | ".join(f"{name:>10}" for name in paths) + "   (us per call)")
+    for payload_name, payload in payloads.items():
+        data = orjson.dumps(payload)
+        timings = [timeit.timeit(lambda: path(data), number=args.number) / args.number * 1e6 for path in paths.values()]
+        print(f"{payload_name:>18} | " + " | ".join(f"{timing:10.2f}" for timing in timings))
+    return
+
+
+if __name__ == "__main__":
+    main()
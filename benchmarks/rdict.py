@@ -0,0 +1,96 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+"""
+Micro-benchmarks of RDict: construction, attribute get/set and deep conversion.
+RDict is compared against the previous implementation, which computed 'set(dir(self))' for every instance.
+Usage:
+    python -m RAI.benchmarks.rdict --number 100000
+"""
+
+from typing import Any
+import argparse
+import timeit
+
+import orjson
+
+from ..containers import RDict, loads_rdict
+from ..utils import to_rdict
+
+
+class LegacyRDict(dict):
+    """
+    Previous implementation of RDict (for comparison only).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._internal_attribute_names_set = set(dir(self))
+        return
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        if attr == "_internal_attribute_names_set":
+            super().__setattr__(attr, value)
+            return
+        if attr in self._internal_attribute_names_set:
+            raise AttributeError(f"Can't assign value to attribute {attr}. Access denied.")
+        self[attr] = value
+        return
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr in self.keys():
+            return self.get(attr)
+        raise AttributeError("Attribute does not exist.")
+
+    def __missing__(self, key: Any) -> None:
+        return None
+
+
+def legacy_to_rdict(obj: Any) -> Any:
+    if isinstance(obj, list):
+        return [legacy_to_rdict(elem) for elem in obj]
+    if isinstance(obj, dict):
+        return LegacyRDict({key: legacy_to_rdict(value) for key, value in obj.items()})
+    return obj
+
+
+def make_completion() -> dict:
+    return {
+        "id": "chatcmpl-7QyqpwdfhqwajicIEznoc6Q47XAyW",
+        "object": "chat.completion",
+        "created": 1686676106,
+        "model": "gpt-3.5-turbo-0613",
+        "choices": [
+            {"index": index, "message": {"role": "assistant", "content": "Hello!"}, "finish_reason": "stop"}
+            for index in range(3)],
+        "usage": {"prompt_tokens": 9, "completion_tokens": 12, "total_tokens": 21},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args()
+    number = args.number
+    params = {"model": "gpt-3.5-turbo", "temperature": 0, "stream": False, "n": 1}
+    completion = make_completion()
+    data = orjson.dumps(completion)
+    legacy, current = LegacyRDict(params), RDict(params)
+    cases = {
+        "construction": (lambda: LegacyRDict(params), lambda: RDict(params)),
+        "attribute get": (lambda: legacy.model, lambda: current.model),
+        "attribute set": (lambda: setattr(legacy, "model", "gpt-4"), lambda: setattr(current, "model", "gpt-4")),
+        "missing item": (lambda: legacy["missing"], lambda: current["missing"]),
+        "deep conversion": (lambda: legacy_to_rdict(completion), lambda: to_rdict(completion)),
+        "decode completion": (lambda: legacy_to_rdict(orjson.loads(data)), lambda: loads_rdict(data)),
+    }
+    print(f"{'case':>18} | {'legacy, ns':>12} | {'RDict, ns':>12} | speedup")
+    for name, (legacy_case, current_case) in cases.items():
+        legacy_time = timeit.timeit(legacy_case, number=number) / number * 1e9
+        current_time = timeit.timeit(current_case, number=number) / number * 1e9
+        print(f"{name:>18} | {legacy_time:12.1f} | {current_time:12.1f} | {legacy_time / current_time:6.1f}x")
+    return
+
+
+if __name__ == "__main__":
+    main()
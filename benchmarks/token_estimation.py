@@ -0,0 +1,117 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+"""
+Calibration of token size estimator of TokenCounter against exact tiktoken counting.
+Reports the ratio 'exact / estimate' for single messages and for whole contexts (percentiles and maximum),
+the share of messages, which exceed the safety bound, and the speedup of estimation over exact counting.
+Corpus files may be plain text (paragraphs are treated as messages), JSON or JSONL
+(all "content" string fields are treated as messages, i.e. exported chats or datasets of messages).
+By default, README files and Python sources of RAI are used.
+Usage:
+    python -m RAI.benchmarks.token_estimation --corpus chats.jsonl docs.txt --context-size 20
+"""
+
+from typing import Any, Iterable, List
+import argparse
+import glob
+import math
+import os
+import statistics
+import time
+
+import orjson
+
+from ..actors import TokenCounter
+
+
+def extract_contents(obj: Any) -> Iterable[str]:
+    """
+    Yields all "content" string fields of JSON object.
+    """
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key == "content" and isinstance(value, str):
+                yield value
+            else:
+                yield from extract_contents(value)
+    elif isinstance(obj, list):
+        for elem in obj:
+            yield from extract_contents(elem)
+    return
+
+
+def read_corpus(path: str) -> List[str]:
+    """
+    Reads messages from the corpus file.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if path.endswith(".jsonl"):
+        return [text for line in data.splitlines() if line.strip() for text in extract_contents(orjson.loads(line))]
+    if path.endswith(".json"):
+        return list(extract_contents(orjson.loads(data)))
+    text = data.decode("utf-8", errors="replace")
+    return [paragraph.strip() for paragraph in text.split("\n\n") if paragraph.strip()]
+
+
+def get_default_corpus() -> List[str]:
+    """
+    Returns paths to README files and Python sources of RAI.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    paths = glob.glob(os.path.join(root, "*.md")) + glob.glob(os.path.join(root, "**", "*.py"), recursive=True)
+    return sorted(paths)
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(math.ceil(q * len(values))) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", nargs="+", default=None, help="Corpus files (.txt, .md, .py, .json, .jsonl).")
+    parser.add_argument("--model", default="gpt-3.5-turbo")
+    parser.add_argument("--context-size", type=int, default=20, help="Number of messages in a context.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timing repetitions.")
+    args = parser.parse_args()
+    paths = args.corpus if args.corpus is not None else get_default_corpus()
+    messages = [
+        {"role": "user", "content": text}
+        for path in paths for text in read_corpus(path)]
+    if not messages:
+        raise ValueError("Corpus is empty.")
+    counter = TokenCounter(args.model)
+    exact = [counter.count_message(message) for message in messages]
+    estimates = [counter.count_message(message, exact=False) for message in messages]
+    ratios = [n_exact / n_estimate for n_exact, n_estimate in zip(exact, estimates)]
+    step = args.context_size
+    context_ratios = [
+        sum(exact[i:i+step]) / sum(estimates[i:i+step])
+        for i in range(0, len(messages), step)]
+    n_exceeding = sum(n_exact > counter.upper_bound(n_estimate) for n_exact, n_estimate in zip(exact, estimates))
+    print(f"Encoding: {counter.encoding_name}. Files: {len(paths)}. Messages: {len(messages)}. Tokens: {sum(exact)}.")
+    print(f"Bytes per token: {counter._bytes_per_token}. Safety bound: exact <= estimate * {1 + counter._estimate_error}.")
+    for name, values in (("message", ratios), (f"context ({step} messages)", context_ratios)):
+        print(
+            f"exact/estimate per {name}: mean {statistics.mean(values):.3f}, "
+            f"p50 {percentile(values, 0.5):.3f}, p95 {percentile(values, 0.95):.3f}, "
+            f"p99 {percentile(values, 0.99):.3f}, max {max(values):.3f}")
+    print(f"Messages exceeding the safety bound: {n_exceeding} ({n_exceeding / len(messages):.2%})")
+    timings = {}
+    for flag in (True, False):
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            counter.count_from_list(messages, exact=flag)
+            best = min(best, time.perf_counter() - start)
+        timings[flag] = best
+    print(
+        f"Time per corpus: exact {timings[True] * 1e3:.2f} ms, estimate {timings[False] * 1e3:.2f} ms, "
+        f"speedup {timings[True] / timings[False]:.1f}x")
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+"""
+Benchmark of batch tokenization: sequential encoding of messages one by one against 'TokenCounter.count_many'
+(threads for large batches, worker processes for multi-megabyte documents).
+NOTE: The speedup depends on the number of available CPU cores.
+Usage:
+    python -m RAI.benchmarks.tokenization --doc-mb 8 --threads 8
+"""
+
+import argparse
+import time
+
+from ..actors import TokenCounter
+from .token_estimation import get_default_corpus, read_corpus
+
+
+def measure(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="gpt-3.5-turbo")
+    parser.add_argument("--copies", type=int, default=20, help="Number of copies of the corpus in the batch of messages.")
+    parser.add_argument("--doc-mb", type=float, default=8, help="Size of a single document in megabytes.")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    counter = TokenCounter(args.model)
+    encoding = counter.encoding
+    messages = [text for path in get_default_corpus() for text in read_corpus(path)] * args.copies
+    text = "\n\n".join(messages)
+    document = text * int(args.doc_mb * 1024 ** 2 // len(text) + 1)
+    cases = {
+        f"{len(messages)} messages": [messages],
+        f"document of {len(document) / 1024 ** 2:.1f} MB": [[document]],
+    }
+    for name, (batch,) in cases.items():
+        sequential = measure(lambda: [len(encoding.encode_ordinary(string)) for string in batch], args.repeat)
+        batched = measure(lambda: counter.count_many(batch, num_threads=args.threads), args.repeat)
+        print(f"{name}: sequential {sequential * 1e3:.1f} ms, count_many {batched * 1e3:.1f} ms, speedup {sequential / batched:.2f}x")
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -63,7 +63,7 @@ class Chat:
         self.chat_id = self.make_id()
         self.messages = []
         self.recent_messages = []
-        for filename in os.listdir(load_dir):
+        for filename in sorted(os.listdir(load_dir)):
             path = os.path.join(load_dir, filename)
             with open(path, "r", encoding="utf-8") as json_file:
                 json_messages = json.load(json_file)
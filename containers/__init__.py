@@ -1,4 +1,5 @@
 # Created by: Ausar686
 # https://github.com/Ausar686
 
-from .rdict import RDict
\ No newline at end of file
+from .rdict import LazyRDict, RDict
+from .codec import loads_rdict, rdict_from_json
@@ -0,0 +1,42 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+from typing import Any, Union
+
+import orjson
+
+from .rdict import LazyRDict, RDict
+
+
+def rdict_from_json(obj: Any) -> Any:
+    """
+    Converts freshly decoded JSON object into RDict tree in a single pass.
+    NOTE: Nested containers of 'obj' are converted in place, so 'obj' must not be shared.
+    Use 'RAI.utils.to_rdict' to convert arbitrary objects without modifying them.
+    """
+    obj_type = type(obj)
+    if obj_type is dict:
+        for key, value in obj.items():
+            value_type = type(value)
+            if value_type is dict or value_type is list:
+                obj[key] = rdict_from_json(value)
+        return RDict(obj)
+    if obj_type is list:
+        return [rdict_from_json(elem) for elem in obj]
+    return obj
+
+
+def loads_rdict(data: Union[bytes, str], lazy: bool=False) -> Any:
+    """
+    Decodes JSON document into attribute-accessible containers.
+    Args:
+        data [Union[bytes, str]]: JSON document.
+        lazy [bool]: Whether to return a lazy view (LazyRDict), which converts nested objects
+            only when they are accessed (True), or to convert the whole tree at once (False). Default: False.
+    Returns:
+        Decoded object: RDict (or LazyRDict) for JSON objects, list for JSON arrays and scalar otherwise.
+    """
+    obj = orjson.loads(data)
+    if lazy:
+        return LazyRDict.wrap(obj)
+    return rdict_from_json(obj)
@@ -29,19 +29,26 @@ class RDict(dict):
             print(dict().__dict__)
     """
     
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._internal_attribute_names_set = set(dir(self))
+    # RDict does not keep any per-instance state besides the dict itself.
+    __slots__ = ()
+
+    # Names of attributes and methods, which can't be assigned via attribute.
+    # Computed once per class (see '__init_subclass__'), not per instance.
+    _reserved_names = frozenset()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        """
+        Computes the set of reserved names for each subclass.
+        """
+        super().__init_subclass__(**kwargs)
+        cls._reserved_names = frozenset(dir(cls))
         return
-    
+
     def __setattr__(self, attr: str, value: Any) -> None:
         """
         Override a __setattr__ method, so that it sets an item to the dictionary.
         """
-        if attr == "_internal_attribute_names_set":
-            super().__setattr__(attr, value)
-            return
-        if attr in self._internal_attribute_names_set:
+        if attr in self._reserved_names:
             raise AttributeError(f"Can't assign value to attribute {attr}. Access denied.")
         self[attr] = value
         return
@@ -52,13 +59,71 @@ class RDict(dict):
         It returns an item from the dict with the same key, if such a key exists in a dict.
         Otherwise it raises AttributeError.
         """
-        if attr in self.keys():
-            return self.get(attr)
-        else:
-            raise AttributeError("Attribute does not exist.")
+        if attr in self:
+            return self[attr]
+        raise AttributeError(f"Attribute {attr} does not exist.")
 
     def __missing__(self, key: Any) -> None:
         """
         Returns None if key is not present in the dictionary.
         """
-        return None
\ No newline at end of file
+        return None
+
+
+RDict._reserved_names = frozenset(dir(RDict))
+
+
+class LazyRDict(RDict):
+    """
+    RAI lazy view of decoded JSON object.
+    Nested objects are stored as is and are converted into LazyRDict only when they are accessed
+    (via item, attribute, 'get', 'pop', 'values' or 'items'), so that large payloads,
+    from which only a few fields are used, are not converted entirely.
+    Example:
+        completion = loads_rdict(data, lazy=True)
+        print(completion.choices[0].message.content)
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def wrap(cls, value: Any) -> Any:
+        """
+        Wraps dicts into LazyRDict and lists - into lists of wrapped elements. Other values are returned as is.
+        """
+        value_type = type(value)
+        if value_type is dict:
+            return cls(value)
+        if value_type is list:
+            return [cls.wrap(elem) if type(elem) in (dict, list) else elem for elem in value]
+        return value
+
+    def _convert(self, key: Any, value: Any) -> Any:
+        # Converts raw nested value and stores the result, so that it is converted only once.
+        value_type = type(value)
+        if value_type is dict or value_type is list:
+            value = self.wrap(value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._convert(key, super().__getitem__(key))
+
+    def get(self, key: Any, default: Any=None) -> Any:
+        if key not in self:
+            return default
+        return self[key]
+
+    def pop(self, key: Any, *args) -> Any:
+        value = super().pop(key, *args)
+        return self.wrap(value)
+
+    def values(self):
+        for key, value in super().items():
+            self._convert(key, value)
+        return super().values()
+
+    def items(self):
+        for key, value in super().items():
+            self._convert(key, value)
+        return super().items()
@@ -0,0 +1,29 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+"""
+The root of the repository is the 'RAI' package itself, so it is imported from the checkout under this name.
+"""
+
+import importlib.util
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if "RAI" not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(
+        "RAI", os.path.join(_root, "__init__.py"), submodule_search_locations=[_root])
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules["RAI"] = _module
+    _spec.loader.exec_module(_module)
+
+
+# Texts for tokenization tests: line and sentence boundaries, multi-byte symbols and text without any boundaries.
+sample_texts = {
+    "prose": "\n".join(
+        f"Line {i}. The quick brown fox jumps over the lazy dog! Does it? Yes... It does." for i in range(200)),
+    "cyrillic": "Съешь же ещё этих мягких французских булок, да выпей чаю. " * 150,
+    "emoji": "🙂🚀👩‍💻🇷🇺 漢字かな交じり文 " * 300,
+    "no_boundaries": "абв" * 2000,
+}
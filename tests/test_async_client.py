@@ -0,0 +1,52 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+import asyncio
+import logging
+import warnings
+
+import pytest
+
+from RAI.api import AsyncOpenAIClient
+from RAI.api.server import LocalOpenAIServer
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = LocalOpenAIServer("127.0.0.1", 0, latency=0.0, reply_words=3).start()
+    yield server
+    server.stop()
+
+
+def request(client: AsyncOpenAIClient, server: LocalOpenAIServer) -> str:
+    async def main() -> str:
+        completion = await client.chat_completion(
+            model="gpt-3.5-turbo", messages=[{"role": "user", "content": "Hi"}], api_key="key")
+        return completion.choices[0].message.content
+
+    return main()
+
+
+def test_context_manager_closes_session(server, caplog):
+    client = AsyncOpenAIClient(server.url)
+
+    async def main() -> str:
+        async with client:
+            return await request(client, server)
+
+    with caplog.at_level(logging.WARNING):
+        for _ in range(3):
+            assert asyncio.run(main())
+    assert not client._sessions
+    assert not caplog.records
+
+
+def test_session_of_closed_loop_is_dropped(server, caplog):
+    client = AsyncOpenAIClient(server.url)
+    with warnings.catch_warnings(), caplog.at_level(logging.WARNING):
+        warnings.simplefilter("ignore", ResourceWarning)
+        asyncio.run(request(client, server))
+        assert len(client._sessions) == 1
+        asyncio.run(request(client, server))
+    assert len(client._sessions) == 1
+    assert "was not closed" in caplog.text
@@ -0,0 +1,100 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+import json
+import threading
+
+import pytest
+
+from RAI import ChatBot
+
+
+class Summarizer:
+    """
+    Summarizer, which blocks until 'release' is set. Background jobs use copies of it, so calls are shared.
+    """
+
+    def __init__(self, calls: list, release: threading.Event) -> None:
+        self.calls = calls
+        self.release = release
+        return
+
+    def __deepcopy__(self, memo: dict) -> "Summarizer":
+        return Summarizer(self.calls, self.release)
+
+    def run(self, obj) -> str:
+        self.release.wait(5)
+        self.calls.append(threading.current_thread().name)
+        return f"Summary {len(self.calls)}."
+
+
+@pytest.fixture
+def bot(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({
+        "openai": {"api_key": "key"},
+        "instructions": {"role": "Be short."},
+        "summary": {"mode": "rolling", "background": True, "soft_threshold": 0.1},
+    }))
+    bot = ChatBot(str(path))
+    bot.release = threading.Event()
+    bot.calls = []
+    bot.actors.summarizer = Summarizer(bot.calls, bot.release)
+    for i in range(10):
+        bot.push_context({"role": "user", "content": f"Question {i}: " + "word " * 50})
+        bot.push_context({"role": "assistant", "content": f"Answer {i}: " + "word " * 50})
+    yield bot
+    bot.release.set()
+    bot.close()
+
+
+def test_background_summary_is_cached_on_swap(bot):
+    bot.schedule_background_summary()
+    job = bot._background_summary
+    assert job is not None
+    bot.release.set()
+    job.future.result(5)
+    # The worker does not access the cache: summaries are cached, once they are swapped in.
+    assert not bot._summary_cache
+    assert bot.swap_background_summary()
+    assert bot.calls and all(name.startswith("RAI-summary") for name in bot.calls)
+    assert bot._context_info[1].summary in bot._summary_cache
+    assert len(bot.context) == 3
+
+
+def test_worker_uses_snapshot_of_actors(bot):
+    bot.schedule_background_summary()
+    job = bot._background_summary
+    bot.upgrade_model()
+    bot.release.set()
+    job.future.result(5)
+    assert bot.actors.token_counter.model == bot.openai.model
+    assert bot.swap_background_summary()
+
+
+def test_clear_drops_background_summary(bot):
+    bot.schedule_background_summary()
+    job = bot._background_summary
+    bot.clear()
+    bot.release.set()
+    job.future.result(5)
+    assert bot._background_summary is None
+    assert not bot.swap_background_summary(wait=True)
+    assert not bot._summary_cache
+    assert len(bot.context) == 1
+
+
+def test_close_stops_worker_thread(bot):
+    bot.schedule_background_summary()
+    executor = bot._background_executor
+    bot.close()
+    assert bot._background_summary is None
+    assert bot._background_executor is None
+    bot.release.set()
+    executor.shutdown(wait=True)
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
+    # The bot still works after 'close'.
+    bot.schedule_background_summary()
+    bot.release.set()
+    assert bot.swap_background_summary(wait=True)
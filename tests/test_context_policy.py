@@ -0,0 +1,117 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+import json
+
+import pytest
+
+from RAI import ChatBot
+from RAI.actors.context_policy import EvictOldestPolicy, SlidingWindowPolicy
+
+
+class Summarizer:
+
+    def __init__(self) -> None:
+        self.calls = 0
+        return
+
+    def run(self, messages: list) -> str:
+        self.calls += 1
+        return f"Summary of {len(messages)} messages."
+
+
+@pytest.fixture
+def bot(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"openai": {"api_key": "key"}, "instructions": {"role": "Be short."}}))
+    return ChatBot(str(path))
+
+
+def add_turns(bot, n_turns: int, words: int=5) -> None:
+    for i in range(n_turns):
+        bot.push_context({"role": "user", "content": f"Question {i}: " + "word " * words})
+        bot.push_context({"role": "assistant", "content": f"Answer {i}: " + "word " * words})
+    return
+
+
+def contents(bot) -> list:
+    return [message["content"] for message in bot.context[1:]]
+
+
+def test_sliding_window_keeps_last_turns(bot):
+    add_turns(bot, 5)
+    bot.push_context({"role": "user", "content": "Last question"})
+    bot.set_context_policy(SlidingWindowPolicy(max_turns=3))
+    assert bot.apply_context_policy()
+    # The last user message starts the third turn.
+    assert contents(bot)[0].startswith("Question 3")
+    assert len(bot.context) == 1 + 5
+    assert bot.context[0]["role"] == "system"
+    assert not bot.apply_context_policy()
+
+
+def test_sliding_window_counts_turns_by_user_messages(bot):
+    bot.push_context({"role": "user", "content": "Question 0"})
+    for i in range(3):
+        bot.push_context({"role": "assistant", "content": f"Answer 0.{i}"})
+    bot.push_context({"role": "user", "content": "Question 1"})
+    bot.push_context({"role": "assistant", "content": "Answer 1"})
+    bot.set_context_policy(SlidingWindowPolicy(max_turns=2))
+    assert not bot.apply_context_policy()
+    bot.set_context_policy(SlidingWindowPolicy(max_turns=1))
+    assert bot.apply_context_policy()
+    assert contents(bot) == ["Question 1", "Answer 1"]
+
+
+def test_sliding_window_fits_budget(bot):
+    add_turns(bot, 10, words=50)
+    budget = len(bot) // 2
+    bot.set_context_policy(SlidingWindowPolicy(max_turns=8, budget=budget))
+    assert bot.apply_context_policy()
+    assert len(bot) <= budget
+    assert contents(bot)[-1].startswith("Answer 9")
+
+
+def test_pinned_messages_survive_eviction(bot):
+    add_turns(bot, 10, words=50)
+    bot.pin_context(3)
+    pinned = bot.context[3]["content"]
+    budget = len(bot) // 3
+    bot.set_context_policy(EvictOldestPolicy(budget=budget))
+    assert bot.apply_context_policy()
+    assert pinned in contents(bot)
+    assert len(bot) <= budget
+    bot.set_context_policy(SlidingWindowPolicy(max_turns=1))
+    bot.apply_context_policy()
+    assert contents(bot)[0] == pinned
+
+
+def test_summary_survives_eviction(bot):
+    summarizer = bot.actors.summarizer = Summarizer()
+    add_turns(bot, 10, words=50)
+    budget = len(bot) // 2
+    bot.set_context_policy(EvictOldestPolicy(budget=budget, summarize=True))
+    assert bot.apply_context_policy()
+    assert bot._context_info[1].summary is not None
+    summary = bot.context[1]["content"]
+    assert summary.startswith("Summary of")
+    assert len(bot) <= budget
+    add_turns(bot, 5, words=50)
+    bot.apply_context_policy()
+    # The summary is merged, but not evicted.
+    assert bot._context_info[1].summary is not None
+    assert bot.context[1]["content"].startswith(summary)
+    assert summarizer.calls >= 2
+
+
+def test_protected_messages_over_budget(bot):
+    summarizer = bot.actors.summarizer = Summarizer()
+    add_turns(bot, 10, words=50)
+    bot.push_context({"role": "user", "content": "word " * 500})
+    bot.set_context_policy(EvictOldestPolicy(budget=300, summarize=True))
+    assert not bot._context_policy.can_fit(bot)
+    n_messages = len(bot.context)
+    # Eviction can't fit the context, so nothing is evicted and summarized message by message.
+    assert not bot.apply_context_policy()
+    assert len(bot.context) == n_messages
+    assert summarizer.calls == 0
@@ -0,0 +1,61 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+import asyncio
+
+import pytest
+
+from RAI import AsyncQAGPT, QAGPT
+
+
+@pytest.fixture
+def gpt() -> QAGPT:
+    return QAGPT(key="test")
+
+
+def test_split_pairs_by_newlines(gpt):
+    pairs, rest = gpt.split_pairs("'a': 1\n'b': 2\n'c': 3")
+    assert pairs == [("a", "1"), ("b", "2")]
+    assert rest == "'c': 3"
+
+
+def test_split_pairs_by_commas(gpt):
+    pairs, rest = gpt.split_pairs("'a': 1, 'b'")
+    assert pairs == [("a", "1")]
+    assert rest == " 'b'"
+
+
+def test_parse_dict_separators(gpt):
+    assert gpt.parse_dict("'a': 1\n'b': 2\n'c': 3") == {"a": "1", "b": "2", "c": "3"}
+    assert gpt.parse_dict("{'a': 1, 'b': 2}") == {"a": "1", "b": "2"}
+
+
+def test_iter_dict_yields_pairs_as_lines_complete(gpt):
+    deltas = ["'a': 1\n", "'b': 2\n", "'c': 3"]
+    received = []
+
+    def stream(messages):
+        for delta in deltas:
+            received.append(delta)
+            yield delta
+
+    gpt.stream = stream
+    pairs = []
+    for pair in gpt.iter_dict("request"):
+        pairs.append((pair, len(received)))
+    assert pairs == [(("a", "1"), 1), (("b", "2"), 2), (("c", "3"), 3)]
+
+
+def test_async_iter_dict_matches_sync():
+    gpt = AsyncQAGPT(key="test")
+    deltas = ["{'a': 1, 'b'", ": 2,\n'c': 3}"]
+
+    async def stream(messages):
+        for delta in deltas:
+            yield delta
+
+    async def collect() -> list:
+        return [pair async for pair in gpt.iter_dict("request")]
+
+    gpt.stream = stream
+    assert asyncio.run(collect()) == [("a", "1"), ("b", "2"), ("c", "3")]
@@ -0,0 +1,32 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+import pytest
+
+from RAI.api import RateLimiter
+
+
+def test_set_limits_keeps_reservations():
+    limiter = RateLimiter({"gpt-3.5-turbo": {"rpm": 60, "tpm": 600}})
+    limiter.reserve("gpt-3.5-turbo", tokens=600)
+    delay = limiter.reserve("gpt-3.5-turbo", tokens=300)
+    assert delay == pytest.approx(30, abs=0.1)
+    limiter.set_limits("gpt-3.5-turbo", rpm=60, tpm=600)
+    limiter.set_limits("gpt-3.5-turbo", rpm=60, tpm=600)
+    # Debt of the first two reservations is kept, so the next one waits for all of them.
+    assert limiter.reserve("gpt-3.5-turbo", tokens=0) == pytest.approx(delay, abs=0.1)
+
+
+def test_set_limits_clamps_tokens_to_new_capacity():
+    limiter = RateLimiter({"gpt-4": {"tpm": 600}})
+    limiter.set_limits("gpt-4", tpm=60)
+    assert limiter.reserve("gpt-4", tokens=60) == 0
+    assert limiter.reserve("gpt-4", tokens=30) == pytest.approx(30, abs=0.1)
+
+
+def test_set_limits_removes_limit():
+    limiter = RateLimiter({"gpt-4": {"rpm": 1}})
+    limiter.reserve("gpt-4")
+    limiter.set_limits("gpt-4", rpm=None)
+    assert not limiter.is_limited("gpt-4")
+    assert limiter.reserve("gpt-4") == 0
@@ -0,0 +1,56 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+import pytest
+
+from RAI import TextChunker, get_encoding_registry
+
+from conftest import sample_texts
+
+
+def get_pieces(text: str) -> list:
+    encoding = get_encoding_registry().for_model("gpt-3.5-turbo")
+    return encoding.decode_tokens_bytes(encoding.encode_ordinary(text))
+
+
+@pytest.mark.parametrize("name", list(sample_texts))
+@pytest.mark.parametrize("chunk_size, overlap", [(50, 0), (64, 16), (7, 3), (1000, 100)])
+def test_split_bounds(name, chunk_size, overlap):
+    text = sample_texts[name]
+    pieces = get_pieces(text)
+    chunker = TextChunker(chunk_size=chunk_size, overlap=overlap)
+    bounds = chunker.split(pieces, chunk_size)
+    assert bounds[0][0] == 0
+    assert bounds[-1][1] == len(pieces)
+    data = []
+    previous_end = 0
+    for start, end in bounds:
+        assert 0 < end - start <= chunk_size
+        assert start <= previous_end
+        # Chunks never start in the middle of a multi-byte symbol.
+        assert not pieces[start] or pieces[start][0] & 0xC0 != 0x80
+        data.extend(pieces[max(start, previous_end):end])
+        previous_end = end
+    # Chunks without overlaps join back into the text.
+    assert b"".join(data).decode("utf-8") == text
+
+
+@pytest.mark.parametrize("name", list(sample_texts))
+def test_run_chunks(name):
+    text = sample_texts[name]
+    chunker = TextChunker(chunk_size=50)
+    encoding = get_encoding_registry().for_model("gpt-3.5-turbo")
+    chunks = chunker.run(text)
+    assert len(chunks) > 1
+    assert "".join(chunks) == text
+    for chunk in chunks:
+        assert len(encoding.encode_ordinary(chunk)) <= 50
+
+
+def test_run_snaps_to_line_ends():
+    chunks = TextChunker(chunk_size=100, snap_window=0.5).run(sample_texts["prose"])
+    assert all(chunk.endswith("\n") for chunk in chunks[:-1])
+
+
+def test_run_short_text():
+    assert TextChunker(chunk_size=100).run("Hello!") == ["Hello!"]
@@ -0,0 +1,38 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+import pytest
+
+from RAI import TokenCounter, get_encoding_registry
+from RAI.actors.token_counter import split_text
+
+from conftest import sample_texts
+
+
+@pytest.mark.parametrize("name", list(sample_texts))
+@pytest.mark.parametrize("size", [1, 100, 1000])
+def test_split_text(name, size):
+    text = sample_texts[name]
+    parts = split_text(text, size)
+    assert "".join(parts) == text
+    encoding = get_encoding_registry().for_model("gpt-3.5-turbo")
+    tokens = [token for part in parts for token in encoding.encode_ordinary(part)]
+    assert tokens == encoding.encode_ordinary(text)
+
+
+def test_split_text_at_line_starts():
+    text = "a\n  b\nc\n\nd\ne"
+    parts = split_text(text, 1)
+    assert "".join(parts) == text
+    assert all(part.endswith("\n") for part in parts[:-1])
+    # Lines, which start with whitespace, are never separated from the previous ones.
+    assert all(not part[0].isspace() for part in parts)
+
+
+def test_count_empty_content():
+    counter = TokenCounter("gpt-3.5-turbo")
+    message = {"role": "assistant", "content": None, "function_call": {"name": "f", "arguments": "{}"}}
+    assert counter.count_from_str(None) == counter.count_from_str(None, exact=False) == 0
+    assert counter.count_message(message) == counter.count_message(message, exact=False)
+    messages = [{"role": "user", "content": "Call f"}, message]
+    assert counter.count_from_list(messages) == sum(counter.count_message(msg) for msg in messages) + counter._tokens_per_reply
@@ -0,0 +1,79 @@
+# Created by: Ausar686
+# https://github.com/Ausar686
+
+import hashlib
+import os
+
+import pytest
+
+from RAI.actors import tokenizer_assets
+from RAI.containers import RDict
+
+
+_data = b"dGVzdA== 0\n"
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    """
+    Fake encoding with RAI and tiktoken cache directories in a temporary directory.
+    """
+    assets = RDict(tokenizer_assets._assets)
+    assets["test_base"] = RDict({"file": "test_base.tiktoken", "sha256": hashlib.sha256(_data).hexdigest()})
+    monkeypatch.setattr(tokenizer_assets, "_assets", assets)
+    monkeypatch.setattr(tokenizer_assets, "_verified", set())
+    monkeypatch.setattr(tokenizer_assets, "_default_cache_dir", str(tmp_path / "rai"))
+    monkeypatch.delenv("TIKTOKEN_CACHE_DIR", raising=False)
+    monkeypatch.setenv("DATA_GYM_CACHE_DIR", str(tmp_path / "tiktoken"))
+    monkeypatch.delenv("RAI_OFFLINE", raising=False)
+    return tmp_path
+
+
+def stage_fake(directory) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = tokenizer_assets.get_asset_path("test_base", str(directory))
+    with open(path, "wb") as file:
+        file.write(_data)
+    return path
+
+
+def test_prepare_copies_staged_file_without_changing_environment(dirs):
+    stage_fake(dirs / "rai")
+    tokenizer_assets.prepare("test_base")
+    target = tokenizer_assets.get_asset_path("test_base", str(dirs / "tiktoken"))
+    with open(target, "rb") as file:
+        assert file.read() == _data
+    assert "TIKTOKEN_CACHE_DIR" not in os.environ
+
+
+def test_prepare_keeps_existing_tiktoken_cache(dirs):
+    target = stage_fake(dirs / "tiktoken")
+    tokenizer_assets.prepare("test_base")
+    assert not os.path.exists(dirs / "rai")
+    assert os.path.exists(target)
+
+
+def test_prepare_replaces_corrupted_tiktoken_cache(dirs):
+    target = stage_fake(dirs / "tiktoken")
+    with open(target, "ab") as file:
+        file.write(b"x")
+    with pytest.raises(ValueError):
+        tokenizer_assets.prepare("test_base")
+    stage_fake(dirs / "rai")
+    tokenizer_assets.prepare("test_base")
+    with open(target, "rb") as file:
+        assert file.read() == _data
+
+
+def test_prepare_rejects_corrupted_file(dirs):
+    path = stage_fake(dirs / "rai")
+    with open(path, "ab") as file:
+        file.write(b"x")
+    with pytest.raises(ValueError):
+        tokenizer_assets.prepare("test_base")
+
+
+def test_prepare_offline_without_staged_file(dirs, monkeypatch):
+    monkeypatch.setenv("RAI_OFFLINE", "1")
+    with pytest.raises(FileNotFoundError):
+        tokenizer_assets.prepare("test_base")
@@ -1,70 +1,165 @@
 # Created by: Ausar686
 # https://github.com/Ausar686
 
-from typing import Any
-
-import requests
+from typing import Any, AsyncIterator, Callable, Iterator, Union
+import functools
+import inspect
+import logging
+import reprlib
+import time
 
+from .api.async_client import get_async_client
+from .api.cache import get_cache
+from .api.client import get_client
+from .api.errors import APIError
+from .api.rate_limiter import get_rate_limiter
+from .api.retry import RetryPolicy
 from .containers.rdict import RDict
 
 
-def method_logger(func):
+# Short representations of arguments in log records, so that long contexts are never dumped entirely.
+_log_repr = reprlib.Repr()
+_log_repr.maxlevel = 2
+_log_repr.maxlist = 3
+_log_repr.maxtuple = 3
+_log_repr.maxdict = 3
+_log_repr.maxstring = 60
+_log_repr.maxother = 60
+
+
+def get_log_level(log: Union[bool, int, str, None]) -> Union[int, None]:
     """
-    Special decorator for logging RAI ChatBot methods.
+    Converts 'log' argument of RAI objects into logging level of their method records.
+    Args:
+        log [Union[bool, int, str, None]]: False or None disables method logging, True means logging.DEBUG,
+            int or str (i.e. "INFO") are used as logging level directly.
+    Returns:
+        level [Union[int, None]]: Logging level or None, if logging is disabled.
     """
-    
-    def start_log(func_name, args, kwargs):
-        strings = [
-            f"[INFO]: EXECUTING: {func.__name__}",
-            f"[INFO]: Args: {args}",
-            f"[INFO]: Kwargs: {kwargs}"
-        ]
-        print("\n".join(strings))
-        return
-    
-    def end_log(func_name, args, kwargs):
-        strings = [
-            f"[INFO]: FINISHED: {func.__name__}",
-            f"[INFO]: Args: {args}",
-            f"[INFO]: Kwargs: {kwargs}"
-        ]
-        print("\n".join(strings))
+    if log is None or log is False:
+        return None
+    if log is True:
+        return logging.DEBUG
+    if isinstance(log, str):
+        level = logging.getLevelName(log.upper())
+        if not isinstance(level, int):
+            raise ValueError(f"Unknown logging level: {log}")
+        return level
+    if isinstance(log, int):
+        return log
+    raise TypeError(f"'log' must be either bool, int or str, got: {type(log)}")
+
+
+def get_size(obj: Any) -> Union[int, None]:
+    """
+    Returns length of the object or None, if the object has no length.
+    """
+    try:
+        return len(obj)
+    except Exception:
+        return None
+
+
+class ArgsSummary:
+    """
+    Lazy summary of method arguments for log records.
+    It is formatted only if the record is actually emitted by some handler.
+    """
+
+    __slots__ = ("args", "kwargs")
+
+    def __init__(self, args: tuple, kwargs: dict) -> None:
+        self.args = args
+        self.kwargs = kwargs
         return
-        
-    def safe_log(logger, obj, func_name, args, kwargs):
-        try:
-            if obj.log:
-                logger(func_name, args, kwargs)
-        except Exception:
-            pass
+
+    def __str__(self) -> str:
+        strings = [_log_repr.repr(arg) for arg in self.args]
+        strings.extend(f"{key}={_log_repr.repr(value)}" for key, value in self.kwargs.items())
+        return ", ".join(strings)
+
+
+def method_logger(func: Callable) -> Callable:
+    """
+    Special decorator for logging RAI ChatBot methods.
+    Logging is configured per instance with '_log_level' attribute (see 'get_log_level')
+    and '_logger' attribute (logging.Logger, by default - logger of the module of the class).
+    If '_log_level' is None or the logger is not enabled for the level, the method is called directly.
+    Otherwise the decorator emits two records: on start (with truncated arguments summary)
+    and on finish, with structured 'method', 'duration' (in seconds) and 'sizes' (lengths of arguments and result) fields.
+    Supports both regular and coroutine methods.
+    """
+    name = func.__qualname__
+
+    def get_logger(obj: Any, level: int) -> Union[logging.Logger, None]:
+        logger = obj.__dict__.get("_logger") or logging.getLogger(type(obj).__module__)
+        if not logger.isEnabledFor(level):
+            return None
+        return logger
+
+    def start_log(logger: logging.Logger, level: int, args: tuple, kwargs: dict) -> float:
+        logger.log(level, "EXECUTING: %s(%s)", name, ArgsSummary(args, kwargs), extra={"method": name})
+        return time.perf_counter()
+
+    def end_log(logger: logging.Logger, level: int, start: float, args: tuple, kwargs: dict, res: Any) -> None:
+        duration = time.perf_counter() - start
+        sizes = {
+            "args": [get_size(arg) for arg in args],
+            "kwargs": {key: get_size(value) for key, value in kwargs.items()},
+            "result": get_size(res),
+        }
+        logger.log(
+            level,
+            "FINISHED: %s in %.3f ms",
+            name,
+            duration * 1000,
+            extra={"method": name, "duration": duration, "sizes": sizes})
         return
-    
-    def wrapper(*args, **kwargs):
-        obj = args[0]
-        safe_log(start_log, obj, func.__name__, args, kwargs)
-        res = func(*args, **kwargs)
-        safe_log(end_log, obj, func.__name__, args, kwargs)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(obj, *args, **kwargs):
+            level = obj.__dict__.get("_log_level")
+            # Fast path: logging is disabled for the instance.
+            if level is None:
+                return await func(obj, *args, **kwargs)
+            logger = get_logger(obj, level)
+            if logger is None:
+                return await func(obj, *args, **kwargs)
+            start = start_log(logger, level, args, kwargs)
+            res = await func(obj, *args, **kwargs)
+            end_log(logger, level, start, args, kwargs, res)
+            return res
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(obj, *args, **kwargs):
+        level = obj.__dict__.get("_log_level")
+        # Fast path: logging is disabled for the instance.
+        if level is None:
+            return func(obj, *args, **kwargs)
+        logger = get_logger(obj, level)
+        if logger is None:
+            return func(obj, *args, **kwargs)
+        start = start_log(logger, level, args, kwargs)
+        res = func(obj, *args, **kwargs)
+        end_log(logger, level, start, args, kwargs, res)
         return res
-    
+
     return wrapper
 
 
-def retry(n_retries: int=5):
+def retry(n_retries: int=5) -> RetryPolicy:
     """
     Retrying decorator function.
+    Is kept for backward compatibility: returns RetryPolicy with 'n_retries' attempts,
+    which can be used as a decorator for both regular and coroutine functions.
+    Example:
+        @retry(5)
+        def func():
+            ...
     """
-    def decorator(func):
-        def wrapper(*args, **kwargs):
-            n = n_retries
-            while True:
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    n -= 1
-                    if n <= 0:
-                        raise
-        return wrapper
-    return decorator
+    return RetryPolicy(max_attempts=n_retries)
 
 
 def to_rdict(obj: object, recursive: bool=True) -> RDict:
@@ -89,13 +184,111 @@ def to_rdict(obj: object, recursive: bool=True) -> RDict:
             return RDict(obj)
         return RDict({key: to_rdict(value) for key, value in obj.items()})
 
-def request_openai(**kwargs) -> dict:
+def lookup_cache(kwargs: dict) -> tuple:
+    """
+    Pops 'cache' kwarg and returns (cache, key) pair for the request.
+    Key is None, if caching is disabled or the request can't be cached.
+    """
+    use_cache = kwargs.pop("cache", True)
+    cache = get_cache()
+    if not use_cache or cache is None or not cache.is_cacheable(kwargs):
+        return cache, None
+    return cache, cache.make_key(kwargs)
+
+
+def request_openai(**kwargs) -> RDict:
     """
     Sends request to OpenAI API endpoint in order to obtain response.
     Is mainly used for chat-like interactions with GPT API.
+    The response is decoded directly into RDict (see 'RAI.containers.loads_rdict').
+    Request is sent via process-wide pooled client (see 'RAI.api.get_client'),
+    so that keep-alive connections are reused among all actors.
+    Before sending, the request waits for the quota of process-wide rate limiter (see 'RAI.api.get_rate_limiter').
+    Special kwargs (not sent in the request body):
+        api_key [str]: OpenAI API key.
+        timeout [Union[float, tuple]]: Either total timeout or (connect, read) pair.
+        base_url [str]: Base URL to send the request to (i.e. URL of 'RAI.api.server.LocalOpenAIServer').
+            If not passed, uses 'base_url' of the process-wide client.
+        cache [bool]: Whether to use process-wide completion cache (see 'RAI.api.configure_cache'). Default: True.
+    If the cache is enabled and contains the completion, it is returned without sending the request.
+    """
+    cache, key = lookup_cache(kwargs)
+    if key is not None:
+        json_data = cache.get(key)
+        if json_data is not None:
+            return json_data
+    limiter = get_rate_limiter()
+    model = kwargs.get("model")
+    tokens = limiter.estimate(**kwargs)
+    limiter.acquire(model, tokens)
+    try:
+        json_data = get_client().chat_completion(**kwargs)
+    except APIError as e:
+        limiter.notify_error(model, e)
+        raise
+    limiter.reconcile(model, tokens, json_data.get("usage"))
+    if key is not None:
+        cache.set(key, json_data)
+    return json_data
+
+
+def stream_openai(**kwargs) -> Iterator[dict]:
+    """
+    Sends streaming request to OpenAI API endpoint and returns an iterator,
+    which yields completion chunks (server-sent events), as soon as they arrive.
+    The request is sent eagerly, so that API errors are raised by this function.
+    Special kwargs are the same, as in 'request_openai'. Streamed completions are never cached.
+    """
+    kwargs.pop("cache", None)
+    limiter = get_rate_limiter()
+    model = kwargs.get("model")
+    limiter.acquire(model, limiter.estimate(**kwargs))
+    try:
+        return get_client().stream_chat_completion(**kwargs)
+    except APIError as e:
+        limiter.notify_error(model, e)
+        raise
+
+
+async def arequest_openai(**kwargs) -> RDict:
+    """
+    Non-blocking counterpart of 'request_openai'.
+    Request is sent via process-wide aiohttp client (see 'RAI.api.get_async_client').
+    """
+    cache, key = lookup_cache(kwargs)
+    if key is not None:
+        json_data = cache.get(key)
+        if json_data is not None:
+            return json_data
+    limiter = get_rate_limiter()
+    model = kwargs.get("model")
+    tokens = limiter.estimate(**kwargs)
+    await limiter.aacquire(model, tokens)
+    try:
+        json_data = await get_async_client().chat_completion(**kwargs)
+    except APIError as e:
+        limiter.notify_error(model, e)
+        raise
+    limiter.reconcile(model, tokens, json_data.get("usage"))
+    if key is not None:
+        cache.set(key, json_data)
+    return json_data
+
+
+async def astream_openai(**kwargs) -> AsyncIterator[dict]:
+    """
+    Non-blocking counterpart of 'stream_openai'.
+    The coroutine sends the request and returns an async iterator over completion chunks.
+    Example:
+        async for chunk in await astream_openai(**kwargs):
+            ...
     """
-    url = "https://api.openai.com/v1/chat/completions"
-    api_key = kwargs.pop("api_key", None)
-    headers = {"Authorization": f"Bearer {api_key}"}
-    r = requests.post(url, headers=headers, json=kwargs)
-    return r.json()
\ No newline at end of file
+    kwargs.pop("cache", None)
+    limiter = get_rate_limiter()
+    model = kwargs.get("model")
+    await limiter.aacquire(model, limiter.estimate(**kwargs))
+    try:
+        return await get_async_client().stream_chat_completion(**kwargs)
+    except APIError as e:
+        limiter.notify_error(model, e)
+        raise
\ No newline at end of file